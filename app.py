@@ -1,17 +1,42 @@
-import streamlit as st
-from dotenv import load_dotenv
-import os
+import importlib
 
-from utils.auth import login
-from utils.session import guardar_sesion, sesion_valida, eliminar_sesion
-from modulos.costos import mostrar_costos
-from modulos.pedidos import mostrar_pedidos
-from modulos.cuentas import mostrar_cuentas
-from utils.db_app import init_db    
-from modulos.entregas import mostrar_entregas
+from utils.tiempos import DEBUG_TIEMPOS, INICIO_PROCESO, Tiempos
 
+tiempos = Tiempos()
 
-init_db()  # crea tablas si no existen
+with tiempos.medir("imports"):
+    import streamlit as st
+    from dotenv import load_dotenv
+    import os
+
+    from utils.auth import borrar_cookie, escribir_cookie, login, token_de_cookie
+    from utils.session import guardar_sesion, sesion_valida, eliminar_sesion
+    from utils.db_app import MigracionError, init_db
+
+# Páginas del menú: el módulo se importa recién cuando se elige la opción
+# (pandas y compañía no se cargan para mostrar el login).
+PAGINAS = {
+    "Costos y tiempos": ("modulos.costos", "mostrar_costos"),
+    "Entregas": ("modulos.entregas", "mostrar_entregas"),
+    "Pedidos": ("modulos.pedidos", "mostrar_pedidos"),
+    "Cuentas": ("modulos.cuentas", "mostrar_cuentas"),
+}
+
+
+def mostrar_pagina(opcion: str) -> None:
+    modulo, funcion = PAGINAS[opcion]
+    with tiempos.medir(f"import {modulo}"):
+        pagina = getattr(importlib.import_module(modulo), funcion)
+    with tiempos.medir(opcion):
+        pagina()
+
+
+with tiempos.medir("init_db"):
+    try:
+        init_db()  # crea tablas si no existen (una vez por proceso)
+    except MigracionError as e:
+        st.error(str(e))
+        st.stop()
 
 # Configuración general de la app
 st.set_page_config(page_title="3D.IEGO", layout="wide")
@@ -20,37 +45,57 @@ st.set_page_config(page_title="3D.IEGO", layout="wide")
 load_dotenv()
 USER = os.getenv("APP_USER")
 
-# Control de sesión
+# Control de sesión: cada navegador lleva su token en una cookie (ver utils/auth.py),
+# así sobrevive a recargas de página y varios usuarios pueden estar logueados a la vez.
+# Links viejos con el token en la URL (?s=...): se saca de la barra de direcciones y no vale.
+st.query_params.pop("s", None)
 if "logueado" not in st.session_state:
-    st.session_state["logueado"] = sesion_valida()
+    token = token_de_cookie()
+    st.session_state["logueado"] = sesion_valida(token)
+    if st.session_state["logueado"]:
+        st.session_state["token_sesion"] = token
 
 # Si no está logueado, mostrar login
 if not st.session_state["logueado"]:
-    login()
-    if st.session_state.get("logueado") is True:
-        guardar_sesion(USER)
+    if token_de_cookie() or st.session_state.pop("borrar_cookie", False):
+        borrar_cookie()  # vencida o cerrada: que el navegador no la siga mandando
+    with tiempos.medir("login"):
+        login()
 
 # Si está logueado, mostrar menú y secciones
 else: 
+    # Recién logueado (login() hace st.rerun()): un token nuevo en cada login.
+    if "token_sesion" not in st.session_state:
+        st.session_state["token_sesion"] = guardar_sesion(USER)
+        escribir_cookie(st.session_state["token_sesion"])
+
     st.sidebar.title("Menú")
     opcion = st.sidebar.radio(
         label="Menú",  # obligatorio aunque después lo ocultes
-        options=["Costos y tiempos", "Entregas", "Cuentas", "Salir"],
+        options=[*PAGINAS, "Salir"],
         index=0,
         label_visibility="collapsed"
     )
 
-    if opcion == "Costos y tiempos":
-        mostrar_costos()
-
-    elif opcion == "Entregas":
-        mostrar_entregas()
-
-    elif opcion == "Cuentas":
-        mostrar_cuentas()
-
-    elif opcion == "Salir":
-        eliminar_sesion()
+    if opcion == "Salir":
+        eliminar_sesion(st.session_state.pop("token_sesion", None))
         st.session_state["logueado"] = False
+        st.session_state["borrar_cookie"] = True
         st.rerun()
+    else:
+        mostrar_pagina(opcion)
 
+if DEBUG_TIEMPOS:
+    with st.sidebar.expander("⏱️ Tiempos", expanded=False):
+        for fase, ms in tiempos.fases.items():
+            st.caption(f"{fase}: {ms:,.1f} ms — {tiempos.sql_por_fase.get(fase, 0)} consultas")
+        st.caption(f"rerun total: {tiempos.total_ms():,.1f} ms")
+        st.caption(f"SQL: {tiempos.sql.cantidad} consultas, {tiempos.sql.total_ms:,.1f} ms")
+        st.caption(f"proceso activo hace: {(tiempos.inicio - INICIO_PROCESO):,.1f} s")
+        for sql, veces in tiempos.sql.repetidas():
+            st.warning(f"Posible N+1: {veces} veces en este rerun")
+            st.code(sql, language="sql")
+        if tiempos.sql.cantidad:
+            st.caption("Consultas más lentas:")
+            for ms, sql in tiempos.sql.lentas():
+                st.code(f"-- {ms:,.1f} ms\n{sql}", language="sql")
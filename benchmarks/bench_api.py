@@ -0,0 +1,162 @@
+# benchmarks/bench_api.py
+"""
+Prueba de carga de la API de sólo lectura (utils/api.py) contra una instancia local:
+  - la misma página de entregas una y otra vez (sale de la cache de respuestas, 200);
+  - la misma página con If-None-Match (304, sin cuerpo);
+  - páginas distintas en cada pedido (cursor distinto: siempre consulta SQLite);
+  - una entrega nueva escrita desde otro proceso (este) cambia el ETag y la respuesta.
+
+Uso:
+    python -m benchmarks.bench_api [entregas] [conexiones] [segundos por escenario]
+
+El cliente es HTTP/1.1 mínimo con keep-alive sobre asyncio, en el mismo equipo que el
+servidor: en una máquina de pocos núcleos los dos compiten por la CPU.
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="3diego_api_")) / "app.db")
+
+from benchmarks.datos_sinteticos import DIAS_HISTORIA, Escala, poblar  # noqa: E402
+from utils.db_app import crear_entrega, engine, init_db  # noqa: E402
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+async def pedir(lector, escritor, ruta: str, headers: dict | None = None) -> tuple[int, dict, bytes]:
+    extra = "".join(f"{k}: {v}\r\n" for k, v in (headers or {}).items())
+    escritor.write(f"GET {ruta} HTTP/1.1\r\nHost: localhost\r\n{extra}\r\n".encode())
+    cabecera = await lector.readuntil(b"\r\n\r\n")
+    linea, *resto = cabecera.decode("latin-1").split("\r\n")
+    status = int(linea.split()[1])
+    campos = dict(r.split(": ", 1) for r in resto if r)
+    campos = {k.lower(): v for k, v in campos.items()}
+    largo = int(campos.get("content-length", 0))
+    cuerpo = await lector.readexactly(largo) if largo and status != 304 else b""
+    return status, campos, cuerpo
+
+
+async def cargar(port: int, conexiones: int, segundos: float, ruta, headers: dict | None = None) -> tuple[int, list[float], dict]:
+    """`conexiones` clientes con keep-alive pidiendo `ruta(i)` sin pausa durante `segundos`."""
+    latencias: list[float] = []
+    estados: dict[int, int] = {}
+    fin = time.perf_counter() + segundos
+
+    async def cliente(n: int) -> None:
+        lector, escritor = await asyncio.open_connection("127.0.0.1", port)
+        i = n
+        while time.perf_counter() < fin:
+            t0 = time.perf_counter()
+            status, _, _ = await pedir(lector, escritor, ruta(i), headers)
+            latencias.append((time.perf_counter() - t0) * 1000)
+            estados[status] = estados.get(status, 0) + 1
+            i += conexiones
+        escritor.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(cliente(n) for n in range(conexiones)))
+    return len(latencias), latencias, estados | {"segundos": time.perf_counter() - t0}
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def esperar(port: int, proceso: subprocess.Popen, limite: float = 30.0) -> None:
+    fin = time.perf_counter() + limite
+    while time.perf_counter() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError("la API terminó al arrancar")
+        try:
+            _, escritor = await asyncio.open_connection("127.0.0.1", port)
+            escritor.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("la API no arrancó a tiempo")
+
+
+async def una(port: int, ruta: str, headers: dict | None = None) -> tuple[int, dict, bytes]:
+    lector, escritor = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        return await pedir(lector, escritor, ruta, headers)
+    finally:
+        escritor.close()
+
+
+async def correr(port: int, conexiones: int, segundos: float) -> bool:
+    pagina = "/entregas?limit=50"
+    _, campos, _ = await una(port, pagina)
+    tag = campos["etag"]
+    _, _, cuerpo = await una(port, "/")
+    lecturas_antes = json.loads(cuerpo)["lecturas_versiones"]
+
+    rnd = random.Random(42)
+    inicio = date.today() - timedelta(days=DIAS_HISTORIA)
+    fechas = [inicio + timedelta(days=rnd.randrange(DIAS_HISTORIA)) for _ in range(1000)]
+    escenarios = [
+        ("misma página (cache, 200)", lambda i: pagina, None),
+        ("If-None-Match (304)", lambda i: pagina, {"If-None-Match": tag}),
+        ("páginas distintas (SQLite)", lambda i: f"{pagina}&antes={fechas[i % len(fechas)]},{10**9 - i}", None),
+    ]
+    print(f"  {'escenario':<30}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}  respuestas")
+    for nombre, ruta, headers in escenarios:
+        pedidos, latencias, estados = await cargar(port, conexiones, segundos, ruta, headers)
+        seg = estados.pop("segundos")
+        latencias.sort()
+        print(f"  {nombre:<30}{pedidos / seg:9.0f}{statistics.median(latencias):9.2f}"
+              f"{latencias[int(len(latencias) * 0.99)]:9.2f}  {estados}")
+
+    _, _, cuerpo = await una(port, "/")
+    lecturas = json.loads(cuerpo)["lecturas_versiones"] - lecturas_antes
+    print(f"  lecturas de versiones_tablas durante {3 * segundos:.0f}s de carga: {lecturas}")
+
+    # Una escritura de otro proceso: el mismo If-None-Match ahora tiene que traer la entrega nueva.
+    nueva = crear_entrega("Cliente API", date.today() + timedelta(days=1), "", "", [
+        {"pieza": "Prueba", "cantidad": 1, "precio_unitario": 1.0}
+    ])
+    status, campos, cuerpo = await una(port, pagina, {"If-None-Match": tag})
+    ok = status == 200 and campos["etag"] != tag and json.loads(cuerpo)["filas"][0]["id"] == nueva.id
+    print(f"  después de crear_entrega: {status}, ETag {'nuevo' if campos['etag'] != tag else 'igual'} "
+          f"{'✅' if ok else '❌'}")
+    return ok
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    conexiones = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    segundos = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+    init_db()
+    poblar(engine, Escala.para(n))
+    port = puerto_libre()
+    print(f"{n:,} entregas, {conexiones} conexiones keep-alive, {segundos:.0f}s por escenario, {os.cpu_count()} CPU")
+
+    env = dict(os.environ, PYTHONPATH=str(RAIZ))
+    proceso = subprocess.Popen([sys.executable, "-m", "utils.api", "--port", str(port)], env=env,
+                               cwd=Path(os.environ["DB_PATH"]).parent, stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(esperar(port, proceso))
+        ok = asyncio.run(correr(port, conexiones, segundos))
+    finally:
+        proceso.terminate()
+        proceso.wait(10)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# benchmarks/bench_archivo.py
+"""
+Archivo histórico (utils/archivo.py): tamaño de app.db y latencia de las consultas del día a día
+antes y después de pasar la historia vieja al archivo, tiempo de archivar (con VACUUM) y costo
+de exportar todo a través de las vistas historico_* (caliente UNION ALL archivo).
+
+Uso:
+    python -m benchmarks.bench_archivo [entregas] [meses que quedan en app.db]
+
+Sale con código 1 si después de archivar cambia lo exportado o algún resumen deja de coincidir.
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="3diego_archivo_")) / "app.db")
+
+from benchmarks.datos_sinteticos import DIAS_HISTORIA, Escala, poblar  # noqa: E402
+from utils.archivo import archivar, corte_por_meses, tamano_base  # noqa: E402
+from utils.db_app import (  # noqa: E402
+    buscar_entregas, buscar_movimientos, engine, estadisticas_cliente, init_db, search_clientes,
+    ultimas_entregas, verificar_resumen_movimientos, verificar_stats_clientes,
+)
+from utils.exportar import exportar  # noqa: E402
+
+
+def p50_ms(fn, veces: int = 50) -> float:
+    tiempos = []
+    for _ in range(veces):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+
+def medir(escala: Escala, rnd: random.Random) -> dict[str, float]:
+    return {
+        "ultimas_entregas(10)": p50_ms(lambda: ultimas_entregas(10)),
+        "buscar_entregas (1ª página)": p50_ms(lambda: buscar_entregas(limit=50)),
+        "buscar_movimientos (1ª página)": p50_ms(lambda: buscar_movimientos(limit=50)),
+        "search_clientes": p50_ms(lambda: search_clientes.__wrapped__("gonz")),
+        "estadisticas_cliente": p50_ms(lambda: estadisticas_cliente.__wrapped__(rnd.randint(1, escala.clientes))),
+    }
+
+
+def exportar_todo() -> tuple[int, int, float]:
+    t0 = time.perf_counter()
+    filas = tuple(exportar(fuente, "csv", io.BytesIO()) for fuente in ("entregas", "movimientos"))
+    return (*filas, time.perf_counter() - t0)
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    meses = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    rnd = random.Random(42)
+    init_db()
+    escala = Escala.para(n)
+    poblar(engine, escala)
+    print(f"{n:,} entregas y {escala.movimientos:,} movimientos en {DIAS_HISTORIA // 365} años; quedan {meses} meses en app.db")
+
+    antes, tamano_antes = medir(escala, rnd), tamano_base()
+    *export_antes, seg_antes = exportar_todo()
+    r = archivar(corte_por_meses(meses))
+    print(f"  archivar: {r.entregas:,} entregas ({r.items:,} ítems) y {r.movimientos:,} movimientos en {r.segundos:.1f}s")
+    print(f"  app.db: {tamano_antes / 2**20:8.1f} MB -> {tamano_base() / 2**20:8.1f} MB")
+    despues = medir(escala, rnd)
+    *export_despues, seg_despues = exportar_todo()
+
+    print(f"  {'p50 (ms)':<32}{'antes':>9}{'después':>9}")
+    for nombre in antes:
+        print(f"  {nombre:<32}{antes[nombre]:9.3f}{despues[nombre]:9.3f}")
+    print(f"  {'exportar todo (s)':<32}{seg_antes:9.2f}{seg_despues:9.2f}  (después, caliente UNION ALL archivo)")
+
+    diferencias = len(verificar_stats_clientes()) + len(verificar_resumen_movimientos())
+    ok = export_antes == export_despues and not diferencias
+    print(f"  exportado {export_antes} -> {export_despues}; diferencias en resúmenes: {diferencias} "
+          f"{'✅' if ok else '❌'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
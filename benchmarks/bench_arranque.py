@@ -0,0 +1,60 @@
+# benchmarks/bench_arranque.py
+"""
+Tiempo hasta el primer render (pantalla de login) en un proceso nuevo, y de los reruns siguientes.
+
+Compara:
+  - "antes": importando todas las páginas al arrancar (como hacía app.py).
+  - "ahora": registro de páginas con import perezoso.
+
+Uso:
+    python -m benchmarks.bench_arranque
+
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+if sys.argv[1] == "antes":
+    import modulos.costos, modulos.entregas, modulos.cuentas, modulos.pedidos  # noqa: F401
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=60).run()
+primer = (time.perf_counter() - t0) * 1000
+reruns = []
+for _ in range(5):
+    t1 = time.perf_counter()
+    at.run()
+    reruns.append((time.perf_counter() - t1) * 1000)
+print(json.dumps({"primer_render_ms": round(primer, 1), "rerun_ms": round(sorted(reruns)[2], 1)}))
+"""
+
+
+def medir(variante: str) -> dict:
+    env = dict(os.environ, DB_PATH=str(Path(tempfile.mkdtemp(prefix="3diego_arranque_")) / "app.db"))
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT, variante],
+        cwd=RAIZ, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    for variante in ("antes", "ahora"):
+        muestras = [medir(variante) for _ in range(3)]
+        primer = sorted(m["primer_render_ms"] for m in muestras)[1]
+        rerun = sorted(m["rerun_ms"] for m in muestras)[1]
+        print(f"{variante:>6}: primer render {primer:8.1f} ms   rerun login {rerun:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
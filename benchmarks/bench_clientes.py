@@ -0,0 +1,86 @@
+# benchmarks/bench_clientes.py
+"""
+Compara la búsqueda de clientes vieja (ILIKE '%q%') contra la nueva (FTS5 trigram + nombre_norm).
+
+Uso:
+    python -m benchmarks.bench_clientes [cantidad_clientes]
+
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TMP = tempfile.mkdtemp(prefix="3diego_bench_")
+os.environ["DB_PATH"] = str(Path(TMP) / "bench.db")
+
+from sqlalchemy import text  # noqa: E402
+
+from utils import db_app  # noqa: E402
+from utils.db_app import Cliente, engine, get_session, init_db, normalizar_nombre  # noqa: E402
+
+NOMBRES = ["José", "María", "Lucía", "Martín", "Sofía", "Tomás", "Valentina", "Agustín", "Camila", "Nicolás"]
+APELLIDOS = ["Pérez", "González", "Rodríguez", "Fernández", "López", "Martínez", "Gómez", "Díaz", "Sánchez", "Romero"]
+
+
+def poblar(n: int) -> None:
+    rnd = random.Random(42)
+    filas = []
+    for i in range(n):
+        nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {i}"
+        filas.append({"nombre": nombre, "norm": normalizar_nombre(nombre)})
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO clientes (nombre, nombre_norm, creado_en) VALUES (:nombre, :norm, CURRENT_TIMESTAMP)"), filas)
+
+
+def medir(fn, consultas: list[str], repeticiones: int = 5) -> dict:
+    tiempos = []
+    for _ in range(repeticiones):
+        for q in consultas:
+            t0 = time.perf_counter()
+            fn(q)
+            tiempos.append((time.perf_counter() - t0) * 1000)
+    tiempos.sort()
+    return {
+        "p50_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[int(len(tiempos) * 0.95) - 1], 3),
+    }
+
+
+def buscar_viejo(query: str, limit: int = 20):
+    with get_session() as s:
+        q = f"%{query.strip()}%"
+        return s.query(Cliente).filter(Cliente.nombre.ilike(q)).order_by(Cliente.nombre).limit(limit).all()
+
+
+def exacto_viejo(nombre: str):
+    with get_session() as s:
+        return s.query(Cliente).filter(Cliente.nombre.ilike(nombre.strip())).one_or_none()
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    init_db()
+    poblar(n)
+    # Sin la cache de proceso: medimos la consulta SQL en sí.
+    buscar_nuevo = db_app.search_clientes.__wrapped__
+    exacto_nuevo = db_app.get_cliente_by_nombre.__wrapped__
+
+    busquedas = ["gonz", "maria lop", "99999", "tomas diaz 12", "zzz"]
+    exactos = [f"José Pérez {i}" for i in range(0, n, max(n // 5, 1))]
+
+    print(f"clientes: {n}")
+    print("búsqueda   vieja:", medir(buscar_viejo, busquedas))
+    print("búsqueda   nueva:", medir(buscar_nuevo, busquedas))
+    print("exacto     viejo:", medir(exacto_viejo, exactos))
+    print("exacto     nuevo:", medir(exacto_nuevo, exactos))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_costos.py
+"""
+Compara el cálculo de costos fila por fila (loop escalar) contra `calcular_costos` vectorizado.
+
+Uso:
+    python -m benchmarks.bench_costos
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.calculo_costos import calcular_costo, calcular_costos
+from utils.config import cargar_config
+
+
+def lote(n: int) -> pd.DataFrame:
+    rnd = np.random.default_rng(42)
+    return pd.DataFrame({
+        "horas": rnd.integers(0, 24, n),
+        "minutos": rnd.integers(0, 60, n),
+        "gramos": rnd.integers(1, 1000, n),
+    })
+
+
+def main() -> None:
+    config = cargar_config()
+    for n in (1_000, 100_000, 1_000_000):
+        df = lote(n)
+
+        t0 = time.perf_counter()
+        escalar = [
+            calcular_costo(h, m, g, config)
+            for h, m, g in zip(df["horas"].tolist(), df["minutos"].tolist(), df["gramos"].tolist())
+        ]
+        t_escalar = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        vect = calcular_costos(df, config)
+        t_vect = time.perf_counter() - t0
+
+        assert np.isclose(vect["precio_total"].iloc[-1], escalar[-1]["precio_total"])
+        print(
+            f"{n:>9,} filas  escalar: {t_escalar * 1000:9.1f} ms  "
+            f"vectorizado: {t_vect * 1000:7.1f} ms  ({t_escalar / t_vect:,.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_exportar.py
+"""
+Filas/seg y memoria pico de la exportación en streaming (utils/exportar.py) sobre una base sintética.
+
+Uso:
+    python -m benchmarks.bench_exportar [filas]
+
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+TMP = Path(tempfile.mkdtemp(prefix="3diego_exportar_"))
+os.environ["DB_PATH"] = str(TMP / "app.db")
+
+from benchmarks.datos_sinteticos import Escala, poblar  # noqa: E402
+from utils.db_app import engine, init_db  # noqa: E402
+from utils.exportar import exportar, parquet_disponible  # noqa: E402
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    init_db()
+    poblar(engine, Escala(clientes=100, entregas=n, items_por_entrega=1, movimientos=n))
+    print(f"filas: {n:,}")
+    formatos = ["csv", "parquet"] if parquet_disponible() else ["csv"]
+    for fuente in ("entregas", "movimientos"):
+        for formato in formatos:
+            destino = TMP / f"{fuente}.{formato}"
+            t0 = time.perf_counter()
+            with open(destino, "wb") as f:
+                filas = exportar(fuente, formato, f)
+            dt = time.perf_counter() - t0
+
+            # Segunda pasada sólo para medir memoria (tracemalloc hace todo más lento).
+            tracemalloc.start()
+            with open(destino, "wb") as f:
+                exportar(fuente, formato, f)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {fuente:<12} {formato:<8} {filas / dt:>10,.0f} filas/seg   "
+                  f"memoria pico {pico / 2**20:6.1f} MiB   {destino.stat().st_size / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_gcode.py
+"""
+MB/s del analizador de G-code (utils/gcode.py) sobre archivos sintéticos grandes:
+  - simulación (G-code sin metadatos del laminador),
+  - metadatos al final (estilo PrusaSlicer: no recorre el archivo),
+  - .3mf con el G-code adentro (simulación descomprimiendo en streaming),
+  - caché: segundo análisis del mismo archivo (sólo el hash).
+
+Uso:
+    python -m benchmarks.bench_gcode [MB]
+"""
+from __future__ import annotations
+
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+from utils.gcode import analizar, analizar_cacheado
+
+
+def generar_gcode(ruta: Path, mb: int, semilla: int = 42) -> None:
+    """Capas de perímetros y relleno con travels y retracciones, como las de un laminador."""
+    rnd = random.Random(semilla)
+    objetivo = mb * 1024 * 1024
+    with open(ruta, "w", encoding="ascii") as f:
+        f.write("; generado para benchmark\nG21\nG90\nM83\nG28\nM104 S210\nM140 S60\nG92 E0\n")
+        z, x, y, capa = 0.2, 100.0, 100.0, 0
+        while f.tell() < objetivo:
+            capa += 1
+            f.write(f";LAYER:{capa}\nG1 Z{z:.2f} F600\n;TYPE:WALL-OUTER\n")
+            lineas = []
+            for _ in range(2000):
+                nx, ny = x + rnd.uniform(-5, 5), y + rnd.uniform(-5, 5)
+                dist = ((nx - x) ** 2 + (ny - y) ** 2) ** 0.5
+                lineas.append(f"G1 X{nx:.3f} Y{ny:.3f} E{dist * 0.0333:.5f}\n")
+                x, y = nx, ny
+                if rnd.random() < 0.02:
+                    lineas.append(f"G1 E-0.8 F2100\nG0 F9000 X{x + 10:.3f} Y{y + 10:.3f}\nG1 E0.8 F2100\nG1 F1800\n")
+                    x, y = x + 10, y + 10
+            f.write("".join(lineas))
+            z += 0.2
+        f.write("M104 S0\nM140 S0\nM84\n")
+
+
+def medir(nombre: str, fn, mb: float) -> None:
+    t0 = time.perf_counter()
+    r = fn()
+    dt = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  {nombre:<22} {mb / dt:>9,.1f} MB/s   {dt * 1000:>9,.1f} ms   memoria pico {pico / 2**20:5.1f} MiB"
+          f"   -> {r.horas}h {r.minutos}m, {r.gramos:,.1f} g ({r.fuente})")
+
+
+def main() -> None:
+    mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    tmp = Path(tempfile.mkdtemp(prefix="3diego_gcode_"))
+    plano = tmp / "pieza.gcode"
+    generar_gcode(plano, mb)
+    tamano_mb = plano.stat().st_size / 2**20
+
+    con_meta = tmp / "pieza_prusa.gcode"
+    shutil.copy(plano, con_meta)
+    with open(con_meta, "a") as f:
+        f.write("; filament used [mm] = 123456.78\n; filament used [g] = 368.25\n"
+                "; estimated printing time (normal mode) = 1d 2h 3m 4s\n")
+
+    mf = tmp / "pieza.gcode.3mf"
+    with zipfile.ZipFile(mf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.write(plano, "Metadata/plate_1.gcode")
+
+    print(f"archivo: {tamano_mb:,.0f} MB")
+    medir("simulación", lambda: analizar(plano), tamano_mb)
+    medir("metadatos (cola)", lambda: analizar(con_meta), tamano_mb)
+    medir(".3mf (simulación)", lambda: analizar(mf), tamano_mb)
+    analizar_cacheado(plano)
+    medir("caché (hash)", lambda: analizar_cacheado(plano), tamano_mb)
+    shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
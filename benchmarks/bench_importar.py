@@ -0,0 +1,52 @@
+# benchmarks/bench_importar.py
+"""
+Filas/seg de la importación de extractos (utils/importar.py): primera importación y
+reimportación del mismo archivo (todo omitido por hash).
+
+Uso:
+    python -m benchmarks.bench_importar [filas]
+
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+TMP = Path(tempfile.mkdtemp(prefix="3diego_importar_"))
+os.environ["DB_PATH"] = str(TMP / "app.db")
+
+from utils.importar import importar_movimientos  # noqa: E402
+
+
+def generar_extracto(ruta: Path, n: int) -> None:
+    """Extracto con formato de banco: preámbulo, ';' y montos '1.234,56' en débito/crédito."""
+    rnd = random.Random(42)
+    inicio = date(2024, 1, 1)
+    conceptos = ["Transferencia recibida", "Pago proveedor filamento", "Mercado Pago", "Luz", "Café"]
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        f.write("Banco Ejemplo - Extracto de cuenta\n\nFecha;Concepto;Débito;Crédito;Saldo\n")
+        for _ in range(n):
+            monto = f"{rnd.uniform(100, 50_000):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+            debito, credito = (monto, "") if rnd.random() < 0.6 else ("", monto)
+            fecha = inicio + timedelta(days=rnd.randrange(365))
+            f.write(f"{fecha:%d/%m/%Y};{rnd.choice(conceptos)};{debito};{credito};0\n")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    ruta = TMP / "extracto.csv"
+    generar_extracto(ruta, n)
+    print(f"filas: {n:,}")
+    for etapa in ("primera vez", "reimportar"):
+        r = importar_movimientos(ruta, medio="transferencia")
+        print(f"  {etapa:<12} {r.leidos / r.segundos:>10,.0f} filas/seg   "
+              f"{r.insertados:,} insertados, {r.omitidos:,} omitidos, {r.invalidos:,} inválidos")
+
+
+if __name__ == "__main__":
+    main()
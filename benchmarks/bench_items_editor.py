@@ -0,0 +1,76 @@
+# benchmarks/bench_items_editor.py
+"""
+Latencia por edición del total de la grilla de piezas con pedidos de 5000 filas.
+
+Compara:
+  - "antes": copia del DataFrame + astype + suma de subtotales en cada rerun.
+  - "ahora": ItemsEditor.total() sobre el delta del editor (sólo filas tocadas).
+
+Uso:
+    python -m benchmarks.bench_items_editor [filas]
+"""
+from __future__ import annotations
+
+import random
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from utils.items_entrega import ItemsEditor
+
+
+def total_antes(df: pd.DataFrame) -> float:
+    df_calc = df.copy()
+    df_calc["subtotal"] = (
+        df_calc["cantidad"].fillna(0).astype(int)
+        * df_calc["precio_unitario"].fillna(0.0).astype(float)
+    )
+    return float(df_calc["subtotal"].sum())
+
+
+def p50_ms(fn, repeticiones: int = 200) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rnd = random.Random(42)
+    filas = [
+        {"pieza": f"pieza {i}", "cantidad": rnd.randint(1, 10), "precio_unitario": round(rnd.uniform(100, 5000), 2)}
+        for i in range(n)
+    ]
+    df = pd.DataFrame(filas)
+    editor = ItemsEditor(filas)
+
+    # Una sesión de edición típica: unas pocas celdas cambiadas y una fila nueva.
+    delta = {
+        "edited_rows": {rnd.randrange(n): {"cantidad": 3} for _ in range(5)},
+        "added_rows": [{"pieza": "nueva", "cantidad": 2, "precio_unitario": 500.0}],
+        "deleted_rows": [0],
+    }
+    df_editado = df.copy()
+    for idx, cambios in delta["edited_rows"].items():
+        for col, val in cambios.items():
+            df_editado.at[idx, col] = val
+    df_editado = pd.concat([df_editado.drop(index=0), pd.DataFrame(delta["added_rows"])], ignore_index=True)
+
+    assert abs(total_antes(df_editado) - editor.total(delta)[0]) < 1e-6
+
+    print(f"filas: {n}")
+    print(f"por edición   antes: {p50_ms(lambda: total_antes(df_editado)):.3f} ms")
+    print(f"por edición   ahora: {p50_ms(lambda: editor.total(delta)):.3f} ms")
+    print(f"guardar       antes: {p50_ms(lambda: df_editado.fillna({'pieza': '', 'cantidad': 0}).to_dict(orient='records'), 20):.3f} ms")
+    print(f"guardar       ahora: {p50_ms(lambda: editor.items_validos(delta), 20):.3f} ms")
+    pegado = {"added_rows": filas}
+    print(f"compactar pegado de {n} filas (una vez): {p50_ms(lambda: editor.compactar(pegado), 5):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
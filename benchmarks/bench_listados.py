@@ -0,0 +1,69 @@
+# benchmarks/bench_listados.py
+"""
+Latencia y memoria de los listados paginados (buscar_movimientos / buscar_entregas)
+con 1k y 1M filas: tienen que mantenerse planas.
+
+Uso:
+    python -m benchmarks.bench_listados [filas ...]
+
+Usa una base temporal por tamaño (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+SCRIPT = r"""
+import json, statistics, sys, time, tracemalloc
+from datetime import date
+from benchmarks.datos_sinteticos import Escala, poblar
+from utils.db_app import buscar_entregas, buscar_movimientos, engine, init_db
+
+n = int(sys.argv[1])
+init_db()
+poblar(engine, Escala(clientes=100, entregas=n, items_por_entrega=1, movimientos=n))
+
+def medir(fn):
+    tiempos = []
+    for _ in range(20):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"p50_ms": round(statistics.median(tiempos), 3), "pico_kb": round(pico / 1024, 1)}
+
+medio = buscar_movimientos(limit=n // 2)[-1]
+cursor = (medio.fecha, medio.id)
+print(json.dumps({
+    "movimientos p1": medir(lambda: buscar_movimientos(limit=50)),
+    "movimientos mitad": medir(lambda: buscar_movimientos(limit=50, antes=cursor)),
+    "movimientos Gasto 2020": medir(lambda: buscar_movimientos(limit=50, tipo="Gasto", desde=date(2020, 1, 1), hasta=date(2020, 12, 31))),
+    "entregas p1": medir(lambda: buscar_entregas(limit=50)),
+    "entregas mitad": medir(lambda: buscar_entregas(limit=50, antes=cursor)),
+}))
+"""
+
+
+def main() -> None:
+    tamanos = [int(a) for a in sys.argv[1:]] or [1_000, 1_000_000]
+    for n in tamanos:
+        env = dict(os.environ, DB_PATH=str(Path(tempfile.mkdtemp(prefix="3diego_listados_")) / "app.db"))
+        out = subprocess.run([sys.executable, "-c", SCRIPT, str(n)], cwd=RAIZ, env=env,
+                             capture_output=True, text=True, check=True)
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"--- {n:,} filas")
+        for nombre, r in res.items():
+            print(f"  {nombre:<24} p50 {r['p50_ms']:8.3f} ms   memoria pico {r['pico_kb']:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_piezas.py
+"""
+Precio de un pedido grande a partir del catálogo de piezas (precios_piezas) contra
+recalcular la fórmula de costos fila por fila.
+
+Uso:
+    python -m benchmarks.bench_piezas [piezas_en_catalogo] [filas_del_pedido]
+
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="3diego_piezas_")) / "app.db")
+
+from sqlalchemy import insert  # noqa: E402
+
+from utils.calculo_costos import calcular_costo  # noqa: E402
+from utils.config import CONFIG_DEFAULT  # noqa: E402
+from utils.db_app import Pieza, actualizar_precios_piezas, engine, init_db, normalizar_nombre, precios_piezas  # noqa: E402
+
+
+def ms(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    n_catalogo = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_pedido = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rnd = random.Random(42)
+    init_db()
+    catalogo = [{"nombre": f"Pieza {i}", "nombre_norm": normalizar_nombre(f"Pieza {i}"),
+                 "minutos": rnd.uniform(10, 600), "gramos": rnd.uniform(5, 500)} for i in range(n_catalogo)]
+    with engine.begin() as conn:
+        conn.execute(insert(Pieza), catalogo)
+    por_nombre = {p["nombre"]: p for p in catalogo}
+    pedido = [rnd.choice(catalogo)["nombre"] for _ in range(n_pedido)]
+    config = dict(CONFIG_DEFAULT)
+
+    print(f"catálogo: {n_catalogo:,} piezas — pedido: {n_pedido:,} filas")
+    print(f"  recalcular todo el catálogo (config nueva): {ms(lambda: actualizar_precios_piezas(config)):8.2f} ms")
+    print(f"  config sin cambios (nada que recalcular):   {ms(lambda: actualizar_precios_piezas(config)):8.2f} ms")
+    print(f"  precios del pedido desde el catálogo:        {ms(lambda: precios_piezas(pedido, config)):8.2f} ms")
+    print(f"  fórmula fila por fila:                       "
+          f"{ms(lambda: [calcular_costo(0, por_nombre[n]['minutos'], por_nombre[n]['gramos'], config) for n in pedido]):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_planificador.py
+"""
+Planificador de la cola de impresión (utils/planificador.py):
+  - 10k trabajos sobre 8 impresoras: goloso EDF/LPT solo y con búsqueda local, contra la
+    cota inferior del makespan (trabajo total / impresoras);
+  - replanificar una cola de cientos de pedidos en la base al agregar un pedido y al caerse
+    una impresora (lo que pasa en la pantalla de Pedidos).
+
+Uso:
+    python -m benchmarks.bench_planificador [trabajos] [impresoras] [cola]
+
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="3diego_plan_")) / "app.db")
+
+from utils.db_app import (  # noqa: E402
+    activar_impresora, crear_impresora, crear_pedido, crear_pedidos_bulk, eliminar_pedido, init_db,
+)
+from utils.planificador import Trabajo, planificar  # noqa: E402
+
+
+def trabajos_sinteticos(n: int, impresoras: int, rnd: random.Random, con_fechas: float = 0.6) -> list[Trabajo]:
+    """Duraciones de 20 min a 15 h; ~60% con entrega repartida a lo largo del horizonte."""
+    horizonte = n * 450 / impresoras
+    return [
+        Trabajo(i, rnd.uniform(20, 900), rnd.uniform(0, horizonte) if rnd.random() < con_fechas else None)
+        for i in range(n)
+    ]
+
+
+def medir_plan(nombre: str, fn, cota: float) -> None:
+    t0 = time.perf_counter()
+    plan = fn()
+    ms = (time.perf_counter() - t0) * 1000
+    print(f"  {nombre:<28} {ms:8.1f} ms   makespan {plan.makespan / 60:9.1f} h (+{(plan.makespan / cota - 1) * 100:5.2f}% "
+          f"sobre la cota)   atraso {plan.atraso_total / 60:9.1f} h en {plan.atrasados} trabajos   mejoras {plan.mejoras}")
+
+
+def p50_ms(fn, veces: int = 20) -> float:
+    tiempos = []
+    for _ in range(veces):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    cola = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    rnd = random.Random(42)
+
+    for titulo, con_fechas in (("con fechas de entrega", 0.6), ("sin fechas (sólo makespan)", 0.0)):
+        trabajos = trabajos_sinteticos(n, m, rnd, con_fechas)
+        impresoras = {i: 0.0 for i in range(m)}
+        cota = sum(t.minutos for t in trabajos) / m
+        print(f"{n:,} trabajos, {m} impresoras — {titulo}")
+        medir_plan("goloso EDF/LPT", lambda: planificar(trabajos, impresoras, mejorar=False), cota)
+        medir_plan("+ búsqueda local (200 ms)", lambda: planificar(trabajos, impresoras, limite_ms=200), cota)
+
+    init_db()
+    impresoras = [crear_impresora(f"Impresora {i}") for i in range(max(2, m // 2))]
+    hoy = date.today()
+    crear_pedidos_bulk([
+        {"pieza": f"Pieza {i}", "minutos": rnd.uniform(20, 900),
+         "fecha_entrega": hoy + timedelta(days=rnd.randrange(30)) if rnd.random() < 0.6 else None}
+        for i in range(cola)
+    ])
+    print(f"cola de {cola} pedidos en la base, {len(impresoras)} impresoras (p50, incluye leer y guardar el plan)")
+
+    def alta():
+        ped = crear_pedido("Pieza nueva", 1, rnd.uniform(20, 900), fecha_entrega=hoy + timedelta(days=3))
+        eliminar_pedido(ped.id)
+
+    def caida():
+        activar_impresora(impresoras[0].id, False)
+        activar_impresora(impresoras[0].id, True)
+
+    print(f"  agregar un pedido (+ quitarlo):         {p50_ms(alta):8.1f} ms  (2 replanificaciones)")
+    print(f"  impresora caída (+ vuelve):             {p50_ms(caida):8.1f} ms  (2 replanificaciones)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_remitos.py
+"""
+Remitos en lote (utils/remitos.py): 500 remitos en serie contra el ProcessPoolExecutor con
+distintas cantidades de procesos, sin cache, y el mismo lote otra vez desde la cache.
+
+Uso:
+    python -m benchmarks.bench_remitos [remitos] [formato]
+
+La mejora del paralelo depende de los núcleos disponibles (os.cpu_count() se muestra arriba).
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="3diego_remitos_")) / "app.db")
+
+from benchmarks.datos_sinteticos import Escala, poblar  # noqa: E402
+from utils.db_app import engine, init_db  # noqa: E402
+from utils.remitos import formato_por_defecto, ids_entregas, remitos_zip  # noqa: E402
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    formato = sys.argv[2] if len(sys.argv) > 2 else formato_por_defecto()
+    init_db()
+    poblar(engine, Escala.para(max(n, 1000)))
+    ids = ids_entregas()[:n]
+    cpus = os.cpu_count() or 1
+    print(f"{len(ids)} remitos en {formato}, {cpus} CPU")
+
+    base = None
+    for procesos in sorted({1, 2, 4, cpus}):
+        lote = remitos_zip(ids, formato, procesos=procesos, usar_cache=False)
+        base = base or lote.segundos
+        nombre = "en serie" if procesos == 1 else f"{procesos} procesos"
+        print(f"  {nombre:<12} {lote.segundos * 1000:8.0f} ms  ({lote.remitos / lote.segundos:6.0f} remitos/s, "
+              f"x{base / lote.segundos:.2f})")
+
+    remitos_zip(ids, formato, procesos=cpus)
+    lote = remitos_zip(ids, formato, procesos=cpus)
+    tamano = len(lote.archivo.read())
+    lote.archivo.seek(0)
+    ok = len(zipfile.ZipFile(lote.archivo).namelist()) == len(ids)
+    print(f"  desde cache  {lote.segundos * 1000:8.0f} ms  ({lote.del_cache}/{lote.remitos} de la cache, "
+          f"zip de {tamano / 1024:,.0f} KB{'' if ok else ', FALTAN REMITOS'})")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
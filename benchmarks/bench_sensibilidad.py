@@ -0,0 +1,73 @@
+# benchmarks/bench_sensibilidad.py
+"""
+Barrido de sensibilidad (utils/sensibilidad.py):
+  - grilla de ~1M combinaciones (16 pasos por parámetro) contra decenas y cientos de trabajos;
+  - el mismo barrido desde el cache (lo que pasa al mover un selector en la pantalla);
+  - comparación de puntos al azar contra calcular_costos, trabajo por trabajo.
+
+Uso:
+    python -m benchmarks.bench_sensibilidad [pasos] [trabajos...]
+
+Sale con código 1 si algún punto no coincide con calcular_costos.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.calculo_costos import calcular_costos
+from utils.config import CONFIG_DEFAULT
+from utils.sensibilidad import PARAMETROS, barrer, barrer_cacheado, combinaciones, rangos_alrededor
+
+
+def trabajos_sinteticos(n: int, config: dict, rnd: random.Random):
+    """Piezas de 15 min a 20 h y 5 a 600 g, con el precio que da la config actual (± 20%)."""
+    df = pd.DataFrame({"horas": [rnd.uniform(0.25, 20) for _ in range(n)],
+                       "gramos": [rnd.uniform(5, 600) for _ in range(n)]})
+    precio = calcular_costos(df, config)["precio_total"].to_numpy() * [rnd.uniform(0.8, 1.2) for _ in range(n)]
+    return df["gramos"].to_numpy(), df["horas"].to_numpy(), precio
+
+
+def verificar(barrido, gramos, horas, precio, config: dict, rnd: random.Random, puntos: int = 20) -> int:
+    errores = 0
+    for _ in range(puntos):
+        idx = tuple(rnd.randrange(len(barrido.valores[p])) for p in PARAMETROS)
+        punto = dict(config, **{p: float(barrido.valores[p][i]) for p, i in zip(PARAMETROS, idx)})
+        costo = calcular_costos(pd.DataFrame({"horas": horas, "gramos": gramos}), punto)["costo_total"].to_numpy()
+        esperado = (costo.sum(), (precio - costo).sum(), ((1 - costo / precio) * 100).min(), int((costo > precio).sum()))
+        obtenido = (barrido.costo_total[idx], barrido.ganancia_total[idx], barrido.margen_min_pct[idx], barrido.en_perdida[idx])
+        if not np.allclose(esperado[:3], obtenido[:3], rtol=1e-9) or esperado[3] != obtenido[3]:
+            errores += 1
+            print(f"     {idx}: esperado {esperado}, obtenido {obtenido}")
+    return errores
+
+
+def main() -> int:
+    pasos = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    tamanos = [int(a) for a in sys.argv[2:]] or [50, 500]
+    config = dict(CONFIG_DEFAULT)
+    rangos = rangos_alrededor(config, pasos=pasos)
+    rnd = random.Random(42)
+    errores = 0
+    for n in tamanos:
+        gramos, horas, precio = trabajos_sinteticos(n, config, rnd)
+        print(f"{combinaciones(rangos):,} combinaciones × {n} trabajos")
+        t0 = time.perf_counter()
+        barrido = barrer(gramos, horas, precio, rangos, config)
+        print(f"  barrido:               {(time.perf_counter() - t0) * 1000:8.1f} ms")
+        barrer_cacheado(gramos, horas, precio, rangos, config)
+        t0 = time.perf_counter()
+        barrer_cacheado(gramos, horas, precio, rangos, config)
+        print(f"  desde el cache:        {(time.perf_counter() - t0) * 1000:8.1f} ms  (huella de la grilla y los trabajos)")
+        fallas = verificar(barrido, gramos, horas, precio, config, rnd)
+        print(f"  contra calcular_costos: {'OK' if not fallas else f'{fallas} puntos distintos'}")
+        errores += fallas
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# benchmarks/bench_stats_clientes.py
+"""
+Stats por cliente mantenidas en escritura (clientes_stats / clientes_piezas) contra agregarlas
+al leer, y verificación de que los valores incrementales coinciden con una agregación desde cero
+después de una mezcla aleatoria de altas, ediciones, cambios de cliente y borrados.
+
+Uso:
+    python -m benchmarks.bench_stats_clientes [entregas] [operaciones]
+
+Sale con código 1 si verificar_stats_clientes encuentra diferencias.
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ["DB_PATH"] = str(Path(tempfile.mkdtemp(prefix="3diego_stats_")) / "app.db")
+
+from sqlalchemy import text  # noqa: E402
+
+from benchmarks.datos_sinteticos import PIEZAS, Escala, poblar  # noqa: E402
+from utils.db_app import (  # noqa: E402
+    Entrega, EntregaItem, crear_entrega, engine, estadisticas_cliente, get_session, init_db,
+    ranking_clientes, verificar_stats_clientes,
+)
+
+RANKING_AL_LEER = text(
+    "SELECT c.id, c.nombre, COUNT(*), SUM(e.total), MAX(e.fecha) FROM entregas e "
+    "JOIN clientes c ON c.id = e.cliente_id GROUP BY c.id ORDER BY SUM(e.total) DESC LIMIT 20"
+)
+CLIENTE_AL_LEER = (
+    text("SELECT COUNT(*), SUM(total), MAX(fecha) FROM entregas WHERE cliente_id = :c"),
+    text("SELECT i.pieza, SUM(i.cantidad) FROM entrega_items i JOIN entregas e ON e.id = i.entrega_id "
+         "WHERE e.cliente_id = :c GROUP BY i.pieza ORDER BY 2 DESC LIMIT 3"),
+)
+
+
+def p50_ms(fn, veces: int = 30) -> float:
+    tiempos = []
+    for _ in range(veces):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+
+def ranking_al_leer() -> None:
+    with engine.connect() as conn:
+        conn.execute(RANKING_AL_LEER).all()
+
+
+def cliente_al_leer(cliente_id: int) -> None:
+    with engine.connect() as conn:
+        for sql in CLIENTE_AL_LEER:
+            conn.execute(sql, {"c": cliente_id}).all()
+
+
+def mezcla_aleatoria(n: int, clientes: int, rnd: random.Random) -> None:
+    """Altas por crear_entrega; ediciones, cambios de cliente y borrados por el ORM."""
+    for _ in range(n):
+        op = rnd.random()
+        if op < 0.4:
+            crear_entrega(f"Cliente stats {rnd.randrange(50)}", date.today() - timedelta(days=rnd.randrange(400)), "", "",
+                          [{"pieza": rnd.choice(PIEZAS), "cantidad": rnd.randint(1, 5), "precio_unitario": 1000.0}
+                           for _ in range(rnd.randint(1, 4))], descuento=rnd.choice([0.0, 100.0]))
+            continue
+        with get_session(escritura=True) as s:
+            ent = s.get(Entrega, rnd.randint(1, s.query(Entrega.id).order_by(Entrega.id.desc()).limit(1).scalar()))
+            if ent is None:
+                continue
+            if op < 0.6:
+                ent.cliente_id = rnd.randint(1, clientes)
+            elif op < 0.75:
+                ent.fecha = date.today() - timedelta(days=rnd.randrange(4000))
+                ent.total = round(rnd.uniform(0, 50_000), 2)
+            elif op < 0.9:
+                item = s.query(EntregaItem).filter(EntregaItem.entrega_id == ent.id).first()
+                if item is not None:
+                    item.pieza = rnd.choice(PIEZAS)
+                    item.cantidad = rnd.randint(1, 10)
+                    item.subtotal = item.cantidad * item.precio_unitario
+            else:
+                s.delete(ent)
+            s.commit()
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    operaciones = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rnd = random.Random(42)
+    init_db()
+    escala = Escala.para(n)
+    t0 = time.perf_counter()
+    poblar(engine, escala)
+    print(f"{n:,} entregas, {escala.clientes:,} clientes (poblar con triggers: {time.perf_counter() - t0:.1f}s)")
+
+    print(f"  ranking (top 20 por total), desde stats:  {p50_ms(lambda: ranking_clientes.__wrapped__('total')):8.3f} ms")
+    print(f"  ranking (top 20 por total), al leer:      {p50_ms(ranking_al_leer, 5):8.3f} ms")
+    print(f"  panel de un cliente, desde stats:          "
+          f"{p50_ms(lambda: estadisticas_cliente.__wrapped__(rnd.randint(1, escala.clientes))):8.3f} ms")
+    print(f"  panel de un cliente, al leer:              {p50_ms(lambda: cliente_al_leer(rnd.randint(1, escala.clientes))):8.3f} ms")
+    items = [{"pieza": "Maceta", "cantidad": 2, "precio_unitario": 1500.0}] * 3
+    print(f"  crear_entrega (con triggers de stats):     "
+          f"{p50_ms(lambda: crear_entrega(f'Cliente stats {rnd.randrange(50)}', date.today(), '', '', items)):8.3f} ms")
+
+    t0 = time.perf_counter()
+    mezcla_aleatoria(operaciones, escala.clientes, rnd)
+    print(f"  {operaciones:,} altas/ediciones/borrados aleatorios: {time.perf_counter() - t0:.1f}s")
+    diferencias = verificar_stats_clientes()
+    print(f"  verificación contra agregación desde cero: {'OK' if not diferencias else f'{len(diferencias)} diferencias'}")
+    for d in diferencias[:10]:
+        print(f"     {d}")
+    return 1 if diferencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
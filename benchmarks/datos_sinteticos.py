@@ -0,0 +1,152 @@
+# benchmarks/datos_sinteticos.py
+"""
+Generador de datos sintéticos, con semilla: clientes, entregas (con piezas) y movimientos.
+
+Lo usan los benchmarks para llenar una base temporal; también sirve para probar la app a escala:
+
+    python -m benchmarks.datos_sinteticos /tmp/3diego.db --entregas 100000
+    DB_PATH=/tmp/3diego.db streamlit run app.py
+
+La base se elige con la ruta (o la variable DB_PATH): nunca se escribe en la real.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+NOMBRES = ["Juan", "María", "José", "Ana", "Lucía", "Martín", "Sofía", "Diego", "Valentina", "Tomás",
+           "Camila", "Mateo", "Julieta", "Nicolás", "Florencia", "Agustín", "Milagros", "Joaquín"]
+APELLIDOS = ["González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez", "Pérez",
+             "García", "Sánchez", "Romero", "Sosa", "Álvarez", "Torres", "Ruiz", "Ramírez", "Acuña"]
+PIEZAS = ["Soporte celular", "Maceta", "Llavero", "Engranaje", "Figura", "Organizador", "Caja",
+          "Porta lápices", "Lámpara", "Repuesto", "Gancho", "Cartel", "Mate", "Cortante"]
+CATEGORIAS = {"Ingreso": ["Ventas", "Señas", "Otros"], "Gasto": ["Insumos", "Filamento", "Luz", "Envíos", "Repuestos"]}
+MEDIOS = ["efectivo", "transferencia", "Mercado Pago", "tarjeta"]
+
+DIAS_HISTORIA = 3650
+LOTE = 50_000
+
+
+@dataclass(frozen=True)
+class Escala:
+    clientes: int
+    entregas: int
+    items_por_entrega: int
+    movimientos: int
+
+    @classmethod
+    def para(cls, n: int) -> "Escala":
+        """Escala "realista" para n entregas: ~1 cliente cada 20 entregas, 3 piezas por entrega."""
+        return cls(clientes=max(10, n // 20), entregas=n, items_por_entrega=3, movimientos=n)
+
+
+def nombre_cliente(i: int, rnd: random.Random) -> str:
+    return f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {i}"
+
+
+def _lotes(total: int, tamano: int = LOTE):
+    for base in range(0, total, tamano):
+        yield range(base, min(base + tamano, total))
+
+
+def poblar(engine, escala: Escala, semilla: int = 42) -> None:
+    """
+    Llena una base vacía (ya creada con init_db) con SQL directo y executemany por lotes.
+    Los triggers (FTS de clientes, stats de clientes, resumen de movimientos) corren igual que en la app.
+    """
+    from sqlalchemy import text
+
+    from utils.db_app import normalizar_nombre
+
+    rnd = random.Random(semilla)
+    inicio = date.today() - timedelta(days=DIAS_HISTORIA)
+    with engine.begin() as conn:
+        for lote in _lotes(escala.clientes):
+            nombres = [nombre_cliente(i + 1, rnd) for i in lote]
+            conn.execute(
+                text("INSERT INTO clientes (id, nombre, nombre_norm, telefono, creado_en) "
+                     "VALUES (:id, :n, :nn, :t, CURRENT_TIMESTAMP)"),
+                [{"id": i + 1, "n": n, "nn": normalizar_nombre(n), "t": f"11{rnd.randrange(10**8):08d}"}
+                 for i, n in zip(lote, nombres)],
+            )
+        for lote in _lotes(escala.entregas):
+            entregas, items = [], []
+            for i in lote:
+                piezas = [(rnd.choice(PIEZAS), rnd.randint(1, 10), round(rnd.uniform(500, 20_000), 2))
+                          for _ in range(escala.items_por_entrega)]
+                entregas.append({
+                    "id": i + 1,
+                    "f": inicio + timedelta(days=rnd.randrange(DIAS_HISTORIA)),
+                    "c": rnd.randint(1, escala.clientes),
+                    "num": f"R-{i + 1:07d}",
+                    "t": round(sum(c * p for _, c, p in piezas), 2),
+                })
+                items.extend({"e": i + 1, "p": p, "c": c, "pu": pu, "s": round(c * pu, 2)} for p, c, pu in piezas)
+            conn.execute(
+                text("INSERT INTO entregas (id, fecha, numero, notas, total, descuento, cliente_id) "
+                     "VALUES (:id, :f, :num, '', :t, 0, :c)"),
+                entregas,
+            )
+            if items:
+                conn.execute(
+                    text("INSERT INTO entrega_items (entrega_id, pieza, cantidad, precio_unitario, subtotal) "
+                         "VALUES (:e, :p, :c, :pu, :s)"),
+                    items,
+                )
+        for lote in _lotes(escala.movimientos):
+            movs = []
+            for _ in lote:
+                tipo = "Ingreso" if rnd.random() < 0.55 else "Gasto"
+                movs.append({
+                    "f": inicio + timedelta(days=rnd.randrange(DIAS_HISTORIA)),
+                    "t": tipo,
+                    "c": rnd.choice(CATEGORIAS[tipo]),
+                    "m": round(rnd.uniform(100, 50_000), 2),
+                    "me": rnd.choice(MEDIOS),
+                })
+            conn.execute(
+                text("INSERT INTO movimientos (fecha, tipo, categoria, monto, descripcion, medio, creado_en) "
+                     "VALUES (:f, :t, :c, :m, '', :me, CURRENT_TIMESTAMP)"),
+                movs,
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.datos_sinteticos")
+    parser.add_argument("db", help="ruta de la base a crear (no debe existir)")
+    parser.add_argument("--entregas", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, help="por defecto, entregas / 20")
+    parser.add_argument("--items", type=int, help="piezas por entrega (por defecto 3)")
+    parser.add_argument("--movimientos", type=int, help="por defecto, igual a entregas")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if Path(args.db).exists():
+        print(f"{args.db} ya existe: elegí una ruta nueva.", file=sys.stderr)
+        return 1
+    # DB_PATH se lee al importar utils.db_app.
+    os.environ["DB_PATH"] = str(Path(args.db).resolve())
+    from utils.db_app import engine, init_db
+
+    base = Escala.para(args.entregas)
+    escala = Escala(
+        clientes=args.clientes or base.clientes,
+        entregas=args.entregas,
+        items_por_entrega=args.items if args.items is not None else base.items_por_entrega,
+        movimientos=args.movimientos if args.movimientos is not None else base.movimientos,
+    )
+    init_db()
+    t0 = time.perf_counter()
+    poblar(engine, escala, args.semilla)
+    print(f"{asdict(escala)} -> {args.db} en {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# benchmarks/stress_escrituras.py
+"""
+Prueba de estrés: N hilos escribiendo a la vez (como N sesiones de Streamlit).
+
+Uso:
+    python -m benchmarks.stress_escrituras [hilos] [entregas_por_hilo]
+
+Reporta entregas/seg y cuántas escrituras fallaron con "database is locked".
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+TMP = tempfile.mkdtemp(prefix="3diego_stress_")
+os.environ["DB_PATH"] = str(Path(TMP) / "stress.db")
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from utils.db_app import SQLITE_PRAGMAS, crear_entrega, crear_movimiento, init_db, search_clientes  # noqa: E402
+
+
+def trabajador(n: int, idx: int, errores: list[str]) -> None:
+    for i in range(n):
+        try:
+            crear_entrega(
+                cliente_nombre=f"Cliente {(idx + i) % 20}",  # clientes compartidos entre hilos
+                fecha=date.today(),
+                numero="",
+                notas="stress",
+                items=[{"pieza": f"pieza {j}", "cantidad": 1, "precio_unitario": 100.0} for j in range(5)],
+            )
+            crear_movimiento(date.today(), "Ingreso", "Ventas", 500.0, descripcion=f"hilo {idx}")
+            search_clientes("cliente")  # lecturas intercaladas
+        except OperationalError as e:
+            errores.append(str(e.orig))
+
+
+def main() -> None:
+    hilos = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    por_hilo = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    init_db()
+
+    errores: list[str] = []
+    ts = [threading.Thread(target=trabajador, args=(por_hilo, i, errores)) for i in range(hilos)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    dt = time.perf_counter() - t0
+
+    total = hilos * por_hilo
+    print(f"pragmas: {SQLITE_PRAGMAS}")
+    print(f"hilos: {hilos}  entregas: {total}  tiempo: {dt:.2f}s  entregas/seg: {total / dt:,.0f}")
+    print(f"errores de lock: {len(errores)}")
+    for e in errores[:5]:
+        print("  ", e)
+
+
+if __name__ == "__main__":
+    main()
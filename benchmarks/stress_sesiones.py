@@ -0,0 +1,100 @@
+# benchmarks/stress_sesiones.py
+"""
+Muchas sesiones simuladas validándose en paralelo contra el backend de sesiones.
+Verifica la semántica de TTL / renovación y mide validaciones por segundo.
+
+Uso:
+    python -m benchmarks.stress_sesiones [memoria|sqlite] [sesiones] [hilos]
+
+Usa una base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+TMP = tempfile.mkdtemp(prefix="3diego_sesiones_")
+os.environ["DB_PATH"] = str(Path(TMP) / "sesiones.db")
+
+from utils import session  # noqa: E402
+from utils.db_app import init_db  # noqa: E402
+
+
+class Reloj:
+    """Reemplaza session._now para poder avanzar el tiempo a mano."""
+
+    def __init__(self):
+        self.t = int(time.time())
+
+    def __call__(self) -> int:
+        return self.t
+
+
+def verificar_ttl(backend) -> None:
+    reloj = Reloj()
+    session._now = reloj
+    session._backend = backend
+    ttl = backend.ttl
+
+    a = session.guardar_sesion("ana")
+    b = session.guardar_sesion("beto")
+    assert session.sesion_valida(a) and session.sesion_valida(b)
+    assert not session.sesion_valida("inexistente") and not session.sesion_valida(None)
+
+    # Antes del 75% del TTL no se renueva; después sí (sliding expiration).
+    reloj.t += ttl // 2
+    assert session.sesion_valida(a)
+    reloj.t += ttl // 2 - 1  # a: renovada recién ahora; b: nunca se validó desde el login
+    assert session.sesion_valida(a)
+    reloj.t += 1
+    assert not session.sesion_valida(b), "b tendría que haber expirado"
+    assert session.sesion_valida(a), "a se renovó al pasar el 75% del TTL"
+
+    session.eliminar_sesion(a)
+    assert not session.sesion_valida(a)
+    session._now = lambda: int(time.time())
+
+
+def estres(backend, n_sesiones: int, n_hilos: int) -> None:
+    session._backend = backend
+    tokens = [session.guardar_sesion(f"user{i}") for i in range(n_sesiones)]
+    fallas: list[str] = []
+    validaciones = 20 if isinstance(backend, session.SesionesSQLite) else 2000
+
+    def trabajador(idx: int) -> None:
+        for i in range(validaciones):
+            t = tokens[(idx * validaciones + i) % n_sesiones]
+            if not session.sesion_valida(t):
+                fallas.append(t)
+
+    ts = [threading.Thread(target=trabajador, args=(i,)) for i in range(n_hilos)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    dt = time.perf_counter() - t0
+    total = n_hilos * validaciones
+    print(f"{type(backend).__name__}: {n_sesiones} sesiones, {n_hilos} hilos, "
+          f"{total / dt:,.0f} validaciones/seg, fallas: {len(fallas)}")
+    assert not fallas
+
+
+def main() -> None:
+    tipo = sys.argv[1] if len(sys.argv) > 1 else "memoria"
+    n_sesiones = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    n_hilos = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    init_db()
+
+    crear = session.SesionesSQLite if tipo == "sqlite" else session.SesionesMemoria
+    verificar_ttl(crear(ttl=3600))
+    print("TTL / renovación: OK")
+    estres(crear(), n_sesiones, n_hilos)
+
+
+if __name__ == "__main__":
+    main()
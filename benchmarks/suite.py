@@ -0,0 +1,194 @@
+# benchmarks/suite.py
+"""
+Suite de benchmarks de utils/db_app.py sobre datos sintéticos (benchmarks/datos_sinteticos.py):
+latencia (p50/p95/p99) y consultas SQL por operación, a varias escalas, con salida JSON para
+comparar entre commits.
+
+Uso:
+    python -m benchmarks.suite                       # escalas 1k y 100k
+    python -m benchmarks.suite 1000 100000 1000000 -o antes.json
+    python -m benchmarks.suite --comparar antes.json despues.json
+
+Sin -o, el JSON va a benchmarks/resultados/<commit>.json. Cada escala corre en un proceso
+aparte con su propia base temporal (variable DB_PATH), nunca la real.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+
+def _percentil(ordenados: list[float], p: float) -> float:
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+def medir_operaciones(n: int, repeticiones: int) -> dict:
+    """Corre dentro del proceso hijo: DB_PATH ya apunta a una base temporal vacía."""
+    import random
+    import time
+    from datetime import date
+
+    from sqlalchemy import event, text
+
+    from benchmarks.datos_sinteticos import APELLIDOS, Escala, poblar
+    from utils import db_app
+    from utils.db_app import engine, init_db
+    from utils.tiempos import SENTENCIAS_TRANSACCION
+
+    init_db()
+    escala = Escala.para(n)
+    t0 = time.perf_counter()
+    poblar(engine, escala)
+    poblar_s = time.perf_counter() - t0
+
+    consultas = 0
+
+    def contar(_conn, _cursor, statement, *_args):
+        nonlocal consultas
+        if not statement.lstrip().upper().startswith(SENTENCIAS_TRANSACCION):
+            consultas += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+
+    rnd = random.Random(7)
+    with engine.connect() as conn:
+        nombres = [r[0] for r in conn.execute(text("SELECT nombre FROM clientes ORDER BY random() LIMIT 200"))]
+    fragmentos = [a.lower()[:4] for a in APELLIDOS]
+    items = [{"pieza": "Maceta", "cantidad": 2, "precio_unitario": 1500.0}] * 3
+
+    pagina = Path(tempfile.mkdtemp(prefix="3diego_suite_")) / "entregas.py"
+    pagina.write_text("from modulos.entregas import mostrar_entregas\nmostrar_entregas()\n")
+
+    def render_entregas():
+        from streamlit.testing.v1 import AppTest
+        AppTest.from_file(str(pagina), default_timeout=120).run()
+
+    # Las búsquedas y stats de clientes van sin el caché en memoria (__wrapped__): se mide la base.
+    operaciones = {
+        "search_clientes (fts)": (lambda: db_app.search_clientes.__wrapped__(rnd.choice(fragmentos)), repeticiones),
+        "search_clientes (prefijo)": (lambda: db_app.search_clientes.__wrapped__("ma"), repeticiones),
+        "get_cliente_by_nombre": (lambda: db_app.get_cliente_by_nombre.__wrapped__(rnd.choice(nombres)), repeticiones),
+        "crear_entrega": (lambda: db_app.crear_entrega(rnd.choice(nombres), date.today(), "B", "", items), repeticiones),
+        "ultimas_entregas": (lambda: db_app.ultimas_entregas(10), repeticiones),
+        "buscar_entregas": (lambda: db_app.buscar_entregas(limit=50), repeticiones),
+        "buscar_entregas (cliente)": (lambda: db_app.buscar_entregas(limit=50, cliente=rnd.choice(nombres)), repeticiones),
+        "estadisticas_cliente": (lambda: db_app.estadisticas_cliente.__wrapped__(rnd.randint(1, escala.clientes)), repeticiones),
+        "ranking_clientes": (lambda: db_app.ranking_clientes.__wrapped__("total"), repeticiones),
+        "listar_movimientos (100)": (lambda: db_app.listar_movimientos(limit=100), repeticiones),
+        "buscar_movimientos": (lambda: db_app.buscar_movimientos(limit=50), repeticiones),
+        "pantalla entregas": (render_entregas, max(3, repeticiones // 10)),
+    }
+
+    resultados = {}
+    for nombre, (fn, veces) in operaciones.items():
+        fn()  # calentamiento: imports, caché de páginas de SQLite
+        tiempos = []
+        consultas = 0
+        for _ in range(veces):
+            t = time.perf_counter()
+            fn()
+            tiempos.append((time.perf_counter() - t) * 1000)
+        tiempos.sort()
+        resultados[nombre] = {
+            "p50_ms": round(_percentil(tiempos, 50), 3),
+            "p95_ms": round(_percentil(tiempos, 95), 3),
+            "p99_ms": round(_percentil(tiempos, 99), 3),
+            "consultas": round(consultas / veces, 1),
+            "repeticiones": veces,
+        }
+    return {"escala": vars(escala), "poblar_s": round(poblar_s, 2), "operaciones": resultados}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sin-git"
+
+
+def correr(tamanos: list[int], repeticiones: int) -> dict:
+    salida = {
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "escalas": {},
+    }
+    for n in tamanos:
+        env = dict(os.environ, DB_PATH=str(Path(tempfile.mkdtemp(prefix="3diego_suite_")) / "app.db"))
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--trabajador", str(n), "-r", str(repeticiones)],
+            cwd=RAIZ, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            sys.stderr.write(proc.stderr)
+            raise SystemExit(f"falló la escala {n}")
+        salida["escalas"][str(n)] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return salida
+
+
+def imprimir(resultado: dict) -> None:
+    print(f"commit {resultado['commit']} — python {resultado['python']}, sqlite {resultado['sqlite']}")
+    for n, datos in resultado["escalas"].items():
+        print(f"--- {int(n):,} entregas (poblar: {datos['poblar_s']}s)")
+        for nombre, r in datos["operaciones"].items():
+            print(f"  {nombre:<28} p50 {r['p50_ms']:9.3f}  p95 {r['p95_ms']:9.3f}  p99 {r['p99_ms']:9.3f} ms"
+                  f"   {r['consultas']:5.1f} consultas")
+
+
+def comparar(antes: dict, despues: dict) -> None:
+    print(f"{antes['commit']} -> {despues['commit']}  (p50; negativo = más rápido)")
+    for n, datos in despues["escalas"].items():
+        previas = antes["escalas"].get(n, {}).get("operaciones", {})
+        print(f"--- {int(n):,} entregas")
+        for nombre, r in datos["operaciones"].items():
+            if nombre not in previas:
+                print(f"  {nombre:<28} (nueva) p50 {r['p50_ms']:9.3f} ms")
+                continue
+            a, d = previas[nombre]["p50_ms"], r["p50_ms"]
+            cambio = (d - a) / a * 100 if a else 0.0
+            consultas = f"   consultas {previas[nombre]['consultas']} -> {r['consultas']}" \
+                if previas[nombre]["consultas"] != r["consultas"] else ""
+            print(f"  {nombre:<28} {a:9.3f} -> {d:9.3f} ms  ({cambio:+6.1f}%){consultas}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("tamanos", nargs="*", type=int, help="cantidad de entregas por escala (por defecto 1000 100000)")
+    parser.add_argument("-r", "--repeticiones", type=int, default=50)
+    parser.add_argument("-o", "--salida", help="archivo JSON de resultados")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"), help="compara dos JSON de resultados")
+    parser.add_argument("--trabajador", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.trabajador is not None:
+        print(json.dumps(medir_operaciones(args.trabajador, args.repeticiones)))
+        return 0
+    if args.comparar:
+        antes, despues = (json.loads(Path(p).read_text()) for p in args.comparar)
+        comparar(antes, despues)
+        return 0
+
+    resultado = correr(args.tamanos or [1_000, 100_000], args.repeticiones)
+    imprimir(resultado)
+    destino = Path(args.salida) if args.salida else RESULTADOS / f"{resultado['commit']}.json"
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    destino.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+    print(f"resultados en {destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
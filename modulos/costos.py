@@ -1,69 +1,129 @@
+import zipfile
+
 import streamlit as st
-from utils.config import cargar_config, guardar_config
+import pandas as pd
+
+from utils.config import actualizar_config, cargar_config
+from utils.calculo_costos import COMPONENTES, calcular_costo, calcular_costos
+from utils.gcode import DENSIDAD_DEFAULT, DIAMETRO_DEFAULT, analizar_cacheado
+from utils.db_app import eliminar_pieza, listar_piezas, upsert_pieza
+from utils.sensibilidad import (
+    MAX_COMBINACIONES, PARAMETROS, Rango, barrer_cacheado, combinaciones, mapa_calor, rangos_alrededor, tornado,
+)
+
+ETIQUETAS_PARAMETROS = {
+    "precio_kg": "Precio por KG",
+    "precio_kwh": "Precio KWh",
+    "consumo_watts": "Consumo (W)",
+    "precio_repuestos": "Repuestos",
+    "margen_error_pct": "% de error",
+}
+METRICAS_SENSIBILIDAD = {
+    "ganancia_total": "Ganancia total $",
+    "margen_min_pct": "Peor margen %",
+    "en_perdida": "Trabajos a pérdida",
+}
+
+def _campo_config(config: dict, cambios: dict, clave: str, etiqueta: str, valor=None, **kwargs):
+    """number_input para `config[clave]`; si el usuario lo cambió, anota el valor nuevo en `cambios`."""
+    inicial = config[clave] if valor is None else valor
+    nuevo = st.number_input(etiqueta, value=inicial, **kwargs)
+    if nuevo != inicial:
+        cambios[clave] = nuevo
+    return nuevo
 
 def mostrar_costos():
     st.title("⏱️ Cálculo de costos y tiempos")
 
-    if "config" not in st.session_state:
-        st.session_state["config"] = cargar_config()
+    # La config de todo el proceso, releída en cada rerun: lo que guarda otra sesión se ve acá.
+    config = cargar_config()
 
-    config = st.session_state["config"]
+    modo = st.radio(
+        "Modo",
+        options=["Una pieza", "Lote", "Catálogo", "Sensibilidad"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="costos_modo",
+    )
+    if modo == "Lote":
+        _mostrar_lote(config)
+        return
+    if modo == "Catálogo":
+        _mostrar_catalogo(config)
+        return
+    if modo == "Sensibilidad":
+        _mostrar_sensibilidad(config)
+        return
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("📥 Datos de impresión")
 
+        analisis = _analisis_gcode(config)
+
         with st.columns([1, 2, 1])[1]:
-            horas = st.number_input("Horas de impresión", min_value=0, value=0, format="%d")
+            horas = st.number_input("Horas de impresión", min_value=0, value=analisis.horas if analisis else 0, format="%d")
 
         with st.columns([1, 2, 1])[1]:
-            minutos = st.number_input("Minutos de impresión", min_value=0, max_value=59, value=0, format="%d")
+            minutos = st.number_input(
+                "Minutos de impresión", min_value=0, max_value=59, value=analisis.minutos if analisis else 0, format="%d"
+            )
 
         with st.columns([1, 2, 1])[1]:
-            gramos = st.number_input("Gramos usados", min_value=0, value=0, format="%d")
+            gramos = st.number_input(
+                "Gramos usados", min_value=0, value=int(round(analisis.gramos)) if analisis else 0, format="%d"
+            )
 
+        cambios = {}
         with st.columns([1, 2, 1])[1]:
-            margen_ganancia = st.number_input(
-                "Margen de ganancia (ej: 2 = 100%)",
-                min_value=1,
-                value=int(config.get("margen_ganancia", 2)),
-                format="%d"
+            _campo_config(
+                config, cambios, "margen_ganancia", "Margen de ganancia (ej: 2 = 100%)",
+                int(config.get("margen_ganancia", 2)), min_value=1, format="%d",
             )
-            config["margen_ganancia"] = margen_ganancia
 
     with col2:
         st.subheader("⚙️ Gastos fijos")
 
         with st.columns([1, 2, 1])[1]:
-            config["precio_kg"] = st.number_input("Precio por KG", value=config["precio_kg"])
+            _campo_config(config, cambios, "precio_kg", "Precio por KG")
 
         with st.columns([1, 2, 1])[1]:
-            config["precio_kwh"] = st.number_input("Precio KWh", value=config["precio_kwh"])
+            _campo_config(config, cambios, "precio_kwh", "Precio KWh")
 
         with st.columns([1, 2, 1])[1]:
-            config["consumo_watts"] = st.number_input("Consumo real por hora (W)", value=config["consumo_watts"])
+            _campo_config(config, cambios, "consumo_watts", "Consumo real por hora (W)")
 
         with st.columns([1, 2, 1])[1]:
-            config["vida_util_horas"] = st.number_input("Vida útil de la máquina (horas)", value=config["vida_util_horas"])
+            _campo_config(config, cambios, "vida_util_horas", "Vida útil de la máquina (horas)")
 
         with st.columns([1, 2, 1])[1]:
-            config["precio_repuestos"] = st.number_input("Precio total de repuestos", value=config["precio_repuestos"])
+            _campo_config(config, cambios, "precio_repuestos", "Precio total de repuestos")
 
         with st.columns([1, 2, 1])[1]:
-            config["margen_error_pct"] = st.number_input("% de margen de error", value=config["margen_error_pct"])
+            _campo_config(config, cambios, "margen_error_pct", "% de margen de error")
+
+        with st.columns([1, 2, 1])[1]:
+            _campo_config(
+                config, cambios, "densidad_filamento", "Densidad del filamento (g/cm³)",
+                float(config.get("densidad_filamento", DENSIDAD_DEFAULT)),
+            )
 
-        guardar_config(config)
+        # Sólo las claves que el usuario tocó en este rerun: un rerun sin cambios no escribe, y
+        # no se pisa lo que otra sesión guardó en las demás.
+        if cambios:
+            actualizar_config(cambios)
+            config.update(cambios)
 
     if horas + minutos + gramos > 0:
-        tiempo_horas = horas + (minutos / 60)
-        costo_filamento = (gramos * config["precio_kg"]) / 1000
-        costo_electricidad = ((config["precio_kwh"] * config["consumo_watts"]) / 1000) * tiempo_horas
-        costo_desgaste = (config["precio_repuestos"] / config["vida_util_horas"]) * tiempo_horas
-        margen_error = (costo_filamento + costo_electricidad + costo_desgaste) * (config["margen_error_pct"] / 100)
-        costo_total = costo_filamento + costo_electricidad + costo_desgaste + margen_error
-        precio_total = costo_total * config["margen_ganancia"]
-        ganancia_total = precio_total - costo_total
+        r = calcular_costo(horas, minutos, gramos, config)
+        costo_filamento = r["costo_filamento"]
+        costo_electricidad = r["costo_electricidad"]
+        costo_desgaste = r["costo_desgaste"]
+        margen_error = r["margen_error"]
+        costo_total = r["costo_total"]
+        precio_total = r["precio_total"]
+        ganancia_total = r["ganancia_total"]
 
         st.markdown("---")
         st.markdown("### 📊 Resultados")
@@ -80,3 +140,246 @@ def mostrar_costos():
             st.success(f"🧮 **Costo total base:** \n\n${costo_total:,.2f}")
             st.warning(f"🤑 **Precio final sugerido:** \n\n${precio_total:,.2f}")
             st.success(f"📈 **Ganancia estimada:** \n\n${ganancia_total:,.2f}")
+
+        with st.form("form_guardar_pieza", clear_on_submit=True):
+            c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+            nombre = c1.text_input("Guardar en el catálogo como", placeholder="Nombre de la pieza")
+            if c2.form_submit_button("💾 Guardar pieza", use_container_width=True) and nombre.strip():
+                upsert_pieza(nombre, horas * 60 + minutos, gramos)
+                st.success(f"“{nombre.strip()}” guardada en el catálogo ✅")
+
+
+def _analizar(archivo, config):
+    return analizar_cacheado(
+        archivo,
+        diametro_mm=float(config.get("diametro_filamento", DIAMETRO_DEFAULT)),
+        densidad=float(config.get("densidad_filamento", DENSIDAD_DEFAULT)),
+    )
+
+
+def _analisis_gcode(config):
+    """Si se subió un G-code / 3mf, devuelve tiempo y gramos para precargar los campos."""
+    with st.columns([1, 2, 1])[1]:
+        archivo = st.file_uploader("G-code o 3mf laminado (opcional)", type=["gcode", "3mf"], key="costos_gcode")
+    if archivo is None:
+        return None
+    try:
+        with st.spinner("Analizando el archivo…"):
+            r = _analizar(archivo, config)
+    except (ValueError, zipfile.BadZipFile) as e:
+        st.error(f"No se pudo analizar el archivo: {e}")
+        return None
+    origen = "metadatos del laminador" if r.fuente == "metadatos" else "simulación del G-code (sin aceleraciones)"
+    st.caption(f"{r.horas}h {r.minutos}m · {r.gramos:,.1f} g — según {origen}.")
+    return r
+
+
+def _mostrar_lote(config):
+    st.subheader("📄 Cotizar un lote")
+    st.caption(
+        "Subí un CSV con una fila por trabajo y columnas **horas**, **minutos** y **gramos** "
+        "(y opcionalmente **pieza**), o varios G-code / 3mf laminados: de cada uno se toman el "
+        "tiempo y los gramos. Se usan los gastos fijos guardados."
+    )
+
+    archivos = st.file_uploader(
+        "CSV o G-code / 3mf de los trabajos", type=["csv", "gcode", "3mf"],
+        accept_multiple_files=True, key="costos_lote_archivos",
+    )
+    if not archivos:
+        return
+
+    csvs = [a for a in archivos if a.name.lower().endswith(".csv")]
+    laminados = [a for a in archivos if not a.name.lower().endswith(".csv")]
+    partes = []
+    for archivo in csvs:
+        try:
+            df = pd.read_csv(archivo)
+        except Exception as e:
+            st.error(f"No se pudo leer {archivo.name}: {e}")
+            continue
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        if not {"horas", "minutos", "gramos"} & set(df.columns):
+            st.error(f"{archivo.name} tiene que tener al menos una de las columnas: horas, minutos, gramos.")
+            continue
+        partes.append(df)
+    if laminados:
+        partes.append(_trabajos_laminados(laminados, config))
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return
+    df = pd.concat(partes, ignore_index=True)
+
+    res = calcular_costos(df, config)
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Trabajos", len(res))
+    m2.metric("Costo total $", f"{res['costo_total'].sum():,.2f}".replace(",", ""))
+    m3.metric("Precio total $", f"{res['precio_total'].sum():,.2f}".replace(",", ""))
+
+    st.dataframe(
+        res,
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(format="%.2f") for c in COMPONENTES},
+    )
+    st.download_button(
+        "⬇️ Descargar cotización",
+        data=res.to_csv(index=False).encode("utf-8"),
+        file_name="cotizacion.csv",
+        mime="text/csv",
+    )
+
+
+def _trabajos_laminados(archivos, config) -> pd.DataFrame:
+    """Una fila por G-code / 3mf (pieza = nombre del archivo) con el tiempo y los gramos que da utils/gcode.py."""
+    filas, fallidos, simulados = [], [], 0
+    barra = st.progress(0.0, text="Analizando archivos…")
+    for n, archivo in enumerate(archivos, 1):
+        try:
+            r = _analizar(archivo, config)
+        except (ValueError, zipfile.BadZipFile) as e:
+            fallidos.append(f"{archivo.name}: {e}")
+        else:
+            nombre = archivo.name.rsplit(".", 1)[0]
+            filas.append({"pieza": nombre, "horas": r.horas, "minutos": r.minutos, "gramos": round(r.gramos, 1)})
+            simulados += r.fuente != "metadatos"
+        barra.progress(n / len(archivos), text=f"Analizando archivos… {n}/{len(archivos)}")
+    barra.empty()
+    if fallidos:
+        st.error("No se pudieron analizar:\n\n" + "\n".join(f"- {f}" for f in fallidos))
+    if simulados:
+        st.caption(f"{simulados} sin metadatos del laminador: tiempo por simulación del G-code (sin aceleraciones).")
+    return pd.DataFrame(filas, columns=["pieza", "horas", "minutos", "gramos"])
+
+
+def _mostrar_catalogo(config):
+    st.subheader("📚 Catálogo de piezas")
+    st.caption(
+        "Precios calculados con los gastos fijos guardados; se recalculan solos cuando cambian. "
+        "En Entregas se cargan desde acá."
+    )
+    piezas = listar_piezas(config)
+    if not piezas:
+        st.info("Todavía no hay piezas: calculá una en “Una pieza” y guardala en el catálogo.")
+        return
+
+    st.dataframe(
+        pd.DataFrame([
+            {"pieza": p.nombre, "horas": p.minutos / 60, "gramos": p.gramos, "costo": p.costo, "precio": p.precio}
+            for p in piezas
+        ]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "horas": st.column_config.NumberColumn("Horas", format="%.2f"),
+            "costo": st.column_config.NumberColumn("Costo $", format="%.2f"),
+            "precio": st.column_config.NumberColumn("Precio $", format="%.2f"),
+        },
+    )
+
+    por_id = {p.id: p for p in piezas}
+    c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+    elegida = c1.selectbox("Borrar pieza", list(por_id), format_func=lambda i: por_id[i].nombre, key="catalogo_borrar")
+    if c2.button("🗑️ Borrar", use_container_width=True):
+        eliminar_pieza(elegida)
+        st.rerun()
+
+
+def _trabajos_sensibilidad(config):
+    """(gramos, horas, precio cobrado hoy) de los trabajos a barrer: catálogo o CSV como en Lote."""
+    origen = st.radio("Trabajos", ["Catálogo", "CSV"], horizontal=True, key="sens_origen")
+    if origen == "Catálogo":
+        piezas = listar_piezas(config)
+        if not piezas:
+            st.info("Todavía no hay piezas en el catálogo: guardá algunas o subí un CSV.")
+            return None
+        return (
+            [p.gramos for p in piezas],
+            [p.minutos / 60 for p in piezas],
+            [p.precio for p in piezas],
+        )
+    archivo = st.file_uploader("CSV de trabajos (horas, minutos, gramos)", type=["csv"], key="sens_csv")
+    if archivo is None:
+        return None
+    try:
+        df = pd.read_csv(archivo)
+    except Exception as e:
+        st.error(f"No se pudo leer el CSV: {e}")
+        return None
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if not {"horas", "minutos", "gramos"} & set(df.columns):
+        st.error("El CSV tiene que tener al menos una de las columnas: horas, minutos, gramos.")
+        return None
+    def col(nombre):
+        if nombre not in df:
+            return pd.Series(0.0, index=df.index)
+        return pd.to_numeric(df[nombre], errors="coerce").fillna(0.0)
+
+    return col("gramos"), col("horas") + col("minutos") / 60, calcular_costos(df, config)["precio_total"]
+
+
+def _mostrar_sensibilidad(config):
+    st.subheader("📈 ¿Y si cambian los gastos?")
+    st.caption(
+        "Se mantienen los precios que se cobran hoy y se barren los gastos fijos: "
+        "cuánto se gana, cuál es el peor margen y cuántos trabajos quedan a pérdida."
+    )
+    trabajos = _trabajos_sensibilidad(config)
+    if trabajos is None:
+        return
+
+    por_defecto = rangos_alrededor(config)
+    rangos = {}
+    with st.expander("Rangos", expanded=False):
+        for p in PARAMETROS:
+            c1, c2, c3 = st.columns([2, 2, 1])
+            d = por_defecto[p]
+            rangos[p] = Rango(
+                c1.number_input(f"{ETIQUETAS_PARAMETROS[p]} desde", value=round(d.desde, 2), key=f"sens_{p}_desde"),
+                c2.number_input("hasta", value=round(d.hasta, 2), key=f"sens_{p}_hasta"),
+                int(c3.number_input("pasos", min_value=1, max_value=64, value=d.pasos, key=f"sens_{p}_pasos")),
+            )
+    st.caption(f"{combinaciones(rangos):,} combinaciones × {len(trabajos[0])} trabajos")
+    if combinaciones(rangos) > MAX_COMBINACIONES:
+        st.warning(
+            f"Son demasiadas combinaciones (máximo {MAX_COMBINACIONES:,}): bajá los pasos de algún gasto."
+        )
+        return
+
+    barrido = barrer_cacheado(*trabajos, rangos, config)
+    metrica = st.selectbox(
+        "Métrica", list(METRICAS_SENSIBILIDAD), format_func=METRICAS_SENSIBILIDAD.get, key="sens_metrica"
+    )
+
+    # Import acá: altair viene con streamlit pero sólo hace falta en este modo.
+    import altair as alt
+
+    c1, c2 = st.columns(2)
+    x = c1.selectbox("Eje X", PARAMETROS, format_func=ETIQUETAS_PARAMETROS.get, key="sens_x")
+    y = c2.selectbox("Eje Y", [p for p in PARAMETROS if p != x], format_func=ETIQUETAS_PARAMETROS.get, key="sens_y")
+    calor = mapa_calor(barrido, x, y, config, metrica)
+    st.altair_chart(
+        alt.Chart(calor).mark_rect().encode(
+            x=alt.X(f"{x}:O", title=ETIQUETAS_PARAMETROS[x], axis=alt.Axis(format=",.2f")),
+            y=alt.Y(f"{y}:O", title=ETIQUETAS_PARAMETROS[y], sort="descending", axis=alt.Axis(format=",.2f")),
+            color=alt.Color("valor:Q", title=METRICAS_SENSIBILIDAD[metrica], scale=alt.Scale(scheme="redyellowgreen",
+                            reverse=metrica == "en_perdida")),
+            tooltip=[alt.Tooltip(f"{x}:Q", format=",.2f"), alt.Tooltip(f"{y}:Q", format=",.2f"),
+                     alt.Tooltip("valor:Q", format=",.2f")],
+        ),
+        use_container_width=True,
+    )
+    st.caption("El resto de los gastos queda en el paso del rango más cercano al valor actual.")
+
+    st.markdown("**Qué pesa más** (cada gasto de su mínimo a su máximo, el resto en el valor actual)")
+    df = tornado(barrido, config, metrica)
+    df["parametro"] = df["parametro"].map(ETIQUETAS_PARAMETROS)
+    st.altair_chart(
+        alt.Chart(df).mark_bar().encode(
+            x=alt.X("bajo:Q", title=METRICAS_SENSIBILIDAD[metrica]),
+            x2="alto:Q",
+            y=alt.Y("parametro:N", title=None, sort=None),
+            tooltip=["parametro", alt.Tooltip("bajo:Q", format=",.2f"), alt.Tooltip("alto:Q", format=",.2f")],
+        ) + alt.Chart(df.head(1)).mark_rule(color="black").encode(x="base:Q"),
+        use_container_width=True,
+    )
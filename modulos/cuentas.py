@@ -1,5 +1,216 @@
 import streamlit as st
+import pandas as pd
+from datetime import date
+from functools import partial
+
+from utils.db_app import (
+    crear_movimiento,
+    actualizar_movimiento,
+    eliminar_movimiento,
+    buscar_movimientos,
+    resumen_movimientos,
+)
+from utils.exportar import exportar_a_bytes, parquet_disponible
+from utils.importar import CAMPOS, CATEGORIA_DEFAULT, importar_movimientos, leer_encabezado, xlsx_disponible
+from utils.paginacion import paginar
+
+TIPOS = ["Ingreso", "Gasto"]
+MEDIOS = ["efectivo", "transferencia", "Mercado Pago", "tarjeta"]
+
+
+def _fmt(monto: float) -> str:
+    return f"${monto:,.2f}".replace(",", "")
+
 
 def mostrar_cuentas():
     st.header("💸 Registro de ingresos y gastos")
     st.info("Llevá el control de lo que entra y sale en 3D.IEGO.")
+
+    _form_nuevo_movimiento()
+    _panel_importar()
+    st.divider()
+    _panel_resumen()
+    st.divider()
+    _panel_ultimos_movimientos()
+    _panel_exportar()
+
+
+def _form_nuevo_movimiento():
+    st.subheader("Nuevo movimiento")
+    with st.form("form_movimiento", clear_on_submit=True):
+        c1, c2, c3 = st.columns(3)
+        fecha = c1.date_input("Fecha", value=date.today())
+        tipo = c2.selectbox("Tipo", TIPOS)
+        monto = c3.number_input("Monto $", min_value=0.0, value=0.0, step=100.0)
+        c4, c5 = st.columns(2)
+        categoria = c4.text_input("Categoría", placeholder="Ventas, Insumos, Luz…")
+        medio = c5.selectbox("Medio", MEDIOS)
+        descripcion = st.text_input("Descripción (opcional)")
+        enviar = st.form_submit_button("💾 Guardar movimiento", type="primary")
+
+    if enviar:
+        if monto <= 0 or not categoria.strip():
+            st.warning("Completá la categoría y un monto mayor a 0.")
+            return
+        crear_movimiento(fecha, tipo, categoria.strip(), monto, descripcion=descripcion, medio=medio)
+        st.success("Movimiento guardado ✅")
+
+
+def _panel_importar():
+    with st.expander("📥 Importar extracto (banco / Mercado Pago)"):
+        tipos = ["csv", "xlsx"] if xlsx_disponible() else ["csv"]
+        archivo = st.file_uploader("Extracto", type=tipos, key="mov_import_archivo")
+        if archivo is None:
+            return
+        try:
+            columnas, detectado = leer_encabezado(archivo)
+        except (ValueError, RuntimeError) as e:
+            st.error(str(e))
+            return
+
+        st.caption("Columnas del extracto (detectadas automáticamente; corregí si hace falta):")
+        opciones = ["—", *columnas]
+        mapeo = {}
+        for col, campo in zip(st.columns(len(CAMPOS)), CAMPOS):
+            elegida = col.selectbox(
+                campo.capitalize(), opciones,
+                index=opciones.index(detectado[campo]) if campo in detectado else 0,
+                key=f"mov_import_col_{campo}",
+            )
+            if elegida != "—":
+                mapeo[campo] = elegida
+        c1, c2 = st.columns(2)
+        medio = c1.selectbox("Medio", MEDIOS, index=MEDIOS.index("transferencia"), key="mov_import_medio")
+        categoria = c2.text_input("Categoría (si el extracto no trae)", value=CATEGORIA_DEFAULT, key="mov_import_cat")
+
+        if st.button("Importar", type="primary", key="mov_import_btn"):
+            try:
+                r = importar_movimientos(archivo, medio=medio, categoria=categoria.strip() or CATEGORIA_DEFAULT, mapeo=mapeo)
+            except (ValueError, RuntimeError) as e:
+                st.error(str(e))
+                return
+            st.success(f"{r.insertados} movimientos importados ✅ — {r.omitidos} ya estaban.")
+            if r.invalidos:
+                st.warning(f"{r.invalidos} filas sin fecha o monto válidos se ignoraron.")
+
+
+def _panel_resumen():
+    st.subheader("Resumen")
+    filas = resumen_movimientos()
+    if not filas:
+        st.info("Todavía no hay movimientos registrados.")
+        return
+
+    # El resumen ya viene agregado por mes/tipo/categoría/medio: son pocas filas.
+    df = pd.DataFrame(
+        [{"mes": r.mes, "tipo": r.tipo, "categoria": r.categoria, "medio": r.medio or "-",
+          "total": r.total, "cantidad": r.cantidad} for r in filas]
+    )
+    meses = sorted(df["mes"].unique(), reverse=True)
+    mes = st.selectbox("Mes", meses, index=0, key="cuentas_mes")
+
+    del_mes = df[df["mes"] == mes]
+    ingresos = float(del_mes.loc[del_mes["tipo"] == "Ingreso", "total"].sum())
+    gastos = float(del_mes.loc[del_mes["tipo"] == "Gasto", "total"].sum())
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Ingresos", _fmt(ingresos))
+    m2.metric("Gastos", _fmt(gastos))
+    m3.metric("Balance", _fmt(ingresos - gastos))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Ingresos y gastos por mes")
+        por_mes = df.pivot_table(index="mes", columns="tipo", values="total", aggfunc="sum", fill_value=0.0)
+        st.bar_chart(por_mes)
+    with col2:
+        st.caption(f"Por categoría — {mes}")
+        por_cat = (
+            del_mes.groupby(["tipo", "categoria"], as_index=False)[["total", "cantidad"]].sum()
+            .sort_values(["tipo", "total"], ascending=[False, False])
+        )
+        st.dataframe(
+            por_cat,
+            hide_index=True,
+            use_container_width=True,
+            column_config={"total": st.column_config.NumberColumn("Total $", format="%.2f")},
+        )
+
+
+def _panel_ultimos_movimientos():
+    st.subheader("Movimientos")
+    f1, f2, f3, f4 = st.columns([1, 2, 2, 1])
+    tipo = f1.selectbox("Tipo", ["Todos", *TIPOS], key="mov_filtro_tipo")
+    categoria = f2.text_input("Categoría", placeholder="Todas", key="mov_filtro_cat").strip()
+    rango = f3.date_input("Fechas", value=(), key="mov_filtro_rango")
+    por_pagina = f4.selectbox("Por página", [20, 50, 100], key="mov_por_pagina")
+    desde, hasta = (rango + (None, None))[:2] if rango else (None, None)
+    tipo = None if tipo == "Todos" else tipo
+
+    movs = paginar(
+        "mov_pag",
+        partial(buscar_movimientos, desde=desde, hasta=hasta, tipo=tipo, categoria=categoria or None),
+        por_pagina,
+        filtros=(tipo, categoria, desde, hasta),
+    )
+    if not movs:
+        st.info("No hay movimientos para mostrar.")
+        return
+
+    st.dataframe(
+        pd.DataFrame([
+            {"id": m.id, "fecha": m.fecha, "tipo": m.tipo, "categoria": m.categoria,
+             "monto": m.monto, "medio": m.medio, "descripcion": m.descripcion}
+            for m in movs
+        ]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={"monto": st.column_config.NumberColumn("Monto $", format="%.2f")},
+    )
+
+    por_id = {m.id: m for m in movs}
+    elegido = st.selectbox(
+        "Editar / borrar",
+        options=list(por_id),
+        format_func=lambda i: f"#{i} — {por_id[i].fecha} {por_id[i].tipo} {por_id[i].categoria} {_fmt(por_id[i].monto)}",
+        key="cuentas_mov_sel",
+    )
+    mov = por_id[elegido]
+    with st.form(f"form_editar_mov_{mov.id}"):
+        c1, c2, c3 = st.columns(3)
+        fecha = c1.date_input("Fecha", value=mov.fecha)
+        tipo = c2.selectbox("Tipo", TIPOS, index=TIPOS.index(mov.tipo) if mov.tipo in TIPOS else 0)
+        monto = c3.number_input("Monto $", min_value=0.0, value=float(mov.monto or 0.0), step=100.0)
+        c4, c5 = st.columns(2)
+        categoria = c4.text_input("Categoría", value=mov.categoria or "")
+        medio = c5.selectbox("Medio", MEDIOS, index=MEDIOS.index(mov.medio) if mov.medio in MEDIOS else 0)
+        descripcion = st.text_input("Descripción", value=mov.descripcion or "")
+        b1, b2 = st.columns(2)
+        guardar = b1.form_submit_button("💾 Guardar cambios", use_container_width=True)
+        borrar = b2.form_submit_button("🗑️ Borrar", use_container_width=True)
+
+    if guardar:
+        actualizar_movimiento(
+            mov.id, fecha=fecha, tipo=tipo, categoria=categoria.strip(), monto=monto,
+            descripcion=descripcion, medio=medio,
+        )
+        st.rerun()
+    if borrar:
+        eliminar_movimiento(mov.id)
+        st.rerun()
+
+
+def _panel_exportar():
+    with st.expander("⬇️ Exportar movimientos"):
+        c1, c2 = st.columns([2, 1])
+        rango = c1.date_input("Fechas", value=(), key="mov_export_rango")
+        formatos = ["csv", "parquet"] if parquet_disponible() else ["csv"]
+        formato = c2.selectbox("Formato", formatos, key="mov_export_formato")
+        desde, hasta = (rango + (None, None))[:2] if rango else (None, None)
+        # Se genera recién al hacer clic, en streaming y de a bloques.
+        st.download_button(
+            "Descargar",
+            data=lambda: exportar_a_bytes("movimientos", formato, desde, hasta),
+            file_name=f"movimientos.{formato}",
+            mime="text/csv" if formato == "csv" else "application/octet-stream",
+            key="mov_export_btn",
+        )
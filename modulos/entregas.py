@@ -2,25 +2,42 @@
 from __future__ import annotations
 import streamlit as st
 from datetime import date
+from functools import partial
 import pandas as pd
 
 from utils.db_app import (
-    get_session,
     upsert_cliente,
     search_clientes,
     get_cliente_by_nombre,
     crear_entrega,
-    ultimas_entregas,
-    Cliente,
-    EntregaItem,
+    buscar_entregas,
+    estadisticas_cliente,
+    ranking_clientes,
+    nombres_piezas,
+    precios_piezas,
 )
+from utils.config import cargar_config
+from utils.items_entrega import ItemsEditor
+from utils.exportar import exportar_a_bytes, parquet_disponible
+from utils.remitos import formato_por_defecto, ids_entregas, remito, remitos_zip
+from utils.paginacion import paginar
+
+# Si el delta del editor supera estas filas, se incorpora a la base (ver ItemsEditor.compactar).
+UMBRAL_COMPACTAR = 200
 
 # ---------------- Helpers ----------------
+def _reset_items(items: ItemsEditor | None = None):
+    items = items or ItemsEditor()
+    st.session_state["ent_items"] = items
+    st.session_state["ent_items_df"] = pd.DataFrame(
+        items.filas, columns=["pieza", "cantidad", "precio_unitario"]
+    )
+    # Key nueva para el editor: arranca sin delta sobre la base nueva.
+    st.session_state["ent_items_ver"] = st.session_state.get("ent_items_ver", 0) + 1
+
 def _ensure_items_state():
-    if "ent_items_df" not in st.session_state:
-        st.session_state["ent_items_df"] = pd.DataFrame(
-            [{"pieza": "", "cantidad": 1, "precio_unitario": 0.0}]
-        )
+    if "ent_items" not in st.session_state:
+        _reset_items()
 
 def _nombres_clientes(filtro: str) -> list[str]:
     clientes = search_clientes(filtro.strip() if filtro else "", limit=50)
@@ -44,6 +61,41 @@ def _modal_nuevo_cliente(prefill: str = ""):
         st.success("Cliente guardado.")
         st.rerun()
 
+def _agregar_del_catalogo(editor_key: str, habilitado: bool):
+    nombres = nombres_piezas()
+    if not nombres:
+        st.caption("Tip: guardá piezas en el catálogo (Costos y tiempos) para cargarlas con su precio.")
+        return
+    items: ItemsEditor = st.session_state["ent_items"]
+    delta = st.session_state.get(editor_key, {})
+    config = cargar_config()
+
+    c1, c2, c3, c4 = st.columns([3, 1, 1, 2], vertical_alignment="bottom")
+    pieza = c1.selectbox(
+        "Pieza del catálogo", nombres, index=None, placeholder="Escribí para buscar…",
+        key="ent_cat_pieza", disabled=not habilitado,
+    )
+    cantidad = c2.number_input("Cantidad", min_value=1, value=1, step=1, key="ent_cat_cant", disabled=not habilitado)
+    if c3.button("➕ Agregar", disabled=not (habilitado and pieza), use_container_width=True):
+        precio = precios_piezas([pieza], config).get(pieza) or 0.0
+        _reset_items(items.agregar(delta, {"pieza": pieza, "cantidad": int(cantidad), "precio_unitario": round(precio, 2)}))
+        st.rerun()
+    if c4.button("💲 Completar precios", disabled=not habilitado, use_container_width=True,
+                 help="Pone el precio del catálogo en las filas que no tienen precio."):
+        filas = items.filas_actuales(delta)
+        precios = precios_piezas([f["pieza"].strip() for f in filas if isinstance(f.get("pieza"), str)], config)
+        _reset_items(items.con_precios(delta, precios))
+        st.rerun()
+
+def _stats_cliente(cliente_id: int):
+    stats = estadisticas_cliente(cliente_id)
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Entregas", stats.entregas)
+    m2.metric("Total $", f"{stats.total:,.2f}".replace(",", ""))
+    m3.metric("Última entrega", stats.ultima_fecha.strftime("%Y-%m-%d") if stats.ultima_fecha else "—")
+    if stats.top_piezas:
+        st.caption("Más pedidas: " + ", ".join(f"{pieza} x{cant}" for pieza, cant in stats.top_piezas))
+
 # ---------------- Pantalla principal ----------------
 def mostrar_entregas():
     st.title("📦 Entregas")
@@ -86,6 +138,7 @@ def mostrar_entregas():
                 c1.text_input("Teléfono", value=cli.telefono or "", disabled=True)
                 c2.text_input("Email", value=cli.email or "", disabled=True)
                 st.text_input("Dirección", value=cli.direccion or "", disabled=True)
+                _stats_cliente(cli.id)
                 st.caption("Para editar, usá “➕ Nuevo cliente…” y guardá con el mismo nombre.")
         else:
             st.info("Seleccioná un cliente a la izquierda o creá uno nuevo.")
@@ -98,11 +151,12 @@ def mostrar_entregas():
     st.subheader("Piezas")
     st.caption("Completá **pieza**, **cantidad** y **precio unitario**. Podés agregar filas con el +.")
 
-    df_prev = st.session_state["ent_items_df"]
-    df_edit = st.data_editor(
-        df_prev,
+    editor_key = f"ent_items_editor_{st.session_state['ent_items_ver']}"
+    _agregar_del_catalogo(editor_key, cliente_ok)
+    st.data_editor(
+        st.session_state["ent_items_df"],
         num_rows="dynamic",
-        key="ent_items_editor",
+        key=editor_key,
         disabled=not cliente_ok,
         use_container_width=True,
         column_config={
@@ -111,20 +165,17 @@ def mostrar_entregas():
             "precio_unitario": st.column_config.NumberColumn("Precio unitario $", min_value=0.0, step=50.0, format="%.2f"),
         },
     )
-    st.session_state["ent_items_df"] = df_edit
 
-    try:
-        df_calc = df_edit.copy()
-        df_calc["subtotal"] = (
-            df_calc["cantidad"].fillna(0).astype(int)
-            * df_calc["precio_unitario"].fillna(0.0).astype(float)
-        )
-        total = float(df_calc["subtotal"].sum())
-    except Exception:
-        total = 0.0
+    # Total a partir del delta del editor: sólo se recorren las filas tocadas.
+    items_editor: ItemsEditor = st.session_state["ent_items"]
+    delta = st.session_state.get(editor_key, {})
+    if ItemsEditor.tamano_delta(delta) > UMBRAL_COMPACTAR:
+        _reset_items(items_editor.compactar(delta))
+        st.rerun()
+    total, n_filas = items_editor.total(delta)
 
     mt1, mt2 = st.columns(2)
-    mt1.metric("Ítems", len(df_edit))
+    mt1.metric("Ítems", n_filas)
     mt2.metric("Total $", f"{total:,.2f}".replace(",", ""))
 
     st.divider()
@@ -139,22 +190,10 @@ def mostrar_entregas():
     with c3:
         descuento = st.number_input("Descuento $", min_value=0.0, value=0.0, step=50.0)
 
-    puede_guardar = cliente_ok and len(df_edit) > 0
+    puede_guardar = cliente_ok and n_filas > 0
 
     if st.button("✅ Guardar entrega", type="primary", disabled=not puede_guardar):
-        items = (
-            df_edit.fillna({"pieza": "", "cantidad": 0, "precio_unitario": 0.0})
-            .to_dict(orient="records")
-        )
-        items = [
-            {
-                "pieza": (r.get("pieza") or "").strip(),
-                "cantidad": int(r.get("cantidad") or 0),
-                "precio_unitario": float(r.get("precio_unitario") or 0.0),
-            }
-            for r in items
-            if (r.get("pieza") or "").strip() and int(r.get("cantidad") or 0) > 0
-        ]
+        items = items_editor.items_validos(delta)
         if not items:
             st.warning("No hay piezas válidas para guardar.")
             st.stop()
@@ -168,30 +207,122 @@ def mostrar_entregas():
             descuento=descuento,
         )
 
-        st.session_state["ent_items_df"] = pd.DataFrame(
-            [{"pieza": "", "cantidad": 1, "precio_unitario": 0.0}]
-        )
+        _reset_items()
         st.success(f"Entrega #{ent.id} guardada ✅ — Total ${ent.total:,.2f}".replace(",", ""))
 
     st.divider()
 
     # -------- Últimas entregas --------
     st.subheader("Últimas entregas")
-    ult = ultimas_entregas(limit=10)
+    _panel_ultimas_entregas()
+    _panel_exportar()
+    _panel_remitos()
+    _panel_ranking_clientes()
+
+def _panel_ultimas_entregas():
+    f1, f2, f3 = st.columns([2, 2, 1])
+    cliente = f1.text_input("Cliente", placeholder="Todos", key="ult_ent_cliente").strip()
+    rango = f2.date_input("Fechas", value=(), key="ult_ent_rango")
+    por_pagina = f3.selectbox("Por página", options=[10, 25, 50, 100], index=0, key="ult_ent_por_pagina")
+    desde, hasta = (rango + (None, None))[:2] if rango else (None, None)
+
+    ult = paginar(
+        "ult_ent_pag",
+        partial(buscar_entregas, desde=desde, hasta=hasta, cliente=cliente or None),
+        por_pagina,
+        filtros=(cliente, desde, hasta),
+    )
     if not ult:
-        st.info("Todavía no hay entregas registradas.")
+        st.info("No hay entregas para mostrar.")
         return
 
-    with get_session() as s:
-        for ent in ult:
-            cli = s.get(Cliente, ent.cliente_id)
-            items = s.query(EntregaItem).filter(EntregaItem.entrega_id == ent.id).all()
-            resumen = ", ".join(f"{it.pieza} x{it.cantidad}" for it in items[:4])
-            if len(items) > 4:
-                resumen += f" (+{len(items)-4} más)"
-
-            with st.container(border=True):
-                a, b, c = st.columns([2, 3, 1])
-                a.write(f"**{ent.fecha.strftime('%Y-%m-%d')}** — ID #{ent.id}")
-                b.write(f"**{cli.nombre if cli else 'Cliente'}** · {resumen}")
-                c.write(f"${float(ent.total or 0.0):,.2f}".replace(",", "")) 
+    formato = formato_por_defecto()
+    for ent in ult:
+        with st.container(border=True):
+            a, b, c, d = st.columns([2, 3, 1, 1], vertical_alignment="center")
+            a.write(f"**{ent.fecha.strftime('%Y-%m-%d')}** — ID #{ent.id}")
+            b.write(f"**{ent.cliente}** · {ent.resumen}")
+            c.write(f"${ent.total:,.2f}".replace(",", ""))
+            # Se renderiza recién al hacer clic (y queda en cache mientras la entrega no cambie);
+            # si se borró después de listarla, remito() avisa con un error en vez de bajar vacío.
+            d.download_button(
+                "🧾 Remito",
+                data=partial(remito, ent.id, formato),
+                file_name=f"remito-{ent.id:06d}.{formato}",
+                mime="application/pdf" if formato == "pdf" else "text/html",
+                key=f"remito_{ent.id}",
+            )
+
+def _panel_exportar():
+    with st.expander("⬇️ Exportar entregas"):
+        c1, c2 = st.columns([2, 1])
+        rango = c1.date_input("Fechas", value=(), key="ent_export_rango")
+        formatos = ["csv", "parquet"] if parquet_disponible() else ["csv"]
+        formato = c2.selectbox("Formato", formatos, key="ent_export_formato")
+        desde, hasta = (rango + (None, None))[:2] if rango else (None, None)
+        # Se genera recién al hacer clic, en streaming y de a bloques.
+        st.download_button(
+            "Descargar",
+            data=lambda: exportar_a_bytes("entregas", formato, desde, hasta),
+            file_name=f"entregas.{formato}",
+            mime="text/csv" if formato == "csv" else "application/octet-stream",
+            key="ent_export_btn",
+        )
+
+def _panel_remitos():
+    with st.expander("🧾 Remitos del mes"):
+        hoy = date.today()
+        c1, c2 = st.columns([2, 2])
+        rango = c1.date_input("Fechas", value=(hoy.replace(day=1), hoy), key="remitos_rango")
+        cliente = c2.text_input("Cliente", placeholder="Todos", key="remitos_cliente").strip()
+        desde, hasta = (rango + (None, None))[:2] if rango else (None, None)
+        filtros = (desde, hasta, cliente)
+        previo = st.session_state.get("remitos_lote")
+        if previo is not None and previo[0] != filtros:
+            st.session_state.pop("remitos_lote")[1].archivo.close()
+
+        # Las entregas se buscan recién al generar; el zip queda en su archivo temporal (a disco
+        # si es grande) y el botón de descarga lo lee al hacer clic.
+        if st.button("Generar remitos", key="remitos_generar"):
+            ids = ids_entregas(desde, hasta, cliente or None)
+            if not ids:
+                st.info("No hay entregas con esos filtros.")
+            else:
+                barra = st.progress(0.0, text="Generando remitos…")
+                lote = remitos_zip(ids, progreso=lambda hechos, total: barra.progress(
+                    hechos / total, text=f"Generando remitos… {hechos}/{total}"
+                ))
+                barra.empty()
+                if "remitos_lote" in st.session_state:
+                    st.session_state.pop("remitos_lote")[1].archivo.close()
+                st.session_state["remitos_lote"] = (filtros, lote)
+                st.caption(f"{lote.remitos} remitos en {lote.segundos:.1f}s ({lote.del_cache} ya estaban generados).")
+
+        if "remitos_lote" in st.session_state:
+            st.download_button(
+                "⬇️ Descargar zip",
+                data=st.session_state["remitos_lote"][1].leer,
+                file_name=f"remitos_{desde or 'todos'}_{hasta or ''}.zip".replace("_.zip", ".zip"),
+                mime="application/zip",
+                key="remitos_descargar",
+            )
+
+def _panel_ranking_clientes():
+    with st.expander("🏆 Ranking de clientes"):
+        ordenes = {"Total gastado": "total", "Cantidad de entregas": "entregas", "Última entrega": "ultima_fecha"}
+        c1, c2 = st.columns([2, 1])
+        orden = c1.selectbox("Ordenar por", list(ordenes), key="rank_cli_orden")
+        limite = c2.selectbox("Mostrar", [10, 25, 50, 100], index=1, key="rank_cli_limite")
+        filas = ranking_clientes(ordenes[orden], limite)
+        if not filas:
+            st.info("Todavía no hay entregas.")
+            return
+        st.dataframe(
+            pd.DataFrame(
+                [(f.nombre, f.entregas, f.total, f.ultima_fecha) for f in filas],
+                columns=["Cliente", "Entregas", "Total $", "Última entrega"],
+            ),
+            hide_index=True,
+            use_container_width=True,
+            column_config={"Total $": st.column_config.NumberColumn(format="%.2f")},
+        )
@@ -1,5 +1,175 @@
+# modulos/pedidos.py
+from __future__ import annotations
 import streamlit as st
+from datetime import datetime, timedelta
+import pandas as pd
+
+from utils.db_app import (
+    activar_impresora,
+    cambiar_estado_pedido,
+    cola_pedidos,
+    crear_impresora,
+    crear_pedido,
+    eliminar_pedido,
+    get_pieza_by_nombre,
+    listar_impresoras,
+    nombres_piezas,
+    replanificar,
+)
+
+# Si el plan quedó atrás (pendientes que "ya deberían haber empezado"), se rehace desde ahora.
+TOLERANCIA_PLAN = timedelta(minutes=5)
+
+
+def _fmt_duracion(minutos: float) -> str:
+    horas, mins = divmod(int(round(minutos)), 60)
+    return f"{horas}h {mins:02d}m"
+
 
 def mostrar_pedidos():
-    st.header("📦 Control de pedidos")
-    st.info("Acá vas a cargar y ver todos los pedidos de impresión.")
+    st.header("🖨️ Control de pedidos")
+    st.info("Cargá los pedidos con su fecha de entrega: se reparten solos entre las impresoras activas.")
+
+    _panel_impresoras()
+    _form_nuevo_pedido()
+    st.divider()
+    _panel_plan()
+
+
+def _panel_impresoras():
+    impresoras = listar_impresoras()
+    with st.expander(f"🖨️ Impresoras ({sum(i.activa for i in impresoras)} activas)", expanded=not impresoras):
+        for imp in impresoras:
+            activa = st.toggle(imp.nombre, value=imp.activa, key=f"imp_activa_{imp.id}")
+            if activa != imp.activa:
+                activar_impresora(imp.id, activa)
+                st.rerun()
+        with st.form("form_impresora", clear_on_submit=True):
+            c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+            nombre = c1.text_input("Nueva impresora", placeholder="Ender 3, P1S…")
+            if c2.form_submit_button("➕ Agregar", use_container_width=True):
+                try:
+                    crear_impresora(nombre)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    st.rerun()
+
+
+def _form_nuevo_pedido():
+    st.subheader("Nuevo pedido")
+    # Fuera del form: elegir del catálogo completa tiempo y gramos (los mismos datos de Costos y tiempos).
+    nombres = nombres_piezas()
+    del_catalogo = st.selectbox(
+        "Pieza del catálogo (opcional)", nombres, index=None, placeholder="Escribí para buscar…", key="ped_cat_pieza",
+    ) if nombres else None
+    pieza = get_pieza_by_nombre(del_catalogo) if del_catalogo else None
+    minutos_pieza = int(round(pieza.minutos)) if pieza else 0
+
+    with st.form("form_pedido", clear_on_submit=True):
+        c1, c2, c3 = st.columns([3, 2, 1])
+        nombre = c1.text_input("Pieza *", value=pieza.nombre if pieza else "")
+        cliente = c2.text_input("Cliente (opcional)")
+        cantidad = c3.number_input("Cantidad", min_value=1, value=1, step=1)
+        c4, c5, c6, c7 = st.columns(4)
+        horas = c4.number_input("Horas por unidad", min_value=0, value=minutos_pieza // 60, format="%d")
+        minutos = c5.number_input("Minutos por unidad", min_value=0, max_value=59, value=minutos_pieza % 60, format="%d")
+        gramos = c6.number_input("Gramos por unidad", min_value=0, value=int(round(pieza.gramos)) if pieza else 0, format="%d")
+        entrega = c7.date_input("Entrega", value=None, help="Vacío = sin fecha: se imprime cuando haya lugar.")
+        enviar = st.form_submit_button("💾 Agregar a la cola", type="primary")
+
+    if enviar:
+        total_minutos = (horas * 60 + minutos) * cantidad
+        if not nombre.strip() or total_minutos <= 0:
+            st.warning("Completá la pieza y un tiempo de impresión mayor a 0.")
+            return
+        ped = crear_pedido(nombre, cantidad, total_minutos, gramos * cantidad, entrega, cliente=cliente)
+        st.success(f"Pedido #{ped.id} en la cola ✅ — {_fmt_duracion(total_minutos)} de impresión")
+
+
+def _panel_plan():
+    st.subheader("Cola de impresión")
+    cola = cola_pedidos()
+    ahora = datetime.now()
+    if any(p.estado == "pendiente" and p.inicio is not None and p.inicio < ahora - TOLERANCIA_PLAN for p in cola):
+        replanificar()
+        cola = cola_pedidos()
+    if not cola:
+        st.info("No hay pedidos en la cola.")
+        return
+
+    sin_impresora = [p for p in cola if p.impresora is None]
+    if sin_impresora:
+        st.warning(f"{len(sin_impresora)} pedidos sin impresora: activá o agregá una impresora.")
+    planificados = [p for p in cola if p.fin is not None]
+    atrasados = sum(p.atrasado for p in planificados)
+    m1, m2, m3 = st.columns(3)
+    m1.metric("En cola", len(cola))
+    m2.metric("Termina todo", max(p.fin for p in planificados).strftime("%d/%m %H:%M") if planificados else "—")
+    m3.metric("Atrasados", atrasados)
+
+    df = pd.DataFrame([{
+        "id": p.id,
+        "pedido": f"#{p.id} {p.pieza} x{p.cantidad}",
+        "cliente": p.cliente or "",
+        "impresora": p.impresora or "—",
+        "estado": "atrasado" if p.atrasado else p.estado,
+        "inicio": p.inicio,
+        "fin": p.fin,
+        "duración": _fmt_duracion(p.minutos),
+        "entrega": p.fecha_entrega,
+    } for p in cola])
+    if planificados:
+        _gantt(df[df["fin"].notna()])
+    st.dataframe(df.drop(columns=["id"]), hide_index=True, use_container_width=True)
+    _acciones_pedido(cola)
+
+
+def _gantt(df: pd.DataFrame):
+    # Import acá: altair viene con streamlit pero sólo hace falta en esta pantalla.
+    import altair as alt
+
+    colores = alt.Scale(domain=["imprimiendo", "pendiente", "atrasado"], range=["#2e7d32", "#1f77b4", "#d62728"])
+    grafico = (
+        alt.Chart(df)
+        .mark_bar(cornerRadius=3)
+        .encode(
+            x=alt.X("inicio:T", title=None),
+            x2="fin:T",
+            y=alt.Y("impresora:N", title=None),
+            color=alt.Color("estado:N", scale=colores, legend=alt.Legend(orient="bottom", title=None)),
+            tooltip=["pedido", "cliente", "estado", "duración",
+                     alt.Tooltip("inicio:T", format="%d/%m %H:%M"), alt.Tooltip("fin:T", format="%d/%m %H:%M"),
+                     alt.Tooltip("entrega:T", format="%d/%m")],
+        )
+        .properties(height=max(120, 45 * df["impresora"].nunique()))
+    )
+    st.altair_chart(grafico, use_container_width=True)
+
+
+def _acciones_pedido(cola):
+    opciones = {f"#{p.id} {p.pieza} ({p.estado})": p for p in cola}
+    c1, c2, c3, c4, c5 = st.columns([3, 1, 1, 1, 1], vertical_alignment="bottom")
+    elegido = c1.selectbox("Pedido", list(opciones), key="ped_accion_sel")
+    ped = opciones[elegido]
+    nuevo = None
+    if c2.button("▶️ Empezar", disabled=ped.estado != "pendiente" or ped.impresora is None, use_container_width=True):
+        nuevo = "imprimiendo"
+    if c3.button("✅ Terminado", use_container_width=True):
+        nuevo = "terminado"
+    if c4.button("↩️ A la cola", disabled=ped.estado != "imprimiendo", use_container_width=True,
+                 help="Falló o se canceló la impresión: vuelve a planificarse."):
+        nuevo = "pendiente"
+    if c5.button("🗑️ Eliminar", use_container_width=True):
+        nuevo = "eliminar"
+    if nuevo is None:
+        return
+    try:
+        if nuevo == "eliminar":
+            eliminar_pedido(ped.id)
+        else:
+            cambiar_estado_pedido(ped.id, nuevo)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.rerun()
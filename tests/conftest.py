@@ -0,0 +1,26 @@
+# tests/conftest.py
+"""
+Las pruebas corren sobre una base temporal, nunca la real: DB_PATH y HOME se fijan antes de
+importar utils.db_app (el engine se arma al importarlo).
+Todas las pruebas comparten la base; cada una usa sus propios clientes.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+TMP = Path(tempfile.mkdtemp(prefix="3diego_tests_"))
+os.environ["DB_PATH"] = str(TMP / "app.db")
+os.environ["HOME"] = str(TMP)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def base():
+    from utils.db_app import engine, init_db
+
+    init_db()
+    yield TMP
+    engine.dispose()
+    shutil.rmtree(TMP, ignore_errors=True)
@@ -0,0 +1,26 @@
+# tests/test_clientes.py
+"""Búsqueda de clientes: lo que se cachea para todas las sesiones son filas inmutables."""
+import dataclasses
+from datetime import datetime
+
+import pytest
+
+from utils.db_app import ClienteFila, get_cliente_by_nombre, search_clientes, upsert_cliente
+
+
+def test_busquedas_devuelven_filas_inmutables():
+    upsert_cliente("Ñandú Pérez", telefono="123", email="nandu@example.com")
+    for encontrados in (search_clientes("nandu"), search_clientes("ña"), [get_cliente_by_nombre("ÑANDU PEREZ")]):
+        fila = next(c for c in encontrados if c.nombre == "Ñandú Pérez")
+        assert isinstance(fila, ClienteFila)
+        assert (fila.telefono, fila.email) == ("123", "nandu@example.com")
+        assert isinstance(fila.creado_en, datetime)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            fila.telefono = "otro"
+
+
+def test_escritura_invalida_la_cache():
+    upsert_cliente("Cliente cache", telefono="1")
+    assert get_cliente_by_nombre("cliente cache").telefono == "1"
+    upsert_cliente("Cliente cache", telefono="2")
+    assert get_cliente_by_nombre("cliente cache").telefono == "2"
@@ -0,0 +1,56 @@
+# tests/test_concurrencia.py
+"""
+Escritores concurrentes (hilos, como las sesiones de Streamlit, y procesos, como la API o
+un mantenimiento al mismo tiempo que la app): BEGIN IMMEDIATE + busy_timeout los ponen en
+fila y ninguno falla con "database is locked".
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing import get_context
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from utils.db_app import crear_entrega, crear_movimiento, engine, search_clientes
+
+ENTREGAS_POR_ESCRITOR = 15
+
+
+def _escribir(idx: int, notas: str) -> list[str]:
+    errores = []
+    for i in range(ENTREGAS_POR_ESCRITOR):
+        try:
+            crear_entrega(f"Cliente concurrente {(idx + i) % 5}", date.today(), "", notas,  # clientes compartidos
+                          [{"pieza": f"pieza {j}", "cantidad": 1, "precio_unitario": 100.0} for j in range(3)])
+            crear_movimiento(date.today(), "Ingreso", "Ventas", 300.0, descripcion=notas)
+            search_clientes("concurrente")  # lecturas intercaladas
+        except OperationalError as e:
+            errores.append(str(e.orig))
+    return errores
+
+
+def _contar(notas: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM entregas WHERE notas = :n"), {"n": notas}).scalar_one()
+
+
+def test_hilos_escribiendo_sin_lock():
+    errores: list[str] = []
+    hilos = [threading.Thread(target=lambda i=i: errores.extend(_escribir(i, "concurrencia hilos"))) for i in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert errores == []
+    assert _contar("concurrencia hilos") == 8 * ENTREGAS_POR_ESCRITOR
+
+
+def test_procesos_escribiendo_sin_lock():
+    # spawn: cada proceso arma su propio engine sobre la misma base (DB_PATH se hereda).
+    with ProcessPoolExecutor(3, mp_context=get_context("spawn")) as pool:
+        futuros = [pool.submit(_escribir, i, "concurrencia procesos") for i in range(3)]
+        errores = _escribir(3, "concurrencia procesos")  # y este proceso a la vez
+        errores += [e for f in futuros for e in f.result()]
+    assert errores == []
+    assert _contar("concurrencia procesos") == 4 * ENTREGAS_POR_ESCRITOR
@@ -0,0 +1,32 @@
+# tests/test_pedidos.py
+"""Cola de impresión: estados de los pedidos e impresoras."""
+import pytest
+
+from utils.db_app import activar_impresora, cambiar_estado_pedido, cola_pedidos, crear_impresora, crear_pedido, listar_impresoras
+
+
+@pytest.fixture
+def impresora():
+    """Una impresora nueva como única activa: todo el plan cae en ella."""
+    for imp in listar_impresoras():
+        activar_impresora(imp.id, False)
+    return crear_impresora(f"Prueba {len(listar_impresoras())}")
+
+
+def test_empezar_solo_con_impresora_libre_o_el_proximo(impresora):
+    ids = [crear_pedido(f"Pieza {i}", 1, 60).id for i in range(3)]
+    primero, segundo, tercero = [p.id for p in cola_pedidos() if p.id in ids]
+
+    cambiar_estado_pedido(primero, "imprimiendo")
+    with pytest.raises(ValueError, match=f"#{primero}"):
+        cambiar_estado_pedido(tercero, "imprimiendo")
+    cambiar_estado_pedido(segundo, "imprimiendo")
+    estados = {p.id: p.estado for p in cola_pedidos()}
+    assert [estados[i] for i in (primero, segundo, tercero)] == ["imprimiendo", "imprimiendo", "pendiente"]
+
+
+def test_crear_impresora_nombre_vacio_o_repetido(impresora):
+    with pytest.raises(ValueError):
+        crear_impresora("   ")
+    with pytest.raises(ValueError, match="Ya hay"):
+        crear_impresora(f"  {impresora.nombre} ")
@@ -0,0 +1,18 @@
+# tests/test_planes.py
+"""
+Las consultas clave de las pantallas (utils/mantenimiento.CONSULTAS_CLAVE) se resuelven con
+índices: ni SCAN de tablas enteras ni TEMP B-TREE, salvo los pasos permitidos de cada una.
+Es lo mismo que `python -m utils.mantenimiento verificar-indices`.
+"""
+import pytest
+
+from utils.mantenimiento import CONSULTAS_CLAVE, plan_consulta, problemas_de_plan
+
+
+@pytest.mark.parametrize("nombre", list(CONSULTAS_CLAVE))
+def test_plan_sin_scan_ni_temp_btree(nombre):
+    consultas = plan_consulta(nombre)
+    assert consultas, "la consulta no emitió ningún SELECT"
+    permitidos = CONSULTAS_CLAVE[nombre][1]
+    malos = {sql: problemas_de_plan(detalles, permitidos) for sql, detalles in consultas}
+    assert not any(malos.values()), malos
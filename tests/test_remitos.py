@@ -0,0 +1,26 @@
+# tests/test_remitos.py
+"""Remitos de una entrega: de la base caliente, del archivo y de una que ya no existe."""
+from datetime import date, timedelta
+
+import pytest
+
+from utils.archivo import archivar
+from utils.db_app import Entrega, crear_entrega, get_session
+from utils.remitos import remito
+
+ITEM = [{"pieza": "Soporte", "cantidad": 1, "precio_unitario": 800.0}]
+
+
+def test_remito_archivado_y_borrado():
+    hoy = date.today()
+    vieja = crear_entrega("Cliente remitos", hoy - timedelta(days=900), "", "", ITEM)
+    nueva = crear_entrega("Cliente remitos", hoy, "", "", ITEM)
+    archivar(hoy - timedelta(days=365), vacuum=False)
+    assert remito(vieja.id, "html")
+    assert remito(nueva.id, "html")
+
+    with get_session(escritura=True) as s:
+        s.delete(s.get(Entrega, nueva.id))
+        s.commit()
+    with pytest.raises(LookupError, match=f"#{nueva.id}"):
+        remito(nueva.id, "html")
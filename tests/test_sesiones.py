@@ -0,0 +1,118 @@
+# tests/test_sesiones.py
+"""Semántica de los dos backends de sesiones: TTL, renovación (sliding expiration) y aislamiento."""
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+
+from utils import session
+from utils.db_app import engine
+
+TTL = 3600
+
+
+class Reloj:
+    """Reemplaza session._now para poder avanzar el tiempo a mano."""
+
+    def __init__(self):
+        self.t = int(time.time())
+
+    def __call__(self) -> int:
+        return self.t
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def backend(request, monkeypatch):
+    crear = session.SesionesSQLite if request.param == "sqlite" else session.SesionesMemoria
+    reloj = Reloj()
+    monkeypatch.setattr(session, "_now", reloj)
+    b = crear(ttl=TTL)
+    monkeypatch.setattr(session, "_backend", b)
+    b.reloj = reloj
+    return b
+
+
+def test_vence_al_cumplir_el_ttl(backend):
+    token = session.guardar_sesion("ana")
+    backend.reloj.t += TTL
+    assert not session.sesion_valida(token)
+    assert not session.sesion_valida(token), "una vencida no revive"
+    otro = session.guardar_sesion("ana")
+    backend.reloj.t += TTL - 1
+    assert session.sesion_valida(otro)
+
+
+def test_renovacion_despues_del_75_por_ciento(backend):
+    a = session.guardar_sesion("ana")
+    b = session.guardar_sesion("beto")
+    backend.reloj.t += TTL // 2
+    assert session.sesion_valida(a)  # antes del 75%: no renueva
+    backend.reloj.t += TTL // 2 - 1
+    assert session.sesion_valida(a)  # pasado el 75%: renueva
+    backend.reloj.t += 1
+    assert not session.sesion_valida(b), "b no se validó desde el login: vence"
+    assert session.sesion_valida(a), "a se renovó al pasar el 75% del TTL"
+
+
+def test_sin_renovar_antes_del_75_por_ciento(backend):
+    token = session.guardar_sesion("ana")
+    backend.reloj.t += TTL * 3 // 4
+    assert session.sesion_valida(token)  # justo en el 75%: todavía no renueva
+    backend.reloj.t += TTL // 4
+    assert not session.sesion_valida(token)
+
+
+def test_tokens_aislados(backend):
+    # El mismo usuario en dos navegadores: cada uno con su token, que vive y muere por separado.
+    a = session.guardar_sesion("ana")
+    b = session.guardar_sesion("ana")
+    assert a != b
+    assert backend.validar(a) == backend.validar(b) == "ana"
+    session.eliminar_sesion(a)
+    assert not session.sesion_valida(a)
+    assert session.sesion_valida(b)
+    assert not session.sesion_valida("inexistente")
+    assert not session.sesion_valida(None)
+    assert not session.sesion_valida("")
+
+
+def test_vencida_se_borra_del_backend(backend):
+    token = session.guardar_sesion("ana")
+    backend.reloj.t += TTL
+    assert not session.sesion_valida(token)
+    if isinstance(backend, session.SesionesMemoria):
+        assert token not in backend._sesiones
+    else:
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM sesiones WHERE token = :t"), {"t": token}).scalar_one() == 0
+
+
+def test_barrido_de_memoria():
+    b = session.SesionesMemoria(ttl=60)
+    ahora = session._now()
+    b.guardar("viejo", "ana")
+    b._sesiones["viejo"] = ("ana", ahora - 3600)
+    b._ultimo_barrido = ahora - session.INTERVALO_BARRIDO
+    b.guardar("nuevo", "beto")
+    assert b.validar("nuevo") == "beto"
+    assert "viejo" not in b._sesiones and len(b) == 1
+
+
+def test_validaciones_concurrentes(backend):
+    tokens = [session.guardar_sesion(f"user{i}") for i in range(50)]
+    fallas: list[str] = []
+
+    def trabajador(idx: int) -> None:
+        for i in range(40):
+            t = tokens[(idx * 7 + i) % len(tokens)]
+            if not session.sesion_valida(t):
+                fallas.append(t)
+
+    hilos = [threading.Thread(target=trabajador, args=(i,)) for i in range(8)]
+    backend.reloj.t += TTL * 3 // 4 + 1  # todas renuevan a la vez, también en sqlite (escrituras)
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert fallas == []
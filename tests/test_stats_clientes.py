@@ -0,0 +1,101 @@
+# tests/test_stats_clientes.py
+"""clientes_stats / clientes_piezas (triggers) contra una agregación desde cero."""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from utils.archivo import archivar
+from utils.db_app import (
+    Entrega, EntregaItem, crear_entrega, estadisticas_cliente, get_session, ranking_clientes,
+    upsert_cliente, verificar_stats_clientes,
+)
+
+ITEM = [{"pieza": "Maceta", "cantidad": 2, "precio_unitario": 1500.0}]
+
+
+def test_ultima_fecha_despues_de_archivar():
+    hoy = date.today()
+    vieja = hoy - timedelta(days=800)
+    crear_entrega("Cliente archivado", vieja, "", "", ITEM)
+    nueva = crear_entrega("Cliente archivado", hoy, "", "", ITEM)
+    archivar(hoy - timedelta(days=365), vacuum=False)
+
+    # Se borra la única entrega que le quedaba en app.db: la última fecha es la archivada.
+    with get_session(escritura=True) as s:
+        s.delete(s.get(Entrega, nueva.id))
+        s.commit()
+
+    assert verificar_stats_clientes() == []
+    stats = estadisticas_cliente.__wrapped__(nueva.cliente_id)
+    assert (stats.entregas, stats.ultima_fecha) == (1, vieja)
+    ranking = {c.id: c for c in ranking_clientes.__wrapped__("ultima_fecha", limit=1000)}
+    assert ranking[nueva.cliente_id].ultima_fecha == vieja
+
+
+def test_ultima_fecha_con_fecha_anterior_a_la_archivada():
+    hoy = date.today()
+    archivada = hoy - timedelta(days=700)
+    crear_entrega("Cliente fecha vieja", archivada, "", "", ITEM)
+    nueva = crear_entrega("Cliente fecha vieja", hoy, "", "", ITEM)
+    archivar(hoy - timedelta(days=365), vacuum=False)
+
+    # La única entrega en app.db pasa a una fecha anterior a la archivada.
+    with get_session(escritura=True) as s:
+        s.get(Entrega, nueva.id).fecha = archivada - timedelta(days=30)
+        s.commit()
+
+    assert verificar_stats_clientes() == []
+    assert estadisticas_cliente.__wrapped__(nueva.cliente_id).ultima_fecha == archivada
+
+
+PIEZAS = ("Maceta", "Llavero", "Soporte", "Engranaje", "")
+
+
+def _mezcla(rnd: random.Random, n: int, clientes: list[int]) -> None:
+    """Altas por crear_entrega; ediciones, cambios de cliente y borrados por el ORM."""
+    for _ in range(n):
+        op = rnd.random()
+        if op < 0.35:
+            crear_entrega(f"Cliente aleatorio {rnd.randrange(len(clientes))}",
+                          date.today() - timedelta(days=rnd.randrange(800)), "", "",
+                          [{"pieza": rnd.choice(PIEZAS), "cantidad": rnd.randint(1, 5), "precio_unitario": 1000.0}
+                           for _ in range(rnd.randint(1, 4))], descuento=rnd.choice([0.0, 100.0]))
+            continue
+        with get_session(escritura=True) as s:
+            ids = [i for (i,) in s.query(Entrega.id).filter(Entrega.cliente_id.in_(clientes))]
+            if not ids:
+                continue
+            ent = s.get(Entrega, rnd.choice(ids))
+            if op < 0.55:
+                ent.cliente_id = rnd.choice(clientes)
+            elif op < 0.7:
+                ent.fecha = date.today() - timedelta(days=rnd.randrange(800))
+                ent.total = round(rnd.uniform(0, 50_000), 2)
+            elif op < 0.85:
+                item = s.query(EntregaItem).filter(EntregaItem.entrega_id == ent.id).first()
+                if item is not None:
+                    if rnd.random() < 0.3:
+                        s.delete(item)
+                    else:
+                        item.pieza = rnd.choice(PIEZAS)
+                        item.cantidad = rnd.randint(1, 10)
+                        item.subtotal = item.cantidad * item.precio_unitario
+            else:
+                s.delete(ent)
+            s.commit()
+
+
+@pytest.mark.parametrize("semilla", [1, 2, 3])
+def test_stats_incrementales_igual_a_agregar_desde_cero(semilla):
+    rnd = random.Random(semilla)
+    clientes = [upsert_cliente(f"Cliente aleatorio {k}").id for k in range(8)]
+    _mezcla(rnd, 150, clientes)
+    assert verificar_stats_clientes() == []
+
+    # Después de archivar, las mismas operaciones sobre lo que quedó en app.db (incluidos
+    # clientes a los que se les borra o mueve la última entrega caliente).
+    archivar(date.today() - timedelta(days=rnd.randrange(100, 600)), vacuum=False)
+    assert verificar_stats_clientes() == []
+    _mezcla(rnd, 150, clientes)
+    assert verificar_stats_clientes() == []
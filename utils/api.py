@@ -0,0 +1,318 @@
+# utils/api.py
+"""
+API JSON de sólo lectura sobre la misma base que la app: clientes, entregas, movimientos,
+catálogo de piezas con precios y cotizaciones, para planillas, scripts o una pantalla en el taller.
+
+- Servicio ASGI con Starlette + uvicorn (vienen con Streamlit). Es opcional: sin ellos el resto
+  de la app funciona igual y esto avisa al arrancar.
+- Usa el engine de db_app (el mismo pool de conexiones, los mismos PRAGMAs). Las consultas
+  son síncronas y corren en hilos, con un tope igual al tamaño del pool.
+- ETag por respuesta: ruta + parámetros + el contador de cambios de cada tabla de la que
+  depende (versiones_tablas, mantenido por triggers, así cuenta también lo que escribe la app
+  desde otro proceso). Los contadores se releen sólo si cambió app.db o su WAL (tamaño o
+  mtime) o cada EDAD_MAXIMA_VERSIONES segundos: un If-None-Match que coincide devuelve 304, y
+  una respuesta ya armada sale de la cache, las dos sin tocar SQLite.
+- Los listados se paginan por keyset, como las pantallas: cada respuesta trae `siguiente`,
+  el cursor para pedir la página que sigue.
+- Las caches de db_app (clientes, piezas) se invalidan sólo con escrituras del mismo proceso:
+  acá se usan las funciones sin cache (`__wrapped__`).
+
+Sin autenticación: por defecto escucha sólo en localhost.
+
+    python -m utils.api --port 8765
+    curl -i 'http://127.0.0.1:8765/entregas?limit=20'
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, is_dataclass
+from datetime import date
+from typing import Any, Callable, Optional
+
+from sqlalchemy import select
+
+from utils.cache import CacheTTL
+from utils.calculo_costos import calcular_costo, calcular_costos, huella_config
+from utils.config import cargar_config
+from utils.db_app import (
+    DB_PATH, POOL_MAX_OVERFLOW, POOL_SIZE, Cliente, Pieza, buscar_entregas, buscar_movimientos, engine,
+    estadisticas_cliente, init_db, resumen_movimientos, search_clientes, versiones_tablas,
+)
+from utils.remitos import leer_remitos
+
+try:  # El servicio HTTP es opcional: sólo si starlette y uvicorn están instalados.
+    import anyio
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Route
+except ImportError:  # pragma: no cover
+    Starlette = None
+
+LIMITE_DEFAULT = 50
+LIMITE_MAXIMO = 200
+# Aunque app.db y su WAL no cambien de tamaño ni de mtime, los contadores se releen cada tanto
+# (un mtime de grano grueso puede no moverse entre dos escrituras seguidas).
+EDAD_MAXIMA_VERSIONES = 2.0
+
+_cache_respuestas = CacheTTL(maxsize=1024, ttl=600.0)
+
+
+# ---------------- Versiones ----------------
+class MonitorVersiones:
+    """Contadores de versiones_tablas, releídos sólo cuando la base cambió en disco."""
+
+    def __init__(self, ruta=DB_PATH):
+        self.archivos = (ruta, ruta.with_name(ruta.name + "-wal"))
+        self._firma: Optional[tuple] = None
+        self._leido = 0.0
+        self._versiones: dict[str, int] = {}
+        self.lecturas = 0
+
+    def firma(self) -> tuple:
+        firma = []
+        for archivo in self.archivos:
+            try:
+                st = os.stat(archivo)
+                firma.append((st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                firma.append(None)
+        return tuple(firma)
+
+    def al_dia(self) -> Optional[dict[str, int]]:
+        """Los contadores si siguen valiendo; None si hay que releerlos."""
+        if self._firma == self.firma() and time.monotonic() - self._leido < EDAD_MAXIMA_VERSIONES:
+            return self._versiones
+        return None
+
+    def leer(self) -> dict[str, int]:
+        # La firma se toma antes de la consulta: una escritura en el medio obliga a releer la próxima vez.
+        firma, leido = self.firma(), time.monotonic()
+        self._versiones = versiones_tablas()
+        self._firma, self._leido = firma, leido
+        self.lecturas += 1
+        return self._versiones
+
+
+# ---------------- Parámetros ----------------
+def _limite(params) -> int:
+    limit = int(params.get("limit", LIMITE_DEFAULT))
+    if not 1 <= limit <= LIMITE_MAXIMO:
+        raise ValueError(f"limit tiene que estar entre 1 y {LIMITE_MAXIMO}")
+    return limit
+
+
+def _fecha(params, nombre: str) -> Optional[date]:
+    valor = params.get(nombre)
+    return date.fromisoformat(valor) if valor else None
+
+
+def _cursor(params) -> Optional[tuple[date, int]]:
+    """`antes=YYYY-MM-DD,id`: el `siguiente` de la página anterior."""
+    valor = params.get("antes")
+    if not valor:
+        return None
+    fecha, _, fila_id = valor.partition(",")
+    return date.fromisoformat(fecha), int(fila_id)
+
+
+def _fila(obj) -> dict:
+    if is_dataclass(obj):
+        return asdict(obj)
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns if c.key != "nombre_norm"}
+
+
+def _pagina(filas: list, limit: int, siguiente: Callable[[Any], str]) -> dict:
+    return {
+        "filas": [_fila(f) for f in filas],
+        "siguiente": siguiente(filas[-1]) if len(filas) == limit else None,
+    }
+
+
+# ---------------- Consultas ----------------
+def _clientes(request) -> dict:
+    params = request.query_params
+    limit = _limite(params)
+    if params.get("q"):
+        return {"filas": [_fila(c) for c in search_clientes.__wrapped__(params["q"], limit)], "siguiente": None}
+    despues = int(params.get("despues", 0))
+    columnas = [c for c in Cliente.__table__.columns if c.key != "nombre_norm"]
+    with engine.connect() as conn:
+        filas = conn.execute(select(*columnas).where(Cliente.id > despues).order_by(Cliente.id).limit(limit)).all()
+    return {
+        "filas": [f._asdict() for f in filas],
+        "siguiente": str(filas[-1].id) if len(filas) == limit else None,
+    }
+
+
+def _cliente(request) -> Optional[dict]:
+    cliente_id = int(request.path_params["cliente_id"])
+    columnas = [c for c in Cliente.__table__.columns if c.key != "nombre_norm"]
+    with engine.connect() as conn:
+        fila = conn.execute(select(*columnas).where(Cliente.id == cliente_id)).first()
+    if fila is None:
+        return None
+    return {**fila._asdict(), "estadisticas": asdict(estadisticas_cliente.__wrapped__(cliente_id))}
+
+
+def _entregas(request) -> dict:
+    params = request.query_params
+    limit = _limite(params)
+    filas = buscar_entregas(
+        limit=limit, antes=_cursor(params), desde=_fecha(params, "desde"), hasta=_fecha(params, "hasta"),
+        cliente=params.get("cliente"),
+    )
+    return _pagina(filas, limit, lambda f: f"{f.fecha},{f.id}")
+
+
+def _entrega(request) -> Optional[dict]:
+    # Los datos del remito: cliente, ítems y totales, también de entregas ya archivadas.
+    datos = next(leer_remitos([int(request.path_params["entrega_id"])]), None)
+    return _fila(datos) if datos is not None else None
+
+
+def _movimientos(request) -> dict:
+    params = request.query_params
+    limit = _limite(params)
+    filas = buscar_movimientos(
+        limit=limit, antes=_cursor(params), desde=_fecha(params, "desde"), hasta=_fecha(params, "hasta"),
+        tipo=params.get("tipo"), categoria=params.get("categoria"), medio=params.get("medio"),
+    )
+    return _pagina(filas, limit, lambda f: f"{f.fecha},{f.id}")
+
+
+def _resumen(request) -> list[dict]:
+    params = request.query_params
+    return [_fila(r) for r in resumen_movimientos(params.get("desde_mes"), params.get("hasta_mes"))]
+
+
+def _piezas(request) -> list[dict]:
+    """
+    Catálogo con costo y precio para la config actual. No usa listar_piezas: ésa guarda los
+    precios recalculados, y la API no escribe. Los que están cacheados con otra config se
+    calculan acá, vectorizados.
+    """
+    import pandas as pd
+
+    config = cargar_config()
+    huella = huella_config(config)
+    with engine.connect() as conn:
+        df = pd.DataFrame(conn.execute(
+            select(Pieza.id, Pieza.nombre, Pieza.minutos, Pieza.gramos, Pieza.costo, Pieza.precio, Pieza.config_huella)
+            .order_by(Pieza.nombre)
+        ).all(), columns=["id", "nombre", "minutos", "gramos", "costo", "precio", "config_huella"])
+    viejas = (df["config_huella"] != huella).to_numpy()
+    if viejas.any():
+        res = calcular_costos(df.loc[viejas, ["minutos", "gramos"]], config)
+        df.loc[viejas, "costo"] = res["costo_total"].to_numpy()
+        df.loc[viejas, "precio"] = res["precio_total"].to_numpy()
+    return df.drop(columns="config_huella").to_dict("records")
+
+
+def _cotizacion(request) -> dict:
+    params = request.query_params
+    horas, minutos, gramos = (float(params.get(p, 0)) for p in ("horas", "minutos", "gramos"))
+    if min(horas, minutos, gramos) < 0:
+        raise ValueError("horas, minutos y gramos no pueden ser negativos")
+    return {"horas": horas, "minutos": minutos, "gramos": gramos,
+            **calcular_costo(horas, minutos, gramos, cargar_config())}
+
+
+# ruta -> (consulta, tablas de las que depende, ¿depende de la config?)
+ENDPOINTS: dict[str, tuple[Callable, tuple[str, ...], bool]] = {
+    "/clientes": (_clientes, ("clientes",), False),
+    "/clientes/{cliente_id:int}": (_cliente, ("clientes", "entregas", "entrega_items"), False),
+    "/entregas": (_entregas, ("entregas", "entrega_items", "clientes"), False),
+    "/entregas/{entrega_id:int}": (_entrega, ("entregas", "entrega_items", "clientes"), False),
+    "/movimientos": (_movimientos, ("movimientos",), False),
+    "/resumen": (_resumen, ("movimientos",), False),
+    "/piezas": (_piezas, ("piezas",), True),
+    "/cotizacion": (_cotizacion, (), True),
+}
+
+
+# ---------------- Servicio ----------------
+def _json(datos, status: int = 200, headers: Optional[dict] = None) -> Response:
+    cuerpo = json.dumps(datos, default=str, ensure_ascii=False).encode("utf-8")
+    return Response(cuerpo, status, headers, media_type="application/json")
+
+
+def etag(ruta: str, params, versiones: dict[str, int], tablas: tuple[str, ...], config: Optional[dict]) -> str:
+    clave = (
+        ruta,
+        tuple(sorted(params.multi_items())),
+        tuple(versiones.get(t, 0) for t in tablas),
+        huella_config(config) if config is not None else None,
+    )
+    return '"' + hashlib.sha1(repr(clave).encode("utf-8")).hexdigest() + '"'
+
+
+def crear_app(monitor: Optional[MonitorVersiones] = None) -> "Starlette":
+    if Starlette is None:
+        raise RuntimeError("Para la API hace falta instalar starlette y uvicorn (ver requirements-extra.txt).")
+    monitor = monitor or MonitorVersiones()
+    # Tantas consultas en paralelo como conexiones tiene el pool: el resto espera acá, no en el pool.
+    hilos = anyio.CapacityLimiter(POOL_SIZE + POOL_MAX_OVERFLOW)
+    # Si vencen mientras llegan muchos pedidos juntos, los relee uno solo y el resto espera.
+    releyendo = anyio.Lock()
+
+    async def versiones() -> dict[str, int]:
+        versiones = monitor.al_dia()
+        if versiones is not None:
+            return versiones
+        async with releyendo:
+            return monitor.al_dia() or await anyio.to_thread.run_sync(monitor.leer, limiter=hilos)
+
+    def endpoint(consulta: Callable, tablas: tuple[str, ...], usa_config: bool):
+        async def atender(request):
+            config = cargar_config() if usa_config else None
+            tag = etag(request.url.path, request.query_params, await versiones(), tablas, config)
+            headers = {"ETag": tag, "Cache-Control": "no-cache"}
+            if tag in request.headers.get("if-none-match", ""):
+                return Response(status_code=304, headers=headers)
+            encontrado, cuerpo = _cache_respuestas.get(tag)
+            if encontrado:
+                return Response(cuerpo, headers=headers, media_type="application/json")
+            try:
+                datos = await anyio.to_thread.run_sync(consulta, request, limiter=hilos)
+            except ValueError as e:
+                return _json({"error": str(e)}, 400)
+            if datos is None:
+                return _json({"error": "no encontrado"}, 404)
+            respuesta = _json(datos, headers=headers)
+            _cache_respuestas.set(tag, respuesta.body)
+            return respuesta
+        return atender
+
+    async def indice(request):
+        return _json({
+            "endpoints": list(ENDPOINTS),
+            "versiones": await versiones(),
+            "cache": _cache_respuestas.stats(),
+            "lecturas_versiones": monitor.lecturas,
+        })
+
+    rutas = [Route("/", indice)] + [Route(ruta, endpoint(*definicion)) for ruta, definicion in ENDPOINTS.items()]
+    return Starlette(routes=rutas)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.api")
+    parser.add_argument("--host", default="127.0.0.1", help="sin autenticación: por defecto, sólo localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    init_db()
+    app = crear_app()
+    print(f"API de sólo lectura en http://{args.host}:{args.port}/ (base {DB_PATH})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# utils/archivo.py
+"""
+Archivo histórico: pasa las entregas (con sus ítems) y los movimientos anteriores a una
+fecha de corte a otra base SQLite (db_app.ARCHIVO_PATH, al lado de app.db) y compacta la
+base caliente con VACUUM. Así el tamaño de app.db, sus backups y las consultas del día a día
+no crecen con los años de historia.
+
+- Lo histórico sigue viéndose entero: exportar, remitos y la verificación de los resúmenes
+  leen las vistas historico_* de db_app.conexion_historica (caliente UNION ALL archivo).
+- Los resúmenes (movimientos_resumen, clientes_stats, clientes_piezas) no cambian: los
+  triggers de borrado los descuentan, así que se guardan antes y se restauran en la misma
+  transacción.
+- Con app.db en WAL, una transacción sobre dos bases no es atómica entre ellas: primero se
+  copia al archivo y después se borra de la base caliente. Si algo se corta en el medio, volver
+  a archivar con el mismo corte lo completa: las filas que ya estaban copiadas, iguales, se
+  saltean. Un id que está en los dos lados con otro contenido frena el archivado (ArchivoError).
+- Las tablas archivables usan AUTOINCREMENT (migración 9 de db_app): un id archivado no se
+  vuelve a asignar aunque se borre la fila más nueva. Al archivar, el contador se lleva además
+  hasta el id más alto del archivo.
+
+Por línea de comandos (ver utils/mantenimiento.py):
+
+    python -m utils.mantenimiento archivar --meses 24
+    python -m utils.mantenimiento archivar --antes-de 2023-01-01 --sin-vacuum
+    python -m utils.mantenimiento estado-archivo
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from utils.db_app import ARCHIVO_PATH, DB_PATH, SQL_FECHA_ARCHIVO, TABLAS_ARCHIVABLES, Base, engine
+
+# Índices del archivo: los mismos de los listados por fecha y el de ítems por entrega.
+INDICES_ARCHIVO = {
+    "entregas": [("ix_archivo_entregas_fecha_id", "fecha, id"), ("ix_archivo_entregas_cliente", "cliente_id, fecha, id")],
+    "entrega_items": [("ix_archivo_items_entrega", "entrega_id")],
+    "movimientos": [("ix_archivo_movimientos_fecha_id", "fecha, id"), ("ix_archivo_movimientos_hash", "hash_importacion")],
+}
+# Resúmenes que cubren toda la historia: los borrados de archivar no los tienen que tocar.
+RESUMENES = ("movimientos_resumen", "clientes_stats", "clientes_piezas")
+
+
+class ArchivoError(RuntimeError):
+    """Ids que están en la base caliente y en el archivo con distinto contenido."""
+
+
+@dataclass(frozen=True)
+class ResultadoArchivo:
+    corte: date
+    entregas: int
+    items: int
+    movimientos: int
+    bytes_antes: int
+    bytes_despues: int
+    segundos: float
+
+
+def corte_por_meses(meses: int, hoy: Optional[date] = None) -> date:
+    """Primer día del mes de hace `meses` meses: se archiva lo anterior, por meses completos."""
+    hoy = hoy or date.today()
+    total = hoy.year * 12 + hoy.month - 1 - meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def tamano_base() -> int:
+    """Bytes de app.db más su WAL."""
+    wal = DB_PATH.with_name(DB_PATH.name + "-wal")
+    return sum(p.stat().st_size for p in (DB_PATH, wal) if p.exists())
+
+
+def _columnas(tabla: str) -> list[str]:
+    return [c.name for c in Base.metadata.tables[tabla].columns]
+
+
+def _preparar_archivo(crudo) -> None:
+    """Tablas e índices del archivo (sin claves foráneas: los clientes quedan en la base caliente)."""
+    for nombre in TABLAS_ARCHIVABLES:
+        tabla = Base.metadata.tables[nombre]
+        columnas = ", ".join(
+            f"{c.name} {c.type.compile(engine.dialect)}{' PRIMARY KEY' if c.primary_key else ''}" for c in tabla.columns
+        )
+        crudo.execute(f"CREATE TABLE IF NOT EXISTS archivo.{nombre} ({columnas})")
+        # Columnas que se agregaron a la base caliente después de crear el archivo.
+        existentes = {fila[1] for fila in crudo.execute(f"PRAGMA archivo.table_info({nombre})")}
+        for c in tabla.columns:
+            if c.name not in existentes:
+                crudo.execute(f"ALTER TABLE archivo.{nombre} ADD COLUMN {c.name} {c.type.compile(engine.dialect)}")
+        for indice, cols in INDICES_ARCHIVO[nombre]:
+            crudo.execute(f"CREATE INDEX IF NOT EXISTS archivo.{indice} ON {nombre} ({cols})")
+
+
+def _elegir(crudo, corte: date) -> None:
+    """Ids a archivar en tablas temporales de la conexión (las usan la copia y el borrado)."""
+    crudo.execute("DROP TABLE IF EXISTS temp.archivar_entregas")
+    crudo.execute("DROP TABLE IF EXISTS temp.archivar_movimientos")
+    crudo.execute("CREATE TEMP TABLE archivar_entregas AS SELECT id FROM main.entregas WHERE fecha < ?", (corte.isoformat(),))
+    crudo.execute("CREATE TEMP TABLE archivar_movimientos AS SELECT id FROM main.movimientos WHERE fecha < ?", (corte.isoformat(),))
+
+
+# Qué se copia de cada tabla: las filas elegidas por _elegir.
+FILTROS_COPIA = (
+    ("entregas", "m.id IN (SELECT id FROM temp.archivar_entregas)"),
+    ("entrega_items", "m.entrega_id IN (SELECT id FROM temp.archivar_entregas)"),
+    ("movimientos", "m.id IN (SELECT id FROM temp.archivar_movimientos)"),
+)
+
+
+def _sql_choques(nombre: str, filtro: str = "1") -> str:
+    """Ids de `nombre` que están en las dos bases con distinto contenido."""
+    distintas = " OR ".join(f"a.{c} IS NOT m.{c}" for c in _columnas(nombre))
+    return (
+        f"SELECT m.id FROM main.{nombre} m JOIN archivo.{nombre} a ON a.id = m.id "
+        f"WHERE {filtro} AND ({distintas})"
+    )
+
+
+def _contar(crudo, sql: str) -> int:
+    return crudo.execute(sql).fetchone()[0]
+
+
+def archivar(corte: date, vacuum: bool = True) -> ResultadoArchivo:
+    """Pasa al archivo las entregas y movimientos con fecha anterior a `corte`; después, VACUUM."""
+    t0 = time.perf_counter()
+    bytes_antes = tamano_base()
+    # Core sobre la conexión cruda: ATTACH, VACUUM y las transacciones de las dos fases se
+    # manejan a mano (isolation_level=None, ver db_app._aplicar_pragmas).
+    with engine.connect() as conn:
+        crudo = conn.connection.dbapi_connection
+        crudo.execute("ATTACH DATABASE ? AS archivo", (str(ARCHIVO_PATH),))
+        try:
+            _preparar_archivo(crudo)
+
+            # 1) Copia. Lo que quedó copiado por un archivado cortado (igual) se saltea; un id
+            #    repetido con otro contenido no se pisa: se frena antes de escribir nada.
+            crudo.execute("BEGIN IMMEDIATE")
+            try:
+                _elegir(crudo, corte)
+                for nombre, filtro in FILTROS_COPIA:
+                    choques = [f[0] for f in crudo.execute(_sql_choques(nombre, filtro) + " LIMIT 10")]
+                    if choques:
+                        raise ArchivoError(
+                            f"{nombre}: ids que ya están en el archivo con otro contenido: {choques}. "
+                            "No se archivó nada."
+                        )
+                for nombre, filtro in FILTROS_COPIA:
+                    columnas = ", ".join(_columnas(nombre))
+                    crudo.execute(
+                        f"INSERT INTO archivo.{nombre} ({columnas}) SELECT {', '.join(f'm.{c}' for c in _columnas(nombre))} "
+                        f"FROM main.{nombre} m WHERE {filtro} "
+                        f"AND NOT EXISTS (SELECT 1 FROM archivo.{nombre} a WHERE a.id = m.id)"
+                    )
+                crudo.execute("COMMIT")
+            except BaseException:
+                crudo.execute("ROLLBACK")
+                raise
+
+            # 2) Borrado de la base caliente, con los resúmenes tal como estaban.
+            crudo.execute("BEGIN IMMEDIATE")
+            try:
+                for resumen in RESUMENES:
+                    crudo.execute(f"DROP TABLE IF EXISTS temp.copia_{resumen}")
+                    crudo.execute(f"CREATE TEMP TABLE copia_{resumen} AS SELECT * FROM main.{resumen}")
+                items = crudo.execute(
+                    "DELETE FROM main.entrega_items WHERE entrega_id IN (SELECT id FROM temp.archivar_entregas)"
+                ).rowcount
+                entregas = crudo.execute(
+                    "DELETE FROM main.entregas WHERE id IN (SELECT id FROM temp.archivar_entregas)"
+                ).rowcount
+                movimientos = crudo.execute(
+                    "DELETE FROM main.movimientos WHERE id IN (SELECT id FROM temp.archivar_movimientos)"
+                ).rowcount
+                for resumen in RESUMENES:
+                    crudo.execute(f"DELETE FROM main.{resumen}")
+                    crudo.execute(f"INSERT INTO main.{resumen} SELECT * FROM temp.copia_{resumen}")
+                # Los triggers no ven el archivo: cuando a un cliente no le quede ninguna entrega
+                # en app.db, su última fecha sale de acá.
+                crudo.execute(SQL_FECHA_ARCHIVO)
+                # Ningún alta nuevo puede tomar un id archivado.
+                for nombre in TABLAS_ARCHIVABLES:
+                    crudo.execute(
+                        "UPDATE main.sqlite_sequence SET seq = MAX(seq, "
+                        f"(SELECT COALESCE(MAX(id), 0) FROM archivo.{nombre})) WHERE name = ?",
+                        (nombre,),
+                    )
+                crudo.execute("COMMIT")
+            except BaseException:
+                crudo.execute("ROLLBACK")
+                raise
+        finally:
+            for temporal in ("archivar_entregas", "archivar_movimientos", *(f"copia_{r}" for r in RESUMENES)):
+                crudo.execute(f"DROP TABLE IF EXISTS temp.{temporal}")
+            crudo.execute("DETACH DATABASE archivo")
+
+        if vacuum and (entregas or movimientos):
+            crudo.execute("VACUUM")
+            crudo.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return ResultadoArchivo(
+        corte=corte,
+        entregas=entregas,
+        items=items,
+        movimientos=movimientos,
+        bytes_antes=bytes_antes,
+        bytes_despues=tamano_base(),
+        segundos=time.perf_counter() - t0,
+    )
+
+
+def estado_archivo() -> dict:
+    """
+    Filas por tabla en la base caliente y en el archivo, fechas del archivo, tamaños en bytes e
+    ids repetidos con otro contenido en las dos bases (altas de antes de la migración 9 que
+    reusaron un id archivado: la vista historico_* muestra sólo la fila caliente).
+    """
+    with engine.connect() as conn:
+        crudo = conn.connection.dbapi_connection
+        estado = {
+            "caliente": {t: _contar(crudo, f"SELECT COUNT(*) FROM main.{t}") for t in TABLAS_ARCHIVABLES},
+            "archivo": {t: 0 for t in TABLAS_ARCHIVABLES},
+            "ids_repetidos": {t: 0 for t in TABLAS_ARCHIVABLES},
+            "archivo_hasta": None,
+            "bytes_caliente": tamano_base(),
+            "bytes_archivo": ARCHIVO_PATH.stat().st_size if ARCHIVO_PATH.exists() else 0,
+        }
+        if not ARCHIVO_PATH.exists():
+            return estado
+        crudo.execute("ATTACH DATABASE ? AS archivo", (str(ARCHIVO_PATH),))
+        try:
+            tablas = {f[0] for f in crudo.execute("SELECT name FROM archivo.sqlite_master WHERE type = 'table'")}
+            for t in TABLAS_ARCHIVABLES:
+                if t in tablas:
+                    estado["archivo"][t] = _contar(crudo, f"SELECT COUNT(*) FROM archivo.{t}")
+                    estado["ids_repetidos"][t] = _contar(crudo, f"SELECT COUNT(*) FROM ({_sql_choques(t)})")
+            if {"entregas", "movimientos"} <= tablas:
+                estado["archivo_hasta"] = crudo.execute(
+                    "SELECT MAX(f) FROM (SELECT MAX(fecha) AS f FROM archivo.entregas "
+                    "UNION ALL SELECT MAX(fecha) FROM archivo.movimientos)"
+                ).fetchone()[0]
+        finally:
+            crudo.execute("DETACH DATABASE archivo")
+    return estado
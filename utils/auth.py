@@ -1,4 +1,5 @@
 import streamlit as st
+import json
 import os
 from dotenv import load_dotenv
 
@@ -7,6 +8,33 @@ load_dotenv()
 USER = os.getenv("APP_USER")
 PASSWORD = os.getenv("APP_PASSWORD")
 
+# Token de sesión (utils/session.py) en una cookie del navegador, no en la URL: no queda en el
+# historial ni viaja en un link copiado. Es una cookie de sesión (se borra al cerrar el
+# navegador) con SameSite=Strict, y Secure cuando la app se sirve por HTTPS. Streamlit no
+# puede mandar Set-Cookie: la escribe un script de la página, así que no puede ser HttpOnly.
+COOKIE_SESION = "sesion_3diego"
+
+
+def token_de_cookie():
+    """Token que mandó el navegador al abrir la página (None si no hay)."""
+    return st.context.cookies.get(COOKIE_SESION)
+
+
+def _script_cookie(valor: str, extra: str = "") -> None:
+    st.html(
+        "<script>document.cookie = " + json.dumps(f"{COOKIE_SESION}={valor}; path=/; SameSite=Strict{extra}")
+        + " + (location.protocol === 'https:' ? '; Secure' : '');</script>",
+        unsafe_allow_javascript=True,
+    )
+
+
+def escribir_cookie(token: str) -> None:
+    _script_cookie(token)
+
+
+def borrar_cookie() -> None:
+    _script_cookie("", "; max-age=0")
+
 def login():
     st.markdown("<br><br><br>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
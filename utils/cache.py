@@ -0,0 +1,70 @@
+# utils/cache.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable
+
+
+class CacheTTL:
+    """
+    Cache en memoria del proceso (compartida entre sesiones de Streamlit).
+    - LRU con tamaño máximo y vencimiento por TTL.
+    - Thread-safe: Streamlit atiende cada sesión en su propio hilo.
+    - Lleva contadores de aciertos/fallos para poder verificar que funciona.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, clave: Hashable) -> tuple[bool, Any]:
+        """Devuelve (encontrado, valor)."""
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._datos[clave]
+                self.misses += 1
+                return False, None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return True, item[1]
+
+    def set(self, clave: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def invalidar(self) -> None:
+        """Vacía la cache (se llama después de cada escritura relacionada)."""
+        with self._lock:
+            self._datos.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entradas": len(self._datos)}
+
+
+def cacheado(cache: CacheTTL, clave: Callable[..., Hashable]):
+    """Decorador: memoiza la función en `cache` usando `clave(*args, **kwargs)`."""
+    def decorador(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = (fn.__name__, clave(*args, **kwargs))
+            encontrado, valor = cache.get(k)
+            if encontrado:
+                return valor
+            valor = fn(*args, **kwargs)
+            cache.set(k, valor)
+            return valor
+        return wrapper
+    return decorador
@@ -0,0 +1,87 @@
+# utils/calculo_costos.py
+from __future__ import annotations
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# Columnas de salida, en el orden en que se muestran.
+COMPONENTES = [
+    "costo_filamento",
+    "costo_electricidad",
+    "costo_desgaste",
+    "margen_error",
+    "costo_total",
+    "precio_total",
+    "ganancia_total",
+]
+
+# Valores de la config que entran en la fórmula: si cambia alguno, cambian los precios.
+CLAVES_CONFIG = (
+    "precio_kg", "precio_kwh", "consumo_watts", "vida_util_horas",
+    "precio_repuestos", "margen_error_pct", "margen_ganancia",
+)
+
+
+def huella_config(config: dict) -> str:
+    """Hash de los valores de `config` que usa la fórmula (clave de los precios cacheados)."""
+    valores = {k: float(config.get(k, 2 if k == "margen_ganancia" else 0)) for k in CLAVES_CONFIG}
+    return hashlib.sha1(json.dumps(valores, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def calcular_costo(horas: float, minutos: float, gramos: float, config: dict) -> dict:
+    """Costos de una sola impresión (misma fórmula que `calcular_costos`)."""
+    tiempo_horas = horas + (minutos / 60)
+    costo_filamento = (gramos * config["precio_kg"]) / 1000
+    costo_electricidad = ((config["precio_kwh"] * config["consumo_watts"]) / 1000) * tiempo_horas
+    costo_desgaste = (config["precio_repuestos"] / config["vida_util_horas"]) * tiempo_horas
+    margen_error = (costo_filamento + costo_electricidad + costo_desgaste) * (config["margen_error_pct"] / 100)
+    costo_total = costo_filamento + costo_electricidad + costo_desgaste + margen_error
+    precio_total = costo_total * config.get("margen_ganancia", 2)
+    return {
+        "costo_filamento": costo_filamento,
+        "costo_electricidad": costo_electricidad,
+        "costo_desgaste": costo_desgaste,
+        "margen_error": margen_error,
+        "costo_total": costo_total,
+        "precio_total": precio_total,
+        "ganancia_total": precio_total - costo_total,
+    }
+
+
+def calcular_costos(df: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """
+    Versión vectorizada: `df` trae una fila por trabajo con columnas `horas`, `minutos`
+    y `gramos` (las que falten se toman como 0). Devuelve una copia con una columna
+    por componente de costo, calculada sobre arrays de NumPy sin loops de Python.
+    """
+    n = len(df)
+
+    def col(nombre: str) -> np.ndarray:
+        if nombre not in df:
+            return np.zeros(n)
+        return pd.to_numeric(df[nombre], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+
+    tiempo_horas = col("horas") + col("minutos") / 60
+    gramos = col("gramos")
+
+    # Los factores de config son escalares: se calculan una vez y se multiplican por columna.
+    costo_filamento = gramos * (config["precio_kg"] / 1000)
+    costo_electricidad = tiempo_horas * ((config["precio_kwh"] * config["consumo_watts"]) / 1000)
+    costo_desgaste = tiempo_horas * (config["precio_repuestos"] / config["vida_util_horas"])
+    base = costo_filamento + costo_electricidad + costo_desgaste
+    margen_error = base * (config["margen_error_pct"] / 100)
+    costo_total = base + margen_error
+    precio_total = costo_total * config.get("margen_ganancia", 2)
+
+    out = df.copy()
+    out["costo_filamento"] = costo_filamento
+    out["costo_electricidad"] = costo_electricidad
+    out["costo_desgaste"] = costo_desgaste
+    out["margen_error"] = margen_error
+    out["costo_total"] = costo_total
+    out["precio_total"] = precio_total
+    out["ganancia_total"] = precio_total - costo_total
+    return out
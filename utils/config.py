@@ -1,21 +1,119 @@
+import copy
+import hashlib
 import json
 import os
+import threading
 
 CONFIG_PATH = "config.json"
 
+CONFIG_DEFAULT = {
+    "precio_kg": 15900.0,
+    "precio_kwh": 83.94,
+    "consumo_watts": 150.0,
+    "vida_util_horas": 4320.0,
+    "precio_repuestos": 75000.0,
+    "margen_error_pct": 20.0,
+    # Para pasar de mm de filamento a gramos al analizar un G-code (utils/gcode.py).
+    "diametro_filamento": 1.75,
+    "densidad_filamento": 1.24,
+}
+
+
+def _hash(config: dict) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ConfigStore:
+    """
+    Config compartida por todo el proceso (todas las sesiones de Streamlit).
+    - Sólo escribe a disco si los valores cambiaron respecto de lo último persistido.
+    - Escribe de forma atómica: archivo temporal + os.replace (como utils/session.py).
+    - Si otro proceso modificó el archivo (cambia el mtime), lo vuelve a leer.
+    - Las pantallas la releen en cada rerun y guardan sólo las claves editadas (`actualizar`).
+    """
+
+    def __init__(self, path: str = CONFIG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._config: dict = {}
+        self._hash: str = ""
+        self._mtime: float | None = None
+        self.lecturas = 0
+        self.escrituras = 0
+
+    def _mtime_actual(self) -> float | None:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _recargar_si_cambio(self) -> None:
+        mtime = self._mtime_actual()
+        if self._hash and mtime == self._mtime:
+            return
+        if mtime is None:
+            self._config = dict(CONFIG_DEFAULT)
+        else:
+            with open(self.path, "r") as f:
+                self._config = json.load(f)
+            self.lecturas += 1
+        self._hash = _hash(self._config)
+        self._mtime = mtime
+
+    def cargar(self) -> dict:
+        """Devuelve una copia de la config actual (cada sesión edita la suya)."""
+        with self._lock:
+            self._recargar_si_cambio()
+            return copy.deepcopy(self._config)
+
+    def guardar(self, config: dict) -> bool:
+        """Persiste `config` si cambió. Devuelve True si escribió a disco."""
+        with self._lock:
+            self._recargar_si_cambio()
+            return self._escribir(config)
+
+    def _escribir(self, config: dict) -> bool:
+        """Con el lock tomado: escribe `config` si difiere de lo persistido."""
+        nuevo_hash = _hash(config)
+        if nuevo_hash == self._hash:
+            return False
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(config, f, indent=4)
+        os.replace(tmp, self.path)  # operación atómica en el mismo FS
+        self._config = copy.deepcopy(config)
+        self._hash = nuevo_hash
+        self._mtime = self._mtime_actual()
+        self.escrituras += 1
+        return True
+
+    def actualizar(self, cambios: dict) -> bool:
+        """
+        Aplica sólo `cambios` sobre la config actual (releída si otro proceso la cambió) y la
+        persiste si algo cambió. Dos sesiones que editan claves distintas no se pisan.
+        """
+        with self._lock:
+            self._recargar_si_cambio()
+            return self._escribir(dict(self._config, **cambios))
+
+    def stats(self) -> dict:
+        return {"lecturas": self.lecturas, "escrituras": self.escrituras}
+
+
+_store = ConfigStore()
+
+
+def config_stats() -> dict:
+    return _store.stats()
+
+
 def cargar_config():
-    if not os.path.exists(CONFIG_PATH):
-        return {
-            "precio_kg": 15900.0,
-            "precio_kwh": 83.94,
-            "consumo_watts": 150.0,
-            "vida_util_horas": 4320.0,
-            "precio_repuestos": 75000.0,
-            "margen_error_pct": 20.0
-        }
-    with open(CONFIG_PATH, "r") as f:
-        return json.load(f)
+    return _store.cargar()
+
 
 def guardar_config(config):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=4)
+    return _store.guardar(config)
+
+
+def actualizar_config(cambios: dict) -> bool:
+    return _store.actualizar(cambios)
@@ -1,30 +1,109 @@
 # utils/db.py
 from __future__ import annotations
+import os
+import sqlite3
+import threading
+import unicodedata
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from typing import Optional, List
 
 from sqlalchemy import (
-    create_engine, Integer, String, Float, Date, DateTime, ForeignKey, Text,
-    func
+    create_engine, event, Boolean, Index, Integer, String, Float, Date, DateTime, ForeignKey, Text,
+    func, and_, or_, bindparam, column, insert, inspect, select, table, text, update
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, sessionmaker, validates
+
+from utils.cache import CacheTTL, cacheado
+from utils.planificador import Plan, Trabajo, planificar
+from utils.tiempos import DEBUG_TIEMPOS, SQL_LENTA_MS, instrumentar
 
 # DB en carpeta de usuario (evita permisos en /opt)
 DATA_DIR = Path.home() / ".local" / "share" / "3d.iego"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
-DB_PATH = DATA_DIR / "app.db"
+# Podés apuntar a otra base (benchmarks, pruebas) con la variable de entorno DB_PATH.
+DB_PATH = Path(os.getenv("DB_PATH", str(DATA_DIR / "app.db")))
+
+# --------- PERFIL DEL MOTOR SQLITE ---------
+# Streamlit atiende cada sesión del navegador en su propio hilo: con WAL los lectores no
+# bloquean al escritor y busy_timeout hace que los escritores esperen en vez de fallar
+# con "database is locked". Todo se puede sobrescribir con variables de entorno.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "10000")),
+    "cache_size": -int(os.getenv("DB_CACHE_SIZE_KB", "20000")),  # negativo = KiB
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE_MB", "128")) * 1024 * 1024,
+    "temp_store": os.getenv("DB_TEMP_STORE", "MEMORY"),
+    "foreign_keys": "ON",
+}
+
+# Un pool chico de conexiones reutilizables, compartido por todos los hilos de sesión.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+
+engine = create_engine(
+    f"sqlite:///{DB_PATH}",
+    echo=False,
+    future=True,
+    poolclass=QueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_timeout=30,
+    connect_args={
+        "check_same_thread": False,  # la conexión vuelve al pool y la toma otro hilo
+        "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+    },
+)
+
+@event.listens_for(engine, "connect")
+def _aplicar_pragmas(dbapi_conn, _record) -> None:
+    # Manejamos BEGIN nosotros (ver _begin): pysqlite por su cuenta lo emite tarde y mal.
+    dbapi_conn.isolation_level = None
+    cur = dbapi_conn.cursor()
+    for pragma, valor in SQLITE_PRAGMAS.items():
+        cur.execute(f"PRAGMA {pragma}={valor}")
+    cur.close()
+
+@event.listens_for(engine, "begin")
+def _begin(conn) -> None:
+    # Las escrituras toman el lock de escritura al empezar (BEGIN IMMEDIATE): así esperan
+    # con busy_timeout en lugar de fallar al querer "subir" una transacción de lectura.
+    if conn.get_execution_options().get("escritura"):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+# Conteo/tiempo de consultas por rerun (panel de DEBUG_TIEMPOS) y log de consultas lentas
+# (SQL_LENTA_MS). Con las dos apagadas no se engancha nada al engine.
+SQL_LENTA_LOG = Path(os.getenv("SQL_LENTA_LOG", str(DATA_DIR / "sql_lentas.log")))
+if DEBUG_TIEMPOS or SQL_LENTA_MS is not None:
+    instrumentar(engine, SQL_LENTA_MS, SQL_LENTA_LOG)
 
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+SessionEscritura = sessionmaker(
+    bind=engine.execution_options(escritura=True), autoflush=False, autocommit=False, expire_on_commit=False
+)
 
 class Base(DeclarativeBase): ...
 
+def normalizar_nombre(nombre: str) -> str:
+    """Minúsculas, sin tildes y con espacios colapsados: "  José  Pérez" -> "jose perez"."""
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", nombre or "") if not unicodedata.combining(c)
+    )
+    return " ".join(sin_tildes.lower().split())
+
 # --------- MODELOS ---------
 class Cliente(Base):
     __tablename__ = "clientes"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     nombre: Mapped[str] = mapped_column(String(200), index=True, unique=True)
+    # Copia normalizada de `nombre` para búsquedas exactas por índice y para el índice FTS5.
+    nombre_norm: Mapped[Optional[str]] = mapped_column(String(200), index=True, unique=True)
     telefono: Mapped[Optional[str]] = mapped_column(String(100))
     email: Mapped[Optional[str]] = mapped_column(String(200))
     direccion: Mapped[Optional[str]] = mapped_column(String(300))
@@ -32,9 +111,21 @@ class Cliente(Base):
 
     entregas: Mapped[List["Entrega"]] = relationship(back_populates="cliente", cascade="all, delete-orphan")
 
+    @validates("nombre")
+    def _sync_nombre_norm(self, key, nombre):
+        self.nombre_norm = normalizar_nombre(nombre)
+        return nombre
+
 
 class Entrega(Base):
     __tablename__ = "entregas"
+    # Índices de los listados paginados por (fecha, id); ver migraciones 4 y 5.
+    # AUTOINCREMENT: un id archivado (utils/archivo.py) no se vuelve a usar; ver migración 9.
+    __table_args__ = (
+        Index("ix_entregas_fecha_id", "fecha", "id"),
+        Index("ix_entregas_cliente_fecha_id", "cliente_id", "fecha", "id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     fecha: Mapped[datetime] = mapped_column(Date, default=func.current_date())
     numero: Mapped[Optional[str]] = mapped_column(String(100))
@@ -51,18 +142,26 @@ class Entrega(Base):
 
 class EntregaItem(Base):
     __tablename__ = "entrega_items"
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     pieza: Mapped[str] = mapped_column(String(200))
     cantidad: Mapped[int] = mapped_column(Integer, default=1)
     precio_unitario: Mapped[float] = mapped_column(Float, default=0.0)
     subtotal: Mapped[float] = mapped_column(Float, default=0.0)
 
-    entrega_id: Mapped[int] = mapped_column(ForeignKey("entregas.id"))
+    entrega_id: Mapped[int] = mapped_column(ForeignKey("entregas.id"), index=True)
     entrega: Mapped["Entrega"] = relationship(back_populates="items")
 
 
 class Movimiento(Base):
     __tablename__ = "movimientos"
+    __table_args__ = (
+        Index("ix_movimientos_fecha_id", "fecha", "id"),
+        Index("ix_movimientos_tipo_fecha_id", "tipo", "fecha", "id"),
+        Index("ix_movimientos_categoria_fecha_id", "categoria", "fecha", "id"),
+        Index("ix_movimientos_hash_importacion", "hash_importacion", unique=True),
+        {"sqlite_autoincrement": True},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     fecha: Mapped[datetime] = mapped_column(Date, default=func.current_date())
     tipo: Mapped[str] = mapped_column(String(20))         # "Ingreso" o "Gasto"
@@ -70,21 +169,508 @@ class Movimiento(Base):
     monto: Mapped[float] = mapped_column(Float, default=0.0)
     descripcion: Mapped[Optional[str]] = mapped_column(String(300))
     medio: Mapped[Optional[str]] = mapped_column(String(100))  # efectivo/transferencia…
+    # Sólo en movimientos importados de extractos (utils/importar.py): evita duplicarlos al reimportar.
+    hash_importacion: Mapped[Optional[str]] = mapped_column(String(40))
+
+    creado_en: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+class MovimientoResumen(Base):
+    """
+    Totales por (mes, tipo, categoria, medio), mantenidos por triggers sobre `movimientos`.
+    La pantalla de Cuentas lee de acá: decenas de filas en vez de todo el historial.
+    """
+    __tablename__ = "movimientos_resumen"
+    mes: Mapped[str] = mapped_column(String(7), primary_key=True)          # "YYYY-MM"
+    tipo: Mapped[str] = mapped_column(String(20), primary_key=True)
+    categoria: Mapped[str] = mapped_column(String(100), primary_key=True)
+    medio: Mapped[str] = mapped_column(String(100), primary_key=True)      # "" si no tiene
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+    cantidad: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ClienteStats(Base):
+    """
+    Totales por cliente (entregas, total gastado, última entrega), mantenidos por triggers
+    sobre `entregas`: el panel del cliente y el ranking leen una fila en vez de agregar.
+    """
+    __tablename__ = "clientes_stats"
+    # Índices del ranking; con el rowid (cliente_id) de desempate, ORDER BY ... DESC los recorre al revés.
+    __table_args__ = (
+        Index("ix_clientes_stats_total", "total"),
+        Index("ix_clientes_stats_entregas", "entregas"),
+        Index("ix_clientes_stats_ultima_fecha", "ultima_fecha"),
+    )
+    cliente_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entregas: Mapped[int] = mapped_column(Integer, default=0)
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+    ultima_fecha: Mapped[Optional[date]] = mapped_column(Date)
+    # Última entrega archivada: los triggers no ven el archivo y la usan cuando en app.db
+    # no queda ninguna entrega del cliente (la carga utils/archivo.archivar).
+    ultima_fecha_archivo: Mapped[Optional[date]] = mapped_column(Date)
+
+
+class ClientePieza(Base):
+    """Unidades y $ por (cliente, pieza), mantenidos por triggers sobre `entrega_items`."""
+    __tablename__ = "clientes_piezas"
+    __table_args__ = (Index("ix_clientes_piezas_cliente_cantidad", "cliente_id", "cantidad"),)
+    cliente_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    pieza: Mapped[str] = mapped_column(String(200), primary_key=True)
+    cantidad: Mapped[int] = mapped_column(Integer, default=0)
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+    filas: Mapped[int] = mapped_column(Integer, default=0)   # ítems que suman acá; 0 = se borra
+
+
+class Pieza(Base):
+    """
+    Catálogo de piezas: tiempo y gramos de impresión, con el costo/precio cacheado para la
+    config con huella `config_huella` (ver actualizar_precios_piezas).
+    """
+    __tablename__ = "piezas"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    nombre: Mapped[str] = mapped_column(String(200), unique=True)
+    nombre_norm: Mapped[str] = mapped_column(String(200), index=True, unique=True)
+    minutos: Mapped[float] = mapped_column(Float, default=0.0)   # tiempo total de impresión
+    gramos: Mapped[float] = mapped_column(Float, default=0.0)
+    costo: Mapped[Optional[float]] = mapped_column(Float)
+    precio: Mapped[Optional[float]] = mapped_column(Float)
+    config_huella: Mapped[Optional[str]] = mapped_column(String(40), index=True)  # NULL = precio a recalcular
+    creado_en: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+    @validates("nombre")
+    def _sync_nombre_norm(self, key, nombre):
+        self.nombre_norm = normalizar_nombre(nombre)
+        return nombre
+
+
+class Impresora(Base):
+    __tablename__ = "impresoras"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    nombre: Mapped[str] = mapped_column(String(100), unique=True)
+    activa: Mapped[bool] = mapped_column(Boolean, default=True)   # apagada / en reparación = False
+    creado_en: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
 
+class Pedido(Base):
+    """
+    Trabajo de la cola de impresión. `impresora_id`, `inicio` y `fin` son el plan que deja
+    replanificar (o lo real, una vez que está imprimiendo).
+    """
+    __tablename__ = "pedidos"
+    __table_args__ = (Index("ix_pedidos_estado_impresora_inicio", "estado", "impresora_id", "inicio"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    cliente: Mapped[Optional[str]] = mapped_column(String(200))
+    pieza: Mapped[str] = mapped_column(String(200))
+    cantidad: Mapped[int] = mapped_column(Integer, default=1)
+    minutos: Mapped[float] = mapped_column(Float, default=0.0)   # tiempo total estimado (todas las unidades)
+    gramos: Mapped[float] = mapped_column(Float, default=0.0)
+    fecha_entrega: Mapped[Optional[date]] = mapped_column(Date)
+    estado: Mapped[str] = mapped_column(String(20), default="pendiente")   # ver ESTADOS_PEDIDO
+    impresora_id: Mapped[Optional[int]] = mapped_column(ForeignKey("impresoras.id"))
+    inicio: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    fin: Mapped[Optional[datetime]] = mapped_column(DateTime)
     creado_en: Mapped[datetime] = mapped_column(DateTime, default=func.now())
 
 
+class VersionTabla(Base):
+    """
+    Contador de cambios por tabla, sumado por triggers en cada alta, edición o borrado.
+    La API (utils/api.py) arma los ETag con esto: si no cambió, responde 304 sin consultar nada.
+    """
+    __tablename__ = "versiones_tablas"
+    tabla: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class Sesion(Base):
+    """Sesiones de login (backend SESSION_BACKEND=sqlite de utils/session.py)."""
+    __tablename__ = "sesiones"
+    token: Mapped[str] = mapped_column(String(64), primary_key=True)
+    username: Mapped[str] = mapped_column(String(200))
+    timestamp: Mapped[int] = mapped_column(Integer)
+
+
+_db_inicializada = False
+_init_lock = threading.Lock()
+
 def init_db() -> None:
-    Base.metadata.create_all(engine)
+    """Crea tablas y aplica migraciones. Corre una sola vez por proceso (Streamlit lo llama en cada rerun)."""
+    global _db_inicializada, _FTS_CLIENTES
+    if _db_inicializada:
+        return
+    with _init_lock:
+        if _db_inicializada:
+            return
+        Base.metadata.create_all(engine)
+        aplicar_migraciones()
+        with engine.connect() as conn:
+            _FTS_CLIENTES = _existe(conn, "table", "clientes_fts")
+        _db_inicializada = True
+
+# --------- MIGRACIONES ---------
+# `create_all` crea tablas nuevas pero nunca modifica las existentes (ni les agrega índices).
+# Cada paso lleva un número de versión; la tabla `schema_version` registra los aplicados y
+# `aplicar_migraciones` corre los pendientes, en orden, dentro de una sola transacción.
+# Los pasos son idempotentes porque en una base nueva corren sobre tablas ya completas.
+
+class MigracionError(RuntimeError):
+    """Un paso no puede aplicarse sin decisión humana (p. ej. datos que rompen un índice único)."""
+
+def _existe(conn, tipo: str, nombre: str) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = :tipo AND name = :nombre"),
+        {"tipo": tipo, "nombre": nombre},
+    ).first() is not None
+
+def _m001_nombre_norm(conn) -> None:
+    """Bases creadas antes de `nombre_norm`: agrega la columna, la completa y crea el índice único."""
+    columnas = {c["name"] for c in inspect(conn).get_columns("clientes")}
+    if "nombre_norm" not in columnas:
+        conn.execute(text("ALTER TABLE clientes ADD COLUMN nombre_norm VARCHAR(200)"))
+    pendientes = conn.execute(text("SELECT id, nombre FROM clientes WHERE nombre_norm IS NULL")).all()
+    if pendientes:
+        conn.execute(
+            text("UPDATE clientes SET nombre_norm = :norm WHERE id = :id"),
+            [{"id": cid, "norm": normalizar_nombre(nombre)} for cid, nombre in pendientes],
+        )
+    _indice_unico_nombre_norm(conn)
+
+def _indice_unico_nombre_norm(conn) -> None:
+    """
+    Crea (o rehace) `ix_clientes_nombre_norm` como índice único. Si hay clientes que sólo
+    difieren en tildes o mayúsculas ("José"/"jose") no se elige uno al azar: se corta con la
+    lista, para renombrarlos o unirlos a mano antes de migrar.
+    """
+    choques = conn.execute(text(
+        "SELECT nombre_norm, GROUP_CONCAT(id || ' \"' || nombre || '\"', ', ') FROM clientes "
+        "WHERE nombre_norm IS NOT NULL GROUP BY nombre_norm HAVING COUNT(*) > 1 ORDER BY nombre_norm"
+    )).all()
+    if choques:
+        detalle = "\n".join(f"  {norm}: {clientes}" for norm, clientes in choques)
+        raise MigracionError(
+            f"{len(choques)} nombres de cliente repetidos sin contar tildes ni mayúsculas "
+            f"(id \"nombre\"):\n{detalle}\n"
+            "Renombrá o uní esos clientes y volvé a correr `python -m utils.mantenimiento migrar`."
+        )
+    indices = {f[1]: f[2] for f in conn.execute(text("PRAGMA index_list(clientes)"))}
+    if indices.get("ix_clientes_nombre_norm") == 0:
+        # Bases migradas con una versión que dejaba el índice no único.
+        conn.execute(text("DROP INDEX ix_clientes_nombre_norm"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_clientes_nombre_norm ON clientes (nombre_norm)"))
+
+def _m002_fts_clientes(conn) -> None:
+    """
+    Índice de texto completo (trigramas) espejado desde `clientes` por triggers.
+    Si la versión de SQLite no trae FTS5 con trigram (< 3.34), se omite y se busca con LIKE.
+    """
+    if not _existe(conn, "table", "clientes_fts"):
+        try:
+            with conn.begin_nested():
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE clientes_fts USING fts5("
+                    "nombre_norm, content='clientes', content_rowid='id', tokenize='trigram')"
+                ))
+        except Exception:
+            return
+        conn.execute(text("INSERT INTO clientes_fts(clientes_fts) VALUES ('rebuild')"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN "
+        "INSERT INTO clientes_fts(rowid, nombre_norm) VALUES (new.id, new.nombre_norm); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN "
+        "INSERT INTO clientes_fts(clientes_fts, rowid, nombre_norm) VALUES ('delete', old.id, old.nombre_norm); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS clientes_fts_au AFTER UPDATE OF nombre_norm ON clientes BEGIN "
+        "INSERT INTO clientes_fts(clientes_fts, rowid, nombre_norm) VALUES ('delete', old.id, old.nombre_norm); "
+        "INSERT INTO clientes_fts(rowid, nombre_norm) VALUES (new.id, new.nombre_norm); END"
+    ))
+
+def _m003_resumen_movimientos(conn) -> None:
+    """Triggers que mantienen `movimientos_resumen`; completa el resumen de bases existentes."""
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS movimientos_resumen_ai AFTER INSERT ON movimientos BEGIN "
+        f"{_sql_sumar('new')} END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS movimientos_resumen_ad AFTER DELETE ON movimientos BEGIN "
+        f"{_sql_restar('old')} END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS movimientos_resumen_au AFTER UPDATE ON movimientos BEGIN "
+        f"{_sql_restar('old')} {_sql_sumar('new')} END"
+    ))
+    _reconstruir_resumen(conn)
+
+def _m004_indices_listados(conn) -> None:
+    """Listados paginados por (fecha, id) y piezas por entrega."""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_entregas_fecha_id ON entregas (fecha, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_entrega_items_entrega_id ON entrega_items (entrega_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_movimientos_fecha_id ON movimientos (fecha, id)"))
+
+def _m005_indices_filtros(conn) -> None:
+    """Filtros de los listados (cliente, tipo, categoría) con el mismo orden (fecha, id)."""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_entregas_cliente_fecha_id ON entregas (cliente_id, fecha, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_movimientos_tipo_fecha_id ON movimientos (tipo, fecha, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_movimientos_categoria_fecha_id ON movimientos (categoria, fecha, id)"))
+
+def _m006_hash_importacion(conn) -> None:
+    """Hash de contenido de los movimientos importados de extractos (NULL en los cargados a mano)."""
+    columnas = {c["name"] for c in inspect(conn).get_columns("movimientos")}
+    if "hash_importacion" not in columnas:
+        conn.execute(text("ALTER TABLE movimientos ADD COLUMN hash_importacion VARCHAR(40)"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_movimientos_hash_importacion ON movimientos (hash_importacion)"
+    ))
+
+def _m007_stats_clientes(conn) -> None:
+    """Triggers que mantienen `clientes_stats` y `clientes_piezas`; los completa en bases existentes."""
+    for sql in _SQL_TRIGGERS_STATS:
+        conn.execute(text(sql))
+    _reconstruir_stats_clientes(conn)
+
+def _m008_versiones_tablas(conn) -> None:
+    """Una fila por tabla versionada y sus triggers (la tabla la crea create_all)."""
+    for tabla in TABLAS_VERSIONADAS:
+        conn.execute(text("INSERT OR IGNORE INTO versiones_tablas (tabla, version) VALUES (:t, 0)"), {"t": tabla})
+    for sql in _SQL_TRIGGERS_VERSIONES:
+        conn.execute(text(sql))
+
+def _m009_ids_sin_reuso(conn) -> None:
+    """
+    Entregas, ítems y movimientos con AUTOINCREMENT. Sin él SQLite asigna max(id) + 1: si se
+    borra la fila más nueva, el alta siguiente puede repetir un id que ya está en el archivo y
+    la vista historico_* esconde la fila archivada. SQLite no agrega AUTOINCREMENT con ALTER:
+    se copian las filas, se recrean las tablas desde los modelos (con sus índices) y después
+    los triggers tal como estaban, así los resúmenes no cuentan la copia.
+    """
+    tablas = [t for t in ("entrega_items", "entregas", "movimientos")
+              if "AUTOINCREMENT" not in conn.execute(
+                  text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :t"), {"t": t}
+              ).scalar_one().upper()]
+    if tablas:
+        triggers = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN :tablas")
+            .bindparams(bindparam("tablas", expanding=True)),
+            {"tablas": tablas},
+        ).scalars().all()
+        for t in tablas:
+            conn.execute(text(f"CREATE TEMP TABLE copia_{t} AS SELECT * FROM {t}"))
+        # Hijas antes que padres: el borrado implícito de DROP TABLE no deja ítems huérfanos.
+        for t in tablas:
+            conn.execute(text(f"DROP TABLE {t}"))
+        Base.metadata.create_all(conn, tables=[Base.metadata.tables[t] for t in tablas])
+        for t in reversed(tablas):
+            columnas = ", ".join(c.name for c in Base.metadata.tables[t].columns)
+            conn.execute(text(f"INSERT INTO {t} ({columnas}) SELECT {columnas} FROM temp.copia_{t}"))
+            conn.execute(text(f"DROP TABLE temp.copia_{t}"))
+        for sql in triggers:
+            conn.execute(text(sql))
+    # Ids que ya están en el archivo: el próximo alta tiene que ser mayor.
+    if ARCHIVO_PATH.exists():
+        archivo = sqlite3.connect(f"file:{ARCHIVO_PATH}?mode=ro", uri=True)
+        try:
+            existentes = {f[0] for f in archivo.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for t in TABLAS_ARCHIVABLES:
+                if t in existentes:
+                    _subir_secuencia(conn, t, archivo.execute(f"SELECT MAX(id) FROM {t}").fetchone()[0])
+        finally:
+            archivo.close()
+
+def _subir_secuencia(conn, tabla: str, minimo: Optional[int]) -> None:
+    """Lleva el contador de AUTOINCREMENT de `tabla` a por lo menos `minimo`."""
+    if minimo is None:
+        return
+    actualizadas = conn.execute(
+        text("UPDATE sqlite_sequence SET seq = MAX(seq, :m) WHERE name = :t"), {"m": minimo, "t": tabla}
+    ).rowcount
+    if not actualizadas:
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:t, :m)"), {"m": minimo, "t": tabla})
+
+def _m010_indice_huella_piezas(conn) -> None:
+    """Para saber por índice si hay precios de catálogo a recalcular (ver actualizar_precios_piezas)."""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_piezas_config_huella ON piezas (config_huella)"))
+
+def _m011_nombre_norm_unico(conn) -> None:
+    """El paso 1 dejaba el índice no único si había nombres repetidos: se rehace único."""
+    _indice_unico_nombre_norm(conn)
+
+def _m012_ultima_fecha_archivo(conn) -> None:
+    """
+    `clientes_stats.ultima_fecha_archivo` y los triggers que la usan: borrar la última entrega
+    de un cliente que está en app.db dejaba `ultima_fecha` en NULL aunque tuviera archivadas.
+    Se completa desde el archivo y se corrigen las fechas que ya habían quedado mal.
+    """
+    columnas = {c["name"] for c in inspect(conn).get_columns("clientes_stats")}
+    if "ultima_fecha_archivo" not in columnas:
+        conn.execute(text("ALTER TABLE clientes_stats ADD COLUMN ultima_fecha_archivo DATE"))
+    for trigger in ("clientes_stats_ad", "clientes_stats_au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for sql in _SQL_TRIGGERS_STATS:
+        conn.execute(text(sql))
+    if ARCHIVO_PATH.exists():
+        archivo = sqlite3.connect(f"file:{ARCHIVO_PATH}?mode=ro", uri=True)
+        try:
+            if archivo.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entregas'").fetchone():
+                fechas = archivo.execute("SELECT cliente_id, MAX(fecha) FROM entregas GROUP BY cliente_id").fetchall()
+                if fechas:
+                    conn.execute(
+                        text("UPDATE clientes_stats SET ultima_fecha_archivo = :f WHERE cliente_id = :c"),
+                        [{"c": c, "f": f} for c, f in fechas],
+                    )
+        finally:
+            archivo.close()
+    conn.execute(text(
+        f"UPDATE clientes_stats SET ultima_fecha = {_sql_ultima_fecha('clientes_stats.cliente_id')} "
+        "WHERE ultima_fecha IS NULL"
+    ))
+
+MIGRACIONES = [
+    (1, "clientes.nombre_norm + índice único", _m001_nombre_norm),
+    (2, "clientes_fts (FTS5 trigram) + triggers", _m002_fts_clientes),
+    (3, "movimientos_resumen: triggers + carga inicial", _m003_resumen_movimientos),
+    (4, "índices de listados por (fecha, id)", _m004_indices_listados),
+    (5, "índices de filtros por cliente / tipo / categoría", _m005_indices_filtros),
+    (6, "movimientos.hash_importacion + índice único", _m006_hash_importacion),
+    (7, "clientes_stats / clientes_piezas: triggers + carga inicial", _m007_stats_clientes),
+    (8, "versiones_tablas: contadores de cambios + triggers", _m008_versiones_tablas),
+    (9, "entregas / entrega_items / movimientos con AUTOINCREMENT", _m009_ids_sin_reuso),
+    (10, "índice de piezas.config_huella", _m010_indice_huella_piezas),
+    (11, "índice único de clientes.nombre_norm (sin repetidos)", _m011_nombre_norm_unico),
+    (12, "clientes_stats.ultima_fecha_archivo + triggers", _m012_ultima_fecha_archivo),
+]
+
+def version_schema() -> int:
+    with engine.connect() as conn:
+        if not _existe(conn, "table", "schema_version"):
+            return 0
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar_one()
+
+def aplicar_migraciones() -> list[int]:
+    """Aplica las migraciones pendientes. Devuelve las versiones aplicadas."""
+    # BEGIN IMMEDIATE: si dos procesos arrancan a la vez, el segundo espera y no repite pasos.
+    with engine.execution_options(escritura=True).begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, descripcion TEXT, aplicada_en DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        actual = conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar_one()
+        aplicadas = []
+        for version, descripcion, paso in MIGRACIONES:
+            if version <= actual:
+                continue
+            paso(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, descripcion) VALUES (:v, :d)"),
+                {"v": version, "d": descripcion},
+            )
+            aplicadas.append(version)
+        return aplicadas
+
+# Si la versión de SQLite no trae FTS5 con trigram, search_clientes usa LIKE (se define en init_db).
+_FTS_CLIENTES = False
+
+# --------- VERSIONES DE TABLAS ---------
+# Tablas que expone la API de sólo lectura. Los triggers corren en la misma transacción que
+# la escritura, así que también cuentan lo que escribe otro proceso (la app de Streamlit).
+TABLAS_VERSIONADAS = ("clientes", "entregas", "entrega_items", "movimientos", "piezas")
+
+_SQL_TRIGGERS_VERSIONES = [
+    f"CREATE TRIGGER IF NOT EXISTS versiones_{tabla}_{op[0].lower()} AFTER {op} ON {tabla} BEGIN "
+    f"UPDATE versiones_tablas SET version = version + 1 WHERE tabla = '{tabla}'; END"
+    for tabla in TABLAS_VERSIONADAS
+    for op in ("INSERT", "UPDATE", "DELETE")
+]
+
+def versiones_tablas() -> dict[str, int]:
+    """{tabla: contador de cambios}: una consulta a una tabla de pocas filas."""
+    with engine.connect() as conn:
+        return {t: v for t, v in conn.execute(select(VersionTabla.tabla, VersionTabla.version))}
+
+# --------- ARCHIVO HISTÓRICO ---------
+# Las entregas (con sus ítems) y los movimientos viejos se pueden pasar a otra base SQLite
+# (utils/archivo.py). Las pantallas del día a día leen sólo la base caliente; lo histórico
+# (exportar, remitos, verificar los resúmenes) lee las vistas temporales historico_*, que
+# agregan el archivo con UNION ALL cuando existe. Los resúmenes mantenidos por triggers
+# (movimientos_resumen, clientes_stats, clientes_piezas) siguen cubriendo toda la historia.
+ARCHIVO_PATH = Path(os.getenv("DB_ARCHIVO_PATH", str(DB_PATH.with_name(f"{DB_PATH.stem}_archivo.db"))))
+TABLAS_ARCHIVABLES = ("entregas", "entrega_items", "movimientos")
+
+def vista_historica(modelo):
+    """La vista historico_<tabla> de `modelo`, con las columnas (y tipos) del modelo, para Core."""
+    t = modelo.__table__
+    return table(f"historico_{t.name}", *(column(c.name, c.type) for c in t.columns))
+
+def _columnas_archivo(crudo, tabla: str) -> set[str]:
+    return {fila[1] for fila in crudo.execute(f"PRAGMA archivo.table_info({tabla})")}
+
+def _archivo_tiene(conn, tabla: str) -> bool:
+    """Si la conexión tiene el archivo adjunto y en él está `tabla`."""
+    if conn.execute(text("SELECT 1 FROM pragma_database_list WHERE name = 'archivo'")).first() is None:
+        return False
+    return conn.execute(
+        text("SELECT 1 FROM archivo.sqlite_master WHERE type = 'table' AND name = :t"), {"t": tabla}
+    ).first() is not None
+
+def _crear_vistas_historicas(crudo, con_archivo: bool) -> None:
+    for nombre in TABLAS_ARCHIVABLES:
+        columnas = [c.name for c in Base.metadata.tables[nombre].columns]
+        sql = f"SELECT {', '.join(columnas)} FROM main.{nombre}"
+        en_archivo = _columnas_archivo(crudo, nombre) if con_archivo else set()
+        if en_archivo:
+            # Una columna agregada después del último archivado sale NULL del lado del archivo, y
+            # una fila que todavía está en la base caliente (archivado cortado a la mitad) no se repite.
+            sql += " UNION ALL SELECT " + ", ".join(
+                f"a.{c}" if c in en_archivo else f"NULL AS {c}" for c in columnas
+            ) + f" FROM archivo.{nombre} a WHERE NOT EXISTS (SELECT 1 FROM main.{nombre} m WHERE m.id = a.id)"
+        crudo.execute(f"CREATE TEMP VIEW IF NOT EXISTS historico_{nombre} AS {sql}")
+
+@contextmanager
+def conexion_historica(escritura: bool = False):
+    """
+    Conexión Core con el archivo adjunto (ATTACH ... AS archivo, si el archivo existe) y las
+    vistas historico_*. Al salir se borran las vistas y se desadjunta: la conexión vuelve
+    limpia al pool. ATTACH no puede ir dentro de una transacción: se hace antes del primer execute.
+    """
+    with engine.connect() as conn:
+        crudo = conn.connection.dbapi_connection
+        con_archivo = ARCHIVO_PATH.exists()
+        if con_archivo:
+            crudo.execute("ATTACH DATABASE ? AS archivo", (str(ARCHIVO_PATH),))
+        try:
+            _crear_vistas_historicas(crudo, con_archivo)
+            yield conn.execution_options(escritura=True) if escritura else conn
+        finally:
+            if conn.in_transaction():
+                conn.rollback()
+            for nombre in TABLAS_ARCHIVABLES:
+                crudo.execute(f"DROP VIEW IF EXISTS temp.historico_{nombre}")
+            if con_archivo:
+                crudo.execute("DETACH DATABASE archivo")
 
 # --------- FUNCIONES CRUD BÁSICAS ---------
-def get_session():
-    return SessionLocal()
+def get_session(escritura: bool = False):
+    """Sesión ORM. Usá `escritura=True` en funciones que insertan/actualizan."""
+    return SessionEscritura() if escritura else SessionLocal()
 
 # Clientes
+# Cache de lecturas de clientes: se invalida en cada escritura que puede tocar `clientes`.
+_cache_clientes = CacheTTL(maxsize=512, ttl=300.0)
+
+def _norm_query(query: str, *args, **kwargs) -> tuple:
+    return (normalizar_nombre(query), args, tuple(sorted(kwargs.items())))
+
+def cache_clientes_stats() -> dict:
+    return _cache_clientes.stats()
+
+def _cliente_por_nombre(s, nombre: str) -> Optional[Cliente]:
+    # Igualdad sobre la columna normalizada: usa el índice único (ilike no puede).
+    return s.query(Cliente).filter(Cliente.nombre_norm == normalizar_nombre(nombre)).one_or_none()
+
 def upsert_cliente(nombre: str, telefono: str = "", email: str = "", direccion: str = "") -> Cliente:
-    with get_session() as s:
-        cli = s.query(Cliente).filter(Cliente.nombre.ilike(nombre.strip())).one_or_none()
+    with get_session(escritura=True) as s:
+        cli = _cliente_por_nombre(s, nombre)
         if cli:
             cli.telefono = telefono
             cli.email = email
@@ -94,40 +680,150 @@ def upsert_cliente(nombre: str, telefono: str = "", email: str = "", direccion:
             s.add(cli)
         s.commit()
         s.refresh(cli)
+        _cache_clientes.invalidar()
         return cli
 
-def search_clientes(query: str, limit: int = 20) -> list[Cliente]:
+@dataclass(frozen=True)
+class ClienteFila:
+    """
+    Cliente para mostrar. Las lecturas cacheadas devuelven esto y no el objeto ORM: la cache es
+    compartida por todas las sesiones y una fila inmutable no arrastra estado de una sesión ORM.
+    """
+    id: int
+    nombre: str
+    telefono: Optional[str]
+    email: Optional[str]
+    direccion: Optional[str]
+    creado_en: Optional[datetime]
+
+_COLUMNAS_CLIENTE = (Cliente.id, Cliente.nombre, Cliente.telefono, Cliente.email, Cliente.direccion, Cliente.creado_en)
+
+@cacheado(_cache_clientes, clave=_norm_query)
+def search_clientes(query: str, limit: int = 20) -> list[ClienteFila]:
+    """
+    Busca clientes cuyo nombre contenga `query` (sin importar mayúsculas ni tildes).
+    Orden: coincidencia exacta, después los que empiezan con `query`, después el resto.
+    """
+    q = normalizar_nombre(query)
     with get_session() as s:
-        q = f"%{query.strip()}%"
-        return s.query(Cliente).filter(Cliente.nombre.ilike(q)).order_by(Cliente.nombre).limit(limit).all()
+        if not q:
+            filas = s.query(*_COLUMNAS_CLIENTE).order_by(Cliente.nombre).limit(limit).all()
+            return [ClienteFila(*f) for f in filas]
+
+        if _FTS_CLIENTES and len(q) >= 3:
+            # El tokenizer trigram necesita al menos 3 caracteres.
+            sql = text(
+                "SELECT clientes.id, clientes.nombre, clientes.telefono, clientes.email, clientes.direccion, "
+                "clientes.creado_en FROM clientes_fts "
+                "JOIN clientes ON clientes.id = clientes_fts.rowid "
+                "WHERE clientes_fts MATCH :fts "
+                "ORDER BY clientes.nombre_norm = :q DESC, "
+                "substr(clientes.nombre_norm, 1, length(:q)) = :q DESC, "
+                "clientes_fts.rank, clientes.nombre "
+                "LIMIT :limit"
+            ).columns(*_COLUMNAS_CLIENTE)
+            fts = '"' + q.replace('"', '""') + '"'
+            filas = s.execute(sql, {"fts": fts, "q": q, "limit": limit}).all()
+            return [ClienteFila(*f) for f in filas]
+
+        # Consultas cortas (o SQLite sin FTS5): primero prefijo por índice, después contiene.
+        prefijo = (
+            s.query(*_COLUMNAS_CLIENTE)
+            .filter(Cliente.nombre_norm >= q, Cliente.nombre_norm < q + "\uffff")
+            .order_by(Cliente.nombre_norm != q, Cliente.nombre)
+            .limit(limit)
+            .all()
+        )
+        resto = []
+        if len(prefijo) < limit:
+            consulta = s.query(*_COLUMNAS_CLIENTE).filter(Cliente.nombre_norm.contains(q, autoescape=True))
+            if prefijo:
+                consulta = consulta.filter(Cliente.id.not_in([f.id for f in prefijo]))
+            resto = consulta.order_by(Cliente.nombre).limit(limit - len(prefijo)).all()
+        return [ClienteFila(*f) for f in prefijo + resto]
 
-def get_cliente_by_nombre(nombre: str) -> Optional[Cliente]:
+@cacheado(_cache_clientes, clave=_norm_query)
+def get_cliente_by_nombre(nombre: str) -> Optional[ClienteFila]:
     with get_session() as s:
-        return s.query(Cliente).filter(Cliente.nombre.ilike(nombre.strip())).one_or_none()
+        fila = s.query(*_COLUMNAS_CLIENTE).filter(Cliente.nombre_norm == normalizar_nombre(nombre)).one_or_none()
+    return ClienteFila(*fila) if fila else None
 
 # Entregas
-def crear_entrega(cliente_nombre: str, fecha, numero: str, notas: str, items: list[dict], descuento: float = 0.0) -> Entrega:
-    with get_session() as s:
-        cli = s.query(Cliente).filter(Cliente.nombre.ilike(cliente_nombre.strip())).one_or_none()
-        if not cli:
-            cli = Cliente(nombre=cliente_nombre.strip())
-            s.add(cli)
-            s.flush()
+def _preparar_items(items: list[dict]) -> tuple[list[dict], float]:
+    """Normaliza los ítems y calcula la suma de subtotales en una sola pasada."""
+    filas = []
+    total = 0.0
+    for it in items:
+        cant = int(it.get("cantidad", 0) or 0)
+        pu = float(it.get("precio_unitario", 0.0) or 0.0)
+        sub = cant * pu
+        total += sub
+        filas.append({"pieza": (it.get("pieza") or "").strip(), "cantidad": cant, "precio_unitario": pu, "subtotal": sub})
+    return filas, total
 
-        ent = Entrega(cliente=cli, fecha=fecha, numero=numero.strip() if numero else None, notas=notas or "", descuento=descuento)
+def _insertar_entregas(s, entregas: list[dict]) -> list[Entrega]:
+    """
+    Inserta varias entregas en la sesión `s` (sin commit):
+    un flush para clientes nuevos + entregas y un único executemany para todos los ítems.
+    """
+    clientes: dict[str, Cliente] = {}
+    nuevas: list[tuple[Entrega, list[dict]]] = []
+    for e in entregas:
+        nombre = e["cliente_nombre"]
+        norm = normalizar_nombre(nombre)
+        cli = clientes.get(norm)
+        if cli is None:
+            cli = _cliente_por_nombre(s, nombre)
+            if not cli:
+                cli = Cliente(nombre=nombre.strip())
+                s.add(cli)
+            clientes[norm] = cli
+
+        filas, total = _preparar_items(e.get("items") or [])
+        descuento = float(e.get("descuento") or 0.0)
+        numero = e.get("numero")
+        ent = Entrega(
+            cliente=cli,
+            fecha=e.get("fecha") or date.today(),
+            numero=numero.strip() if numero else None,
+            notas=e.get("notas") or "",
+            descuento=descuento,
+            total=max(total - descuento, 0.0),
+        )
         s.add(ent)
-        total = 0.0
-        for it in items:
-            cant = int(it.get("cantidad", 0) or 0)
-            pu = float(it.get("precio_unitario", 0.0) or 0.0)
-            sub = cant * pu
-            total += sub
-            s.add(EntregaItem(entrega=ent, pieza=(it.get("pieza") or "").strip(), cantidad=cant, precio_unitario=pu, subtotal=sub))
-        ent.total = max(total - float(descuento or 0.0), 0.0)
+        nuevas.append((ent, filas))
+
+    s.flush()  # asigna ids a clientes nuevos y entregas (INSERT ... RETURNING en lote)
+    items = [dict(fila, entrega_id=ent.id) for ent, filas in nuevas for fila in filas]
+    if items:
+        s.execute(insert(EntregaItem), items)
+    return [ent for ent, _ in nuevas]
+
+def crear_entrega(cliente_nombre: str, fecha, numero: str, notas: str, items: list[dict], descuento: float = 0.0) -> Entrega:
+    with get_session(escritura=True) as s:
+        [ent] = _insertar_entregas(s, [{
+            "cliente_nombre": cliente_nombre,
+            "fecha": fecha,
+            "numero": numero,
+            "notas": notas,
+            "items": items,
+            "descuento": descuento,
+        }])
         s.commit()
-        s.refresh(ent)
+        _cache_clientes.invalidar()
         return ent
 
+def crear_entregas_bulk(entregas: list[dict]) -> list[Entrega]:
+    """
+    Importa muchas entregas en una sola transacción. Cada dict lleva las mismas claves que
+    los parámetros de `crear_entrega` (cliente_nombre, fecha, numero, notas, items, descuento).
+    """
+    with get_session(escritura=True) as s:
+        creadas = _insertar_entregas(s, entregas)
+        s.commit()
+        _cache_clientes.invalidar()
+        return creadas
+
 def ultimas_entregas(limit: int = 10) -> list[Entrega]:
     with get_session() as s:
         return (
@@ -137,15 +833,751 @@ def ultimas_entregas(limit: int = 10) -> list[Entrega]:
             .all()
         )
 
+@dataclass(frozen=True)
+class EntregaResumen:
+    """Fila liviana para listados de entregas (ya con cliente y resumen de piezas)."""
+    id: int
+    fecha: date
+    cliente: str
+    resumen: str
+    total: float
+
+def resumen_items(piezas: list[tuple[str, int]], cantidad_items: int, max_piezas: int = 4) -> str:
+    """"pieza x2, otra x1 (+3 más)" a partir de las primeras piezas y la cantidad total de ítems."""
+    resumen = ", ".join(f"{pieza} x{cant}" for pieza, cant in piezas[:max_piezas])
+    if cantidad_items > max_piezas:
+        resumen += f" (+{cantidad_items - max_piezas} más)"
+    return resumen
+
+Cursor = tuple[date, int]
+
+def _despues_de(col_fecha, col_id, antes: Optional[Cursor]):
+    """Condición de keyset para ORDER BY fecha DESC, id DESC: filas posteriores al cursor."""
+    fecha, fila_id = antes
+    # `fecha <= cursor` es redundante pero le da a SQLite un límite de rango sobre el índice (fecha, id).
+    return and_(col_fecha <= fecha, or_(col_fecha < fecha, and_(col_fecha == fecha, col_id < fila_id)))
+
+def buscar_entregas(
+    limit: int = 50,
+    antes: Optional[Cursor] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    cliente: Optional[str] = None,
+) -> list[EntregaResumen]:
+    """
+    Página de entregas (más nuevas primero) con filtros opcionales por rango de fechas y cliente.
+    Paginado por keyset: `antes` es el (fecha, id) de la última fila de la página anterior,
+    así cada página cuesta lo mismo sin importar el tamaño del historial.
+    Son dos consultas: las entregas de la página y las primeras piezas de cada una.
+    """
+    with get_session() as s:
+        q = (
+            s.query(Entrega.id, Entrega.fecha, Entrega.total, Cliente.nombre)
+            .outerjoin(Cliente, Cliente.id == Entrega.cliente_id)
+        )
+        if antes is not None:
+            q = q.filter(_despues_de(Entrega.fecha, Entrega.id, antes))
+        if desde is not None:
+            q = q.filter(Entrega.fecha >= desde)
+        if hasta is not None:
+            q = q.filter(Entrega.fecha <= hasta)
+        if cliente:
+            q = q.filter(Cliente.nombre_norm == normalizar_nombre(cliente))
+        filas = q.order_by(Entrega.fecha.desc(), Entrega.id.desc()).limit(limit).all()
+        if not filas:
+            return []
+
+        # Primeras 4 piezas de cada entrega + cantidad total de ítems, en una sola consulta.
+        numerados = (
+            s.query(
+                EntregaItem.entrega_id,
+                EntregaItem.pieza,
+                EntregaItem.cantidad,
+                func.row_number().over(partition_by=EntregaItem.entrega_id, order_by=EntregaItem.id).label("n"),
+                func.count().over(partition_by=EntregaItem.entrega_id).label("total"),
+            )
+            .filter(EntregaItem.entrega_id.in_([f.id for f in filas]))
+            .subquery()
+        )
+        piezas: dict[int, list[tuple[str, int]]] = {}
+        cantidades: dict[int, int] = {}
+        for ent_id, pieza, cant, _n, total in s.query(numerados).filter(numerados.c.n <= 4).order_by(numerados.c.entrega_id, numerados.c.n):
+            piezas.setdefault(ent_id, []).append((pieza, cant))
+            cantidades[ent_id] = total
+
+    return [
+        EntregaResumen(
+            id=f.id,
+            fecha=f.fecha,
+            cliente=f.nombre or "Cliente",
+            resumen=resumen_items(piezas.get(f.id, []), cantidades.get(f.id, 0)),
+            total=float(f.total or 0.0),
+        )
+        for f in filas
+    ]
+
+# --------- ESTADÍSTICAS POR CLIENTE ---------
+# `clientes_stats` y `clientes_piezas` se actualizan con triggers dentro de la misma transacción
+# que escribe la entrega: crear_entrega, la importación en lote y cualquier edición o borrado
+# futuro (ORM o SQL directo) las mantienen sin código extra.
+
+def _sql_entrega_sumar(r: str) -> str:
+    return (
+        "INSERT INTO clientes_stats (cliente_id, entregas, total, ultima_fecha) "
+        f"VALUES ({r}.cliente_id, 1, COALESCE({r}.total, 0), {r}.fecha) "
+        "ON CONFLICT (cliente_id) DO UPDATE SET entregas = entregas + 1, total = total + excluded.total, "
+        "ultima_fecha = CASE WHEN ultima_fecha IS NULL OR excluded.ultima_fecha > ultima_fecha "
+        "THEN excluded.ultima_fecha ELSE ultima_fecha END;"
+    )
+
+def _sql_ultima_fecha(cliente_id: str) -> str:
+    # MAX() de agregación ignora los NULL (el escalar no): sirve con o sin archivo.
+    return (
+        f"(SELECT MAX(f) FROM (SELECT MAX(fecha) AS f FROM entregas WHERE cliente_id = {cliente_id} "
+        "UNION ALL SELECT clientes_stats.ultima_fecha_archivo))"
+    )
+
+def _sql_entrega_restar(r: str) -> str:
+    # La última fecha no se puede "restar": se busca de nuevo por ix_entregas_cliente_fecha_id
+    # y se compara con la última archivada (la única, si no queda ninguna en app.db).
+    return (
+        f"UPDATE clientes_stats SET entregas = entregas - 1, total = total - COALESCE({r}.total, 0), "
+        f"ultima_fecha = {_sql_ultima_fecha(f'{r}.cliente_id')} "
+        f"WHERE cliente_id = {r}.cliente_id; "
+        f"DELETE FROM clientes_stats WHERE cliente_id = {r}.cliente_id AND entregas <= 0;"
+    )
+
+def _sql_item_sumar(r: str) -> str:
+    return (
+        "INSERT INTO clientes_piezas (cliente_id, pieza, cantidad, total, filas) "
+        f"SELECT cliente_id, COALESCE({r}.pieza, ''), COALESCE({r}.cantidad, 0), COALESCE({r}.subtotal, 0), 1 "
+        f"FROM entregas WHERE id = {r}.entrega_id "
+        "ON CONFLICT (cliente_id, pieza) DO UPDATE SET cantidad = cantidad + excluded.cantidad, "
+        "total = total + excluded.total, filas = filas + 1;"
+    )
+
+def _sql_item_restar(r: str) -> str:
+    where = (
+        f"cliente_id = (SELECT cliente_id FROM entregas WHERE id = {r}.entrega_id) "
+        f"AND pieza = COALESCE({r}.pieza, '')"
+    )
+    return (
+        f"UPDATE clientes_piezas SET cantidad = cantidad - COALESCE({r}.cantidad, 0), "
+        f"total = total - COALESCE({r}.subtotal, 0), filas = filas - 1 WHERE {where}; "
+        f"DELETE FROM clientes_piezas WHERE filas <= 0 AND {where};"
+    )
+
+# Una entrega que cambia de cliente se lleva sus piezas: se suman al nuevo y se restan del viejo.
+_SQL_MOVER_PIEZAS = (
+    "INSERT INTO clientes_piezas (cliente_id, pieza, cantidad, total, filas) "
+    "SELECT new.cliente_id, COALESCE(pieza, ''), SUM(COALESCE(cantidad, 0)), SUM(COALESCE(subtotal, 0)), COUNT(*) "
+    "FROM entrega_items WHERE entrega_id = new.id GROUP BY 2 "
+    "ON CONFLICT (cliente_id, pieza) DO UPDATE SET cantidad = cantidad + excluded.cantidad, "
+    "total = total + excluded.total, filas = filas + excluded.filas; "
+    "UPDATE clientes_piezas SET (cantidad, total, filas) = ("
+    "SELECT clientes_piezas.cantidad - SUM(COALESCE(i.cantidad, 0)), "
+    "clientes_piezas.total - SUM(COALESCE(i.subtotal, 0)), clientes_piezas.filas - COUNT(*) "
+    "FROM entrega_items i WHERE i.entrega_id = old.id AND COALESCE(i.pieza, '') = clientes_piezas.pieza) "
+    "WHERE cliente_id = old.cliente_id "
+    "AND pieza IN (SELECT COALESCE(pieza, '') FROM entrega_items WHERE entrega_id = old.id); "
+    "DELETE FROM clientes_piezas WHERE cliente_id = old.cliente_id AND filas <= 0;"
+)
+
+_SQL_TRIGGERS_STATS = [
+    "CREATE TRIGGER IF NOT EXISTS clientes_stats_ai AFTER INSERT ON entregas BEGIN "
+    f"{_sql_entrega_sumar('new')} END",
+    "CREATE TRIGGER IF NOT EXISTS clientes_stats_ad AFTER DELETE ON entregas BEGIN "
+    f"{_sql_entrega_restar('old')} END",
+    "CREATE TRIGGER IF NOT EXISTS clientes_stats_au AFTER UPDATE OF cliente_id, fecha, total ON entregas BEGIN "
+    f"{_sql_entrega_restar('old')} {_sql_entrega_sumar('new')} END",
+    "CREATE TRIGGER IF NOT EXISTS clientes_piezas_ai AFTER INSERT ON entrega_items BEGIN "
+    f"{_sql_item_sumar('new')} END",
+    "CREATE TRIGGER IF NOT EXISTS clientes_piezas_ad AFTER DELETE ON entrega_items BEGIN "
+    f"{_sql_item_restar('old')} END",
+    "CREATE TRIGGER IF NOT EXISTS clientes_piezas_au AFTER UPDATE ON entrega_items BEGIN "
+    f"{_sql_item_restar('old')} {_sql_item_sumar('new')} END",
+    "CREATE TRIGGER IF NOT EXISTS clientes_piezas_entrega_au AFTER UPDATE OF cliente_id ON entregas "
+    f"WHEN old.cliente_id IS NOT new.cliente_id BEGIN {_SQL_MOVER_PIEZAS} END",
+]
+
+def _sql_agrupar_stats(entregas: str = "entregas") -> str:
+    return f"SELECT cliente_id, COUNT(*), SUM(COALESCE(total, 0)), MAX(fecha) FROM {entregas} GROUP BY cliente_id"
+
+# Con el archivo adjunto (ATTACH ... AS archivo): la última entrega archivada de cada cliente.
+SQL_FECHA_ARCHIVO = (
+    "UPDATE clientes_stats SET ultima_fecha_archivo = ("
+    "SELECT MAX(fecha) FROM archivo.entregas a WHERE a.cliente_id = clientes_stats.cliente_id)"
+)
+
+def _sql_agrupar_piezas(items: str = "entrega_items", entregas: str = "entregas") -> str:
+    return (
+        "SELECT e.cliente_id, COALESCE(i.pieza, ''), SUM(COALESCE(i.cantidad, 0)), SUM(COALESCE(i.subtotal, 0)), COUNT(*) "
+        f"FROM {items} i JOIN {entregas} e ON e.id = i.entrega_id GROUP BY 1, 2"
+    )
+
+def reconstruir_stats_clientes() -> tuple[int, int]:
+    """
+    Recalcula `clientes_stats` y `clientes_piezas` desde cero (base caliente + archivo).
+    Devuelve (clientes, filas de piezas).
+    """
+    with conexion_historica(escritura=True) as conn, conn.begin():
+        filas = _reconstruir_stats_clientes(conn, historico=True)
+    _cache_clientes.invalidar()
+    return filas
+
+def _reconstruir_stats_clientes(conn, historico: bool = False) -> tuple[int, int]:
+    # `historico` requiere una conexion_historica; las migraciones agrupan sólo la base caliente.
+    entregas, items = ("historico_entregas", "historico_entrega_items") if historico else ("entregas", "entrega_items")
+    conn.execute(text("DELETE FROM clientes_stats"))
+    conn.execute(text("INSERT INTO clientes_stats (cliente_id, entregas, total, ultima_fecha) " + _sql_agrupar_stats(entregas)))
+    if historico and _archivo_tiene(conn, "entregas"):
+        conn.execute(text(SQL_FECHA_ARCHIVO))
+    conn.execute(text("DELETE FROM clientes_piezas"))
+    conn.execute(text(
+        "INSERT INTO clientes_piezas (cliente_id, pieza, cantidad, total, filas) " + _sql_agrupar_piezas(items, entregas)
+    ))
+    return (
+        conn.execute(text("SELECT COUNT(*) FROM clientes_stats")).scalar_one(),
+        conn.execute(text("SELECT COUNT(*) FROM clientes_piezas")).scalar_one(),
+    )
+
+def _diferencias(tabla: str, crudo: dict, stats: dict, vacio: tuple, tolerancia: float) -> list[dict]:
+    diferencias = []
+    for clave in crudo.keys() | stats.keys():
+        esperado = crudo.get(clave, vacio)
+        actual = stats.get(clave, vacio)
+        distintos = any(
+            abs(a - b) > tolerancia if isinstance(a, float) or isinstance(b, float) else a != b
+            for a, b in zip(esperado, actual)
+        )
+        if distintos:
+            diferencias.append({"tabla": tabla, "clave": clave, "esperado": esperado, "stats": actual})
+    return diferencias
+
+def verificar_stats_clientes(tolerancia: float = 0.005) -> list[dict]:
+    """
+    Compara los valores incrementales contra una agregación desde cero de entregas e ítems
+    (base caliente + archivo). Devuelve las diferencias (vacío = consistente).
+    """
+    with conexion_historica() as conn:
+        crudo = {r[0]: tuple(r[1:]) for r in conn.execute(text(_sql_agrupar_stats("historico_entregas")))}
+        stats = {r[0]: tuple(r[1:]) for r in conn.execute(text(
+            "SELECT cliente_id, entregas, total, ultima_fecha FROM clientes_stats"
+        ))}
+        crudo_piezas = {
+            tuple(r[:2]): tuple(r[2:])
+            for r in conn.execute(text(_sql_agrupar_piezas("historico_entrega_items", "historico_entregas")))
+        }
+        stats_piezas = {tuple(r[:2]): tuple(r[2:]) for r in conn.execute(text(
+            "SELECT cliente_id, pieza, cantidad, total, filas FROM clientes_piezas"
+        ))}
+    return (
+        _diferencias("clientes_stats", crudo, stats, (0, 0.0, None), tolerancia)
+        + _diferencias("clientes_piezas", crudo_piezas, stats_piezas, (0, 0.0, 0), tolerancia)
+    )
+
+@dataclass(frozen=True)
+class EstadisticasCliente:
+    entregas: int
+    total: float
+    ultima_fecha: Optional[date]
+    top_piezas: tuple[tuple[str, int], ...]   # (pieza, unidades), las más pedidas primero
+
+@cacheado(_cache_clientes, clave=lambda cliente_id, top=3: (cliente_id, top))
+def estadisticas_cliente(cliente_id: int, top: int = 3) -> EstadisticasCliente:
+    """Stats de un cliente: una fila por clave primaria y sus `top` piezas por índice."""
+    with engine.connect() as conn:
+        fila = conn.execute(
+            select(ClienteStats.entregas, ClienteStats.total, ClienteStats.ultima_fecha)
+            .where(ClienteStats.cliente_id == cliente_id)
+        ).first()
+        piezas = conn.execute(
+            select(ClientePieza.pieza, ClientePieza.cantidad)
+            .where(ClientePieza.cliente_id == cliente_id)
+            .order_by(ClientePieza.cantidad.desc())
+            .limit(top)
+        ).all()
+    if fila is None:
+        return EstadisticasCliente(0, 0.0, None, ())
+    return EstadisticasCliente(
+        entregas=fila.entregas,
+        total=float(fila.total or 0.0),
+        ultima_fecha=fila.ultima_fecha,
+        top_piezas=tuple((p, int(c)) for p, c in piezas),
+    )
+
+@dataclass(frozen=True)
+class ClienteRanking:
+    id: int
+    nombre: str
+    entregas: int
+    total: float
+    ultima_fecha: Optional[date]
+
+ORDEN_RANKING = {
+    "total": ClienteStats.total,
+    "entregas": ClienteStats.entregas,
+    "ultima_fecha": ClienteStats.ultima_fecha,
+}
+
+@cacheado(_cache_clientes, clave=lambda orden="total", limit=20: (orden, limit))
+def ranking_clientes(orden: str = "total", limit: int = 20) -> list[ClienteRanking]:
+    """Mejores clientes según `orden` (una clave de ORDEN_RANKING), recorriendo su índice."""
+    col = ORDEN_RANKING[orden]
+    with get_session() as s:
+        filas = (
+            s.query(ClienteStats.cliente_id, Cliente.nombre, ClienteStats.entregas, ClienteStats.total, ClienteStats.ultima_fecha)
+            .join(Cliente, Cliente.id == ClienteStats.cliente_id)
+            .order_by(col.desc(), ClienteStats.cliente_id.desc())
+            .limit(limit)
+            .all()
+        )
+    return [ClienteRanking(f[0], f[1], f[2], float(f[3] or 0.0), f[4]) for f in filas]
+
+# --------- RESUMEN DE MOVIMIENTOS ---------
+# Clave del resumen a partir de una fila de `movimientos` (new/old dentro de los triggers).
+_CLAVE_RESUMEN = (
+    "COALESCE(substr({r}.fecha, 1, 7), ''), COALESCE({r}.tipo, ''), "
+    "COALESCE({r}.categoria, ''), COALESCE({r}.medio, '')"
+)
+_WHERE_RESUMEN = (
+    "mes = COALESCE(substr({r}.fecha, 1, 7), '') AND tipo = COALESCE({r}.tipo, '') "
+    "AND categoria = COALESCE({r}.categoria, '') AND medio = COALESCE({r}.medio, '')"
+)
+
+def _sql_sumar(r: str) -> str:
+    return (
+        "INSERT INTO movimientos_resumen (mes, tipo, categoria, medio, total, cantidad) "
+        f"VALUES ({_CLAVE_RESUMEN.format(r=r)}, COALESCE({r}.monto, 0), 1) "
+        "ON CONFLICT (mes, tipo, categoria, medio) DO UPDATE SET "
+        "total = total + excluded.total, cantidad = cantidad + 1;"
+    )
+
+def _sql_restar(r: str) -> str:
+    where = _WHERE_RESUMEN.format(r=r)
+    return (
+        f"UPDATE movimientos_resumen SET total = total - COALESCE({r}.monto, 0), cantidad = cantidad - 1 WHERE {where}; "
+        f"DELETE FROM movimientos_resumen WHERE cantidad <= 0 AND {where};"
+    )
+
+def _sql_agrupar_movimientos(movimientos: str = "movimientos") -> str:
+    return (
+        f"SELECT {_CLAVE_RESUMEN.format(r=movimientos)}, SUM(COALESCE(monto, 0)), COUNT(*) "
+        f"FROM {movimientos} GROUP BY 1, 2, 3, 4"
+    )
+
+def reconstruir_resumen_movimientos() -> int:
+    """Recalcula `movimientos_resumen` desde cero (base caliente + archivo). Devuelve la cantidad de filas."""
+    with conexion_historica(escritura=True) as conn, conn.begin():
+        return _reconstruir_resumen(conn, historico=True)
+
+def _reconstruir_resumen(conn, historico: bool = False) -> int:
+    # `historico` requiere una conexion_historica; las migraciones agrupan sólo la base caliente.
+    conn.execute(text("DELETE FROM movimientos_resumen"))
+    conn.execute(text(
+        "INSERT INTO movimientos_resumen (mes, tipo, categoria, medio, total, cantidad) "
+        + _sql_agrupar_movimientos("historico_movimientos" if historico else "movimientos")
+    ))
+    return conn.execute(text("SELECT COUNT(*) FROM movimientos_resumen")).scalar_one()
+
+def verificar_resumen_movimientos(tolerancia: float = 0.005) -> list[dict]:
+    """
+    Compara el resumen contra la tabla cruda (base caliente + archivo).
+    Devuelve las diferencias (vacío = consistente).
+    """
+    with conexion_historica() as conn:
+        crudo = {tuple(r[:4]): (r[4], r[5]) for r in conn.execute(text(_sql_agrupar_movimientos("historico_movimientos")))}
+        resumen = {
+            tuple(r[:4]): (r[4], r[5])
+            for r in conn.execute(text(
+                "SELECT mes, tipo, categoria, medio, total, cantidad FROM movimientos_resumen"
+            ))
+        }
+    diferencias = []
+    for clave in crudo.keys() | resumen.keys():
+        esperado = crudo.get(clave, (0.0, 0))
+        actual = resumen.get(clave, (0.0, 0))
+        if esperado[1] != actual[1] or abs(esperado[0] - actual[0]) > tolerancia:
+            diferencias.append({
+                "mes": clave[0], "tipo": clave[1], "categoria": clave[2], "medio": clave[3],
+                "esperado": esperado, "resumen": actual,
+            })
+    return diferencias
+
+def resumen_movimientos(desde_mes: Optional[str] = None, hasta_mes: Optional[str] = None) -> list[MovimientoResumen]:
+    """Filas del resumen mensual, opcionalmente entre dos meses "YYYY-MM" (inclusive)."""
+    with get_session() as s:
+        q = s.query(MovimientoResumen)
+        if desde_mes:
+            q = q.filter(MovimientoResumen.mes >= desde_mes)
+        if hasta_mes:
+            q = q.filter(MovimientoResumen.mes <= hasta_mes)
+        return q.order_by(MovimientoResumen.mes, MovimientoResumen.tipo, MovimientoResumen.categoria).all()
+
 # Movimientos
 def crear_movimiento(fecha, tipo: str, categoria: str, monto: float, descripcion: str = "", medio: str = "efectivo") -> Movimiento:
-    with get_session() as s:
+    with get_session(escritura=True) as s:
         mov = Movimiento(fecha=fecha, tipo=tipo, categoria=categoria, monto=float(monto or 0.0), descripcion=descripcion, medio=medio)
         s.add(mov)
         s.commit()
         s.refresh(mov)
         return mov
 
-def listar_movimientos() -> list[Movimiento]:
+def actualizar_movimiento(mov_id: int, **campos) -> Optional[Movimiento]:
+    """Actualiza los campos dados (fecha, tipo, categoria, monto, descripcion, medio)."""
+    permitidos = {"fecha", "tipo", "categoria", "monto", "descripcion", "medio"}
+    with get_session(escritura=True) as s:
+        mov = s.get(Movimiento, mov_id)
+        if mov is None:
+            return None
+        for campo, valor in campos.items():
+            if campo not in permitidos:
+                raise ValueError(f"Campo no editable: {campo}")
+            setattr(mov, campo, float(valor or 0.0) if campo == "monto" else valor)
+        s.commit()
+        return mov
+
+def eliminar_movimiento(mov_id: int) -> bool:
+    with get_session(escritura=True) as s:
+        borrados = s.query(Movimiento).filter(Movimiento.id == mov_id).delete()
+        s.commit()
+        return borrados > 0
+
+@dataclass(frozen=True)
+class MovimientoFila:
+    """Fila liviana de `movimientos` para listados (sin instancia ORM)."""
+    id: int
+    fecha: date
+    tipo: str
+    categoria: str
+    monto: float
+    descripcion: Optional[str]
+    medio: Optional[str]
+
+def buscar_movimientos(
+    limit: int = 50,
+    antes: Optional[Cursor] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    tipo: Optional[str] = None,
+    categoria: Optional[str] = None,
+    medio: Optional[str] = None,
+) -> list[MovimientoFila]:
+    """Página de movimientos (más nuevos primero), con filtros y paginado por keyset (fecha, id)."""
+    with get_session() as s:
+        q = s.query(
+            Movimiento.id, Movimiento.fecha, Movimiento.tipo, Movimiento.categoria,
+            Movimiento.monto, Movimiento.descripcion, Movimiento.medio,
+        )
+        if antes is not None:
+            q = q.filter(_despues_de(Movimiento.fecha, Movimiento.id, antes))
+        if desde is not None:
+            q = q.filter(Movimiento.fecha >= desde)
+        if hasta is not None:
+            q = q.filter(Movimiento.fecha <= hasta)
+        if tipo:
+            q = q.filter(Movimiento.tipo == tipo)
+        if categoria:
+            q = q.filter(Movimiento.categoria == categoria)
+        if medio:
+            q = q.filter(Movimiento.medio == medio)
+        filas = q.order_by(Movimiento.fecha.desc(), Movimiento.id.desc()).limit(limit).all()
+    return [MovimientoFila(*f) for f in filas]
+
+def listar_movimientos(limit: Optional[int] = None) -> list[Movimiento]:
+    with get_session() as s:
+        q = s.query(Movimiento).order_by(Movimiento.fecha.desc(), Movimiento.id.desc())
+        if limit is not None:
+            q = q.limit(limit)
+        return q.all()
+
+# Piezas
+# Lista de nombres para el autocompletado del editor de entregas; se invalida al escribir.
+_cache_piezas = CacheTTL(maxsize=8, ttl=300.0)
+
+def upsert_pieza(nombre: str, minutos: float, gramos: float) -> Pieza:
+    """Crea o actualiza una pieza del catálogo; su precio se recalcula en la próxima lectura."""
+    with get_session(escritura=True) as s:
+        pieza = s.query(Pieza).filter(Pieza.nombre_norm == normalizar_nombre(nombre)).first()
+        if pieza is None:
+            pieza = Pieza(nombre=nombre.strip())
+            s.add(pieza)
+        pieza.minutos = float(minutos or 0.0)
+        pieza.gramos = float(gramos or 0.0)
+        pieza.config_huella = None
+        s.commit()
+        s.refresh(pieza)
+    _cache_piezas.invalidar()
+    return pieza
+
+def eliminar_pieza(pieza_id: int) -> bool:
+    with get_session(escritura=True) as s:
+        borradas = s.query(Pieza).filter(Pieza.id == pieza_id).delete()
+        s.commit()
+    _cache_piezas.invalidar()
+    return borradas > 0
+
+def actualizar_precios_piezas(config: dict) -> int:
+    """
+    Recalcula, de una sola vez, costo y precio de las piezas cacheadas con otra config
+    (o nunca calculadas). Si la config no cambió no hay nada que hacer: una consulta y listo.
+    Devuelve cuántas piezas se recalcularon.
+    """
+    # Import acá: pandas/numpy no hacen falta para arrancar la app.
+    import pandas as pd
+    from utils.calculo_costos import calcular_costos, huella_config
+
+    huella = huella_config(config)
+    # `!= huella` como dos rangos: así las dos consultas van por el índice de config_huella.
+    viejas_filtro = or_(Pieza.config_huella.is_(None), Pieza.config_huella < huella, Pieza.config_huella > huella)
+    # Lo normal es que esté todo al día: se mira con una conexión de lectura, sin tomar el
+    # lock de escritura (BEGIN IMMEDIATE) en cada lectura del catálogo.
+    with engine.connect() as conn:
+        if conn.execute(select(Pieza.id).where(viejas_filtro).limit(1)).first() is None:
+            return 0
+    with engine.execution_options(escritura=True).begin() as conn:
+        viejas = conn.execute(select(Pieza.id, Pieza.minutos, Pieza.gramos).where(viejas_filtro)).all()
+        if not viejas:
+            return 0
+        res = calcular_costos(pd.DataFrame(viejas, columns=["id", "minutos", "gramos"]), config)
+        conn.execute(
+            update(Pieza).where(Pieza.id == bindparam("pid")).values(
+                costo=bindparam("nuevo_costo"), precio=bindparam("nuevo_precio"), config_huella=huella
+            ),
+            [{"pid": int(i), "nuevo_costo": float(c), "nuevo_precio": float(p)}
+             for i, c, p in zip(res["id"], res["costo_total"], res["precio_total"])],
+        )
+    return len(viejas)
+
+def listar_piezas(config: dict) -> list[Pieza]:
+    """Catálogo completo con precios al día para `config`."""
+    actualizar_precios_piezas(config)
+    with get_session() as s:
+        return s.query(Pieza).order_by(Pieza.nombre).all()
+
+def get_pieza_by_nombre(nombre: str) -> Optional[Pieza]:
+    with get_session() as s:
+        return s.query(Pieza).filter(Pieza.nombre_norm == normalizar_nombre(nombre)).first()
+
+@cacheado(_cache_piezas, clave=lambda: ())
+def nombres_piezas() -> list[str]:
+    with get_session() as s:
+        return [n for (n,) in s.query(Pieza.nombre).order_by(Pieza.nombre)]
+
+def precios_piezas(nombres: list[str], config: dict) -> dict[str, float]:
+    """
+    Precio unitario de catálogo para cada nombre que exista (sin importar mayúsculas ni tildes):
+    {nombre tal como vino: precio}. Una búsqueda por índice para todos los nombres juntos.
+    """
+    actualizar_precios_piezas(config)
+    por_norm: dict[str, list[str]] = {}
+    for n in set(nombres):
+        por_norm.setdefault(normalizar_nombre(n), []).append(n)
+    if not por_norm:
+        return {}
+    with engine.connect() as conn:
+        filas = conn.execute(
+            select(Pieza.nombre_norm, Pieza.precio).where(Pieza.nombre_norm.in_(list(por_norm)))
+        ).all()
+    return {n: precio for norm, precio in filas for n in por_norm[norm]}
+
+# Pedidos
+# pendiente -> (replanificar le asigna impresora y horario) -> imprimiendo -> terminado.
+ESTADOS_PEDIDO = ("pendiente", "imprimiendo", "terminado")
+
+def _vence(fecha_entrega: Optional[date], ahora: datetime) -> Optional[float]:
+    """Minutos desde `ahora` hasta el final del día de entrega."""
+    if fecha_entrega is None:
+        return None
+    return (datetime.combine(fecha_entrega + timedelta(days=1), datetime.min.time()) - ahora).total_seconds() / 60
+
+def _replanificar(conn, ahora: datetime, limite_ms: float) -> Optional[Plan]:
+    """
+    Replanifica los pedidos pendientes sobre las impresoras activas, dentro de la transacción
+    de `conn`. Los que están imprimiendo quedan fijos y ocupan su impresora hasta su `fin`.
+    """
+    activas = [i for (i,) in conn.execute(select(Impresora.id).where(Impresora.activa.is_(True)))]
+    pendientes = conn.execute(
+        select(Pedido.id, Pedido.minutos, Pedido.fecha_entrega).where(Pedido.estado == "pendiente")
+    ).all()
+    if not activas:
+        conn.execute(
+            update(Pedido).where(Pedido.estado == "pendiente").values(impresora_id=None, inicio=None, fin=None)
+        )
+        return None
+    libres = {imp: 0.0 for imp in activas}
+    for imp, fin in conn.execute(
+        select(Pedido.impresora_id, Pedido.fin).where(Pedido.estado == "imprimiendo", Pedido.impresora_id.in_(activas))
+    ):
+        if fin is not None:
+            libres[imp] = max(libres[imp], (fin - ahora).total_seconds() / 60)
+    plan = planificar(
+        [Trabajo(pid, float(minutos or 0.0), _vence(entrega, ahora)) for pid, minutos, entrega in pendientes],
+        libres,
+        limite_ms=limite_ms,
+    )
+    if plan.asignaciones:
+        conn.execute(
+            update(Pedido).where(Pedido.id == bindparam("pid")).values(
+                impresora_id=bindparam("imp"), inicio=bindparam("desde"), fin=bindparam("hasta")
+            ),
+            [{"pid": a.trabajo_id, "imp": a.impresora,
+              "desde": ahora + timedelta(minutes=a.inicio), "hasta": ahora + timedelta(minutes=a.fin)}
+             for a in plan.asignaciones],
+        )
+    return plan
+
+def replanificar(limite_ms: float = 20.0) -> Optional[Plan]:
+    """Replanifica toda la cola ahora mismo. Devuelve el Plan (None si no hay impresoras activas)."""
+    with engine.execution_options(escritura=True).begin() as conn:
+        return _replanificar(conn, datetime.now(), limite_ms)
+
+def crear_impresora(nombre: str) -> Impresora:
+    """Agrega una impresora activa y replanifica. ValueError si el nombre está vacío o repetido."""
+    nombre = nombre.strip()
+    if not nombre:
+        raise ValueError("Poné un nombre para la impresora.")
+    with get_session(escritura=True) as s:
+        if s.query(Impresora.id).filter(Impresora.nombre == nombre).first() is not None:
+            raise ValueError(f'Ya hay una impresora llamada "{nombre}".')
+        imp = Impresora(nombre=nombre, activa=True)
+        s.add(imp)
+        s.flush()
+        _replanificar(s.connection(), datetime.now(), 20.0)
+        s.commit()
+        return imp
+
+def listar_impresoras() -> list[Impresora]:
     with get_session() as s:
-        return s.query(Movimiento).order_by(Movimiento.fecha.desc(), Movimiento.id.desc()).all()
+        return s.query(Impresora).order_by(Impresora.nombre).all()
+
+def activar_impresora(impresora_id: int, activa: bool) -> Optional[Plan]:
+    """
+    Prende o apaga una impresora y replanifica. Si se apaga con un pedido imprimiendo,
+    ese pedido vuelve a la cola (hay que imprimirlo de nuevo en otra).
+    """
+    with engine.execution_options(escritura=True).begin() as conn:
+        conn.execute(update(Impresora).where(Impresora.id == impresora_id).values(activa=activa))
+        if not activa:
+            conn.execute(
+                update(Pedido)
+                .where(Pedido.impresora_id == impresora_id, Pedido.estado == "imprimiendo")
+                .values(estado="pendiente")
+            )
+        return _replanificar(conn, datetime.now(), 20.0)
+
+def crear_pedido(
+    pieza: str, cantidad: int, minutos: float, gramos: float = 0.0,
+    fecha_entrega: Optional[date] = None, cliente: str = "",
+) -> Pedido:
+    """Agrega un pedido a la cola (`minutos` = tiempo total de todas las unidades) y replanifica."""
+    with get_session(escritura=True) as s:
+        ped = Pedido(
+            pieza=pieza.strip(), cantidad=int(cantidad or 1), minutos=float(minutos or 0.0),
+            gramos=float(gramos or 0.0), fecha_entrega=fecha_entrega, cliente=(cliente or "").strip() or None,
+        )
+        s.add(ped)
+        s.flush()
+        _replanificar(s.connection(), datetime.now(), 20.0)
+        s.commit()
+        s.refresh(ped)
+        return ped
+
+def crear_pedidos_bulk(pedidos: list[dict], limite_ms: float = 20.0) -> Optional[Plan]:
+    """Agrega muchos pedidos (mismas claves que crear_pedido) y replanifica una sola vez."""
+    with engine.execution_options(escritura=True).begin() as conn:
+        if pedidos:
+            conn.execute(insert(Pedido), [
+                {"pieza": p["pieza"].strip(), "cantidad": int(p.get("cantidad") or 1),
+                 "minutos": float(p.get("minutos") or 0.0), "gramos": float(p.get("gramos") or 0.0),
+                 "fecha_entrega": p.get("fecha_entrega"), "cliente": (p.get("cliente") or "").strip() or None,
+                 "estado": "pendiente"}
+                for p in pedidos
+            ])
+        return _replanificar(conn, datetime.now(), limite_ms)
+
+def _validar_inicio(conn, pedido_id: int, impresora_id: int) -> None:
+    """Un pedido arranca si su impresora está libre o si es el próximo que le toca según el plan."""
+    ocupada = conn.execute(
+        select(Pedido.id).where(
+            Pedido.estado == "imprimiendo", Pedido.impresora_id == impresora_id, Pedido.id != pedido_id
+        ).limit(1)
+    ).scalar()
+    if ocupada is None:
+        return
+    proximo = conn.execute(
+        select(Pedido.id)
+        .where(Pedido.estado == "pendiente", Pedido.impresora_id == impresora_id)
+        .order_by(Pedido.inicio, Pedido.id)
+        .limit(1)
+    ).scalar()
+    if proximo != pedido_id:
+        nombre = conn.execute(select(Impresora.nombre).where(Impresora.id == impresora_id)).scalar()
+        raise ValueError(
+            f"{nombre} está imprimiendo el pedido #{ocupada} y el próximo en su plan es el #{proximo}: "
+            "terminá o devolvé a la cola el que está imprimiendo."
+        )
+
+def cambiar_estado_pedido(pedido_id: int, estado: str) -> Optional[Plan]:
+    """
+    "imprimiendo": arranca ahora en la impresora que le asignó el plan, si está libre o si es
+    el próximo pedido de esa impresora (si no, ValueError).
+    "terminado": sale de la cola. "pendiente": vuelve a la cola. Replanifica en la misma transacción.
+    """
+    if estado not in ESTADOS_PEDIDO:
+        raise ValueError(f"Estado inválido: {estado}")
+    ahora = datetime.now()
+    with engine.execution_options(escritura=True).begin() as conn:
+        ped = conn.execute(select(Pedido.impresora_id, Pedido.minutos).where(Pedido.id == pedido_id)).first()
+        if ped is None:
+            return None
+        valores: dict = {"estado": estado}
+        if estado == "imprimiendo":
+            if ped.impresora_id is None:
+                raise ValueError("El pedido no tiene impresora asignada (¿hay impresoras activas?).")
+            _validar_inicio(conn, pedido_id, ped.impresora_id)
+            valores.update(inicio=ahora, fin=ahora + timedelta(minutes=float(ped.minutos or 0.0)))
+        elif estado == "terminado":
+            valores.update(fin=ahora)
+        conn.execute(update(Pedido).where(Pedido.id == pedido_id).values(**valores))
+        return _replanificar(conn, ahora, 20.0)
+
+def eliminar_pedido(pedido_id: int) -> Optional[Plan]:
+    with engine.execution_options(escritura=True).begin() as conn:
+        conn.execute(Pedido.__table__.delete().where(Pedido.id == pedido_id))
+        return _replanificar(conn, datetime.now(), 20.0)
+
+@dataclass(frozen=True)
+class PedidoPlan:
+    """Fila de la cola con su lugar en el plan (para la tabla y el Gantt)."""
+    id: int
+    cliente: Optional[str]
+    pieza: str
+    cantidad: int
+    minutos: float
+    fecha_entrega: Optional[date]
+    estado: str
+    impresora: Optional[str]
+    inicio: Optional[datetime]
+    fin: Optional[datetime]
+
+    @property
+    def atrasado(self) -> bool:
+        return (
+            self.fecha_entrega is not None and self.fin is not None
+            and self.fin >= datetime.combine(self.fecha_entrega + timedelta(days=1), datetime.min.time())
+        )
+
+def cola_pedidos() -> list[PedidoPlan]:
+    """Pedidos pendientes e imprimiendo, por impresora y horario planificado."""
+    with engine.connect() as conn:
+        filas = conn.execute(
+            select(
+                Pedido.id, Pedido.cliente, Pedido.pieza, Pedido.cantidad, Pedido.minutos, Pedido.fecha_entrega,
+                Pedido.estado, Impresora.nombre, Pedido.inicio, Pedido.fin,
+            )
+            .outerjoin(Impresora, Impresora.id == Pedido.impresora_id)
+            .where(Pedido.estado.in_(("pendiente", "imprimiendo")))
+            .order_by(Impresora.nombre, Pedido.inicio, Pedido.id)
+        ).all()
+    return [PedidoPlan(*f) for f in filas]
@@ -0,0 +1,187 @@
+# utils/exportar.py
+"""
+Exportación de entregas (con cliente e ítems) y movimientos a CSV o Parquet, en streaming:
+las filas se leen de a bloques con un cursor del lado del servidor y se escriben a medida
+que llegan, así la memoria no depende del tamaño del historial. Incluye lo archivado
+(utils/archivo.py): se lee de las vistas historico_*.
+
+Por línea de comandos:
+
+    python -m utils.exportar entregas -o entregas.csv
+    python -m utils.exportar movimientos --desde 2025-01-01 --hasta 2025-12-31 -o movs.parquet
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import sys
+import time
+from datetime import date
+from typing import BinaryIO, Iterator, Optional
+
+from sqlalchemy import select
+
+from utils.db_app import Cliente, Entrega, EntregaItem, Movimiento, conexion_historica, init_db, vista_historica
+
+try:  # Parquet es opcional: sólo si pyarrow está instalado.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+TAMANO_BLOQUE = 5000
+
+COLUMNAS_ENTREGAS = [
+    "entrega_id", "fecha", "cliente", "numero", "notas", "descuento", "total",
+    "item_id", "pieza", "cantidad", "precio_unitario", "subtotal",
+]
+COLUMNAS_MOVIMIENTOS = ["id", "fecha", "tipo", "categoria", "monto", "descripcion", "medio"]
+
+# Tipos de cada columna para Parquet (si no, un bloque con todo NULL rompe el esquema).
+TIPOS_COLUMNAS = {
+    "entrega_id": "int64", "item_id": "int64", "id": "int64", "cantidad": "int64",
+    "fecha": "date32",
+    "descuento": "float64", "total": "float64", "precio_unitario": "float64",
+    "subtotal": "float64", "monto": "float64",
+}
+
+
+def parquet_disponible() -> bool:
+    return pa is not None
+
+
+def _bloques(stmt, tamano: int) -> Iterator[list[tuple]]:
+    # Core (sin ORM): las filas no se convierten en objetos, sólo se leen de a `tamano`.
+    with conexion_historica() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=tamano).execute(stmt)
+        yield from resultado.partitions(tamano)
+
+
+def bloques_entregas(
+    desde: Optional[date] = None, hasta: Optional[date] = None, tamano: int = TAMANO_BLOQUE
+) -> Iterator[list[tuple]]:
+    """Una fila por ítem (las entregas sin ítems salen con columnas de ítem vacías)."""
+    e, i = vista_historica(Entrega), vista_historica(EntregaItem)
+    stmt = (
+        select(
+            e.c.id, e.c.fecha, Cliente.nombre, e.c.numero, e.c.notas, e.c.descuento, e.c.total,
+            i.c.id, i.c.pieza, i.c.cantidad, i.c.precio_unitario, i.c.subtotal,
+        )
+        .select_from(e)
+        .outerjoin(Cliente, Cliente.id == e.c.cliente_id)
+        .outerjoin(i, i.c.entrega_id == e.c.id)
+        .order_by(e.c.fecha, e.c.id, i.c.id)
+    )
+    if desde is not None:
+        stmt = stmt.where(e.c.fecha >= desde)
+    if hasta is not None:
+        stmt = stmt.where(e.c.fecha <= hasta)
+    return _bloques(stmt, tamano)
+
+
+def bloques_movimientos(
+    desde: Optional[date] = None, hasta: Optional[date] = None, tamano: int = TAMANO_BLOQUE
+) -> Iterator[list[tuple]]:
+    m = vista_historica(Movimiento).c
+    stmt = select(m.id, m.fecha, m.tipo, m.categoria, m.monto, m.descripcion, m.medio).order_by(m.fecha, m.id)
+    if desde is not None:
+        stmt = stmt.where(m.fecha >= desde)
+    if hasta is not None:
+        stmt = stmt.where(m.fecha <= hasta)
+    return _bloques(stmt, tamano)
+
+
+FUENTES = {
+    "entregas": (bloques_entregas, COLUMNAS_ENTREGAS),
+    "movimientos": (bloques_movimientos, COLUMNAS_MOVIMIENTOS),
+}
+
+
+def csv_en_bloques(bloques: Iterator[list[tuple]], columnas: list[str]) -> Iterator[bytes]:
+    """Genera el CSV (UTF-8 con BOM, para que Excel respete las tildes) de a un bloque por vez."""
+    buf = io.StringIO()
+    escritor = csv.writer(buf)
+    escritor.writerow(columnas)
+    yield ("\ufeff" + buf.getvalue()).encode("utf-8")
+    for bloque in bloques:
+        buf.seek(0)
+        buf.truncate()
+        escritor.writerows(bloque)
+        yield buf.getvalue().encode("utf-8")
+
+
+def escribir_parquet(bloques: Iterator[list[tuple]], columnas: list[str], destino: BinaryIO) -> None:
+    """Escribe un row group por bloque. Requiere pyarrow."""
+    if pa is None:
+        raise RuntimeError("Para exportar a Parquet hace falta instalar pyarrow (ver requirements-extra.txt).")
+    esquema = pa.schema([(c, getattr(pa, TIPOS_COLUMNAS.get(c, "string"))()) for c in columnas])
+    with pq.ParquetWriter(destino, esquema) as writer:
+        for bloque in bloques:
+            writer.write_table(pa.Table.from_pydict(
+                {c: list(v) for c, v in zip(columnas, zip(*bloque))}, schema=esquema
+            ))
+
+
+def exportar(
+    fuente: str,
+    formato: str,
+    destino: BinaryIO,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    tamano: int = TAMANO_BLOQUE,
+) -> int:
+    """Exporta `fuente` ("entregas" / "movimientos") a `destino`. Devuelve la cantidad de filas."""
+    generar, columnas = FUENTES[fuente]
+    filas = 0
+
+    def contar(bloques):
+        nonlocal filas
+        for bloque in bloques:
+            filas += len(bloque)
+            yield bloque
+
+    bloques = contar(generar(desde, hasta, tamano))
+    if formato == "parquet":
+        escribir_parquet(bloques, columnas, destino)
+    else:
+        for trozo in csv_en_bloques(bloques, columnas):
+            destino.write(trozo)
+    return filas
+
+
+def exportar_a_bytes(fuente: str, formato: str, desde: Optional[date] = None, hasta: Optional[date] = None) -> bytes:
+    """
+    Exporta en memoria y devuelve los bytes. Pensado para `st.download_button(data=lambda: ...)`,
+    que lo genera recién al hacer clic: Streamlit sólo acepta bytes, str o BytesIO (no archivos
+    temporales) y de todos modos guarda el archivo entero en memoria para servirlo.
+    Para archivos grandes, la línea de comandos escribe directo a disco.
+    """
+    destino = io.BytesIO()
+    exportar(fuente, formato, destino, desde, hasta)
+    return destino.getvalue()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.exportar")
+    parser.add_argument("fuente", choices=list(FUENTES))
+    parser.add_argument("-o", "--salida", required=True, help="archivo .csv o .parquet")
+    parser.add_argument("--formato", choices=["csv", "parquet"], help="por defecto, según la extensión")
+    parser.add_argument("--desde", type=date.fromisoformat)
+    parser.add_argument("--hasta", type=date.fromisoformat)
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="filas por bloque")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or ("parquet" if args.salida.endswith(".parquet") else "csv")
+    init_db()
+    t0 = time.perf_counter()
+    with open(args.salida, "wb") as f:
+        filas = exportar(args.fuente, formato, f, args.desde, args.hasta, args.bloque)
+    dt = time.perf_counter() - t0
+    print(f"{filas} filas -> {args.salida} en {dt:.2f}s ({filas / dt if dt else 0:,.0f} filas/seg)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
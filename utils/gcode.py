@@ -0,0 +1,398 @@
+# utils/gcode.py
+"""
+Tiempo de impresión y gramos de filamento a partir de un .gcode o un .3mf laminado.
+
+1. Metadatos del laminador (PrusaSlicer / OrcaSlicer / Bambu Studio / Cura / Simplify3D):
+   se buscan en el principio y el final del archivo, sin recorrerlo entero.
+2. Si no están, se simula el G-code línea por línea: tiempo = distancia / feedrate (sin
+   aceleraciones, así que da algo menos que el real) y gramos = largo de filamento
+   extruido × sección × densidad.
+
+La lectura es en streaming (de a bloques del buffer de archivo; mmap para principio/final):
+la memoria no depende del tamaño del archivo. Los resultados se cachean por hash del contenido.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import math
+import mmap
+import re
+import zipfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Union
+
+from utils.cache import CacheTTL
+
+DIAMETRO_DEFAULT = 1.75   # mm
+DENSIDAD_DEFAULT = 1.24   # g/cm³ (PLA)
+
+# Los laminadores escriben los metadatos al principio (Cura) o al final (Prusa/Orca/Bambu).
+BYTES_CABECERA = 64 * 1024
+BYTES_COLA = 512 * 1024
+
+Archivo = Union[str, Path, BinaryIO]
+
+
+@dataclass(frozen=True)
+class AnalisisGcode:
+    segundos: float
+    gramos: float
+    filamento_mm: Optional[float]   # None si los metadatos traían sólo gramos
+    fuente: str                     # "metadatos" o "simulación"
+    bytes: int
+    gramos_estimados: bool = True   # calculados del largo (dependen del diámetro/densidad)
+
+    @property
+    def horas(self) -> int:
+        return round(self.segundos / 60) // 60
+
+    @property
+    def minutos(self) -> int:
+        return round(self.segundos / 60) % 60
+
+
+def gramos_de_filamento(largo_mm: float, diametro_mm: float = DIAMETRO_DEFAULT, densidad: float = DENSIDAD_DEFAULT) -> float:
+    seccion_mm2 = math.pi * (diametro_mm / 2) ** 2
+    return largo_mm * seccion_mm2 * densidad / 1000  # mm³ -> cm³
+
+
+# --------- METADATOS ---------
+
+_DURACION = re.compile(r"(?:(\d+)\s*d)?\s*(?:(\d+)\s*h)?\s*(?:(\d+)\s*m(?!m))?\s*(?:(\d+)\s*s)?")
+
+
+def _duracion_a_segundos(texto: str) -> Optional[float]:
+    """'1d 2h 3m 4s' / '2h 3m' / '45m 10s' -> segundos."""
+    m = _DURACION.search(texto.strip())
+    if not m or not any(m.groups()):
+        return None
+    d, h, mi, s = (int(g or 0) for g in m.groups())
+    return float(((d * 24 + h) * 60 + mi) * 60 + s)
+
+
+_RE_TIEMPO = [
+    # PrusaSlicer / SuperSlicer
+    (re.compile(rb"^;\s*estimated printing time \(normal mode\)\s*=\s*(.+)$", re.M), _duracion_a_segundos),
+    # OrcaSlicer / Bambu Studio
+    (re.compile(rb"^;\s*total estimated time:\s*(.+)$", re.M), _duracion_a_segundos),
+    (re.compile(rb"^;\s*model printing time:\s*([^;]+)", re.M), _duracion_a_segundos),
+    # Cura
+    (re.compile(rb"^;TIME:(\d+(?:\.\d+)?)\s*$", re.M), float),
+    # Simplify3D: ";   Build time: 1 hours 2 minutes"
+    (re.compile(rb"^;\s*Build time:\s*(\d+) hours? (\d+) minutes?", re.M),
+     None),
+]
+# Con varios extrusores vienen separados por coma: "= 12.3, 4.5".
+_RE_GRAMOS = [
+    re.compile(rb"^;\s*total filament used \[g\]\s*=\s*([\d., ]+)", re.M),   # Prusa (multi-material)
+    re.compile(rb"^;\s*filament used \[g\]\s*=\s*([\d., ]+)", re.M),         # Prusa / Orca
+    re.compile(rb"^;\s*total filament weight \[g\]\s*:\s*([\d., ]+)", re.M), # Orca / Bambu
+    re.compile(rb"^;\s*Plastic weight:\s*([\d.]+)\s*g", re.M),               # Simplify3D
+]
+_RE_LARGO = [
+    (re.compile(rb"^;\s*filament used \[mm\]\s*=\s*([\d., ]+)", re.M), 1.0),  # Prusa / Orca
+    (re.compile(rb"^;Filament used:\s*([\d.]+)m\s*$", re.M), 1000.0),         # Cura (metros)
+]
+
+
+def _sumar_lista(texto: bytes) -> float:
+    return sum(float(x) for x in texto.replace(b",", b" ").split())
+
+
+def metadatos(fragmentos: Iterable[bytes], diametro_mm: float = DIAMETRO_DEFAULT, densidad: float = DENSIDAD_DEFAULT
+              ) -> Optional[tuple[float, float, Optional[float], bool]]:
+    """
+    (segundos, gramos, largo_mm, gramos_estimados) si los comentarios del laminador traen
+    tiempo y filamento (en gramos o, como Cura, sólo el largo).
+    """
+    segundos = gramos = largo = None
+    for texto in fragmentos:
+        if segundos is None:
+            for patron, convertir in _RE_TIEMPO:
+                m = patron.search(texto)
+                if m:
+                    if convertir is None:
+                        segundos = (int(m.group(1)) * 60 + int(m.group(2))) * 60.0
+                    else:
+                        segundos = convertir(m.group(1).decode("ascii", "replace"))
+                    if segundos is not None:
+                        break
+        if gramos is None:
+            for patron in _RE_GRAMOS:
+                m = patron.search(texto)
+                if m:
+                    gramos = _sumar_lista(m.group(1))
+                    break
+        if largo is None:
+            for patron, factor in _RE_LARGO:
+                m = patron.search(texto)
+                if m:
+                    largo = _sumar_lista(m.group(1)) * factor
+                    break
+    if segundos is None or (gramos is None and largo is None):
+        return None
+    if gramos is None:
+        return segundos, gramos_de_filamento(largo, diametro_mm, densidad), largo, True
+    return segundos, gramos, largo, False
+
+
+# --------- SIMULACIÓN ---------
+
+def simular(lineas: Iterable[bytes]) -> tuple[float, float]:
+    """
+    Recorre los movimientos y devuelve (segundos, mm de filamento). Tiene en cuenta G90/G91,
+    M82/M83, G92, arcos G2/G3 y pausas G4. Las líneas que no son G/M (comentarios, etc.)
+    se descartan enseguida.
+    """
+    x = y = z = e = 0.0
+    f = 1800.0                      # mm/min
+    absoluto = True
+    e_absoluto = True
+    segundos = 0.0
+    filamento = 0.0
+    G, M = 71, 77                   # ord("G"), ord("M")
+    sqrt, atan2 = math.sqrt, math.atan2
+
+    for linea in lineas:
+        partes = linea.split()
+        if not partes:
+            continue
+        cmd = partes[0]
+        c = cmd[0]
+        if c != G and c != M:
+            continue
+
+        # Camino rápido: "G1 Xn Yn En", la enorme mayoría de las líneas de un G-code laminado.
+        if cmd == b"G1" and absoluto and len(partes) == 4:
+            px, py, pe = partes[1], partes[2], partes[3]
+            if px[0] == 88 and py[0] == 89 and pe[0] == 69:
+                try:
+                    nx, ny, v = float(px[1:]), float(py[1:]), float(pe[1:])
+                except ValueError:
+                    pass
+                else:
+                    dx, dy = nx - x, ny - y
+                    dist = sqrt(dx * dx + dy * dy)
+                    if e_absoluto:
+                        v, e = v - e, v
+                    segundos += (dist or abs(v)) / f * 60
+                    filamento += v
+                    x, y = nx, ny
+                    continue
+
+        corte = linea.find(b";")
+        if corte != -1:
+            partes = linea[:corte].split()
+            if not partes:
+                continue
+            cmd = partes[0]
+
+        if cmd in (b"G1", b"G0", b"G2", b"G3"):
+            nx, ny, nz, ne = x, y, z, e
+            i = j = 0.0
+            de = 0.0
+            for p in partes[1:]:
+                letra = p[0]
+                try:
+                    v = float(p[1:])
+                except ValueError:
+                    continue
+                if letra == 88:      # X
+                    nx = v if absoluto else x + v
+                elif letra == 89:    # Y
+                    ny = v if absoluto else y + v
+                elif letra == 69:    # E
+                    if e_absoluto:
+                        de = v - e
+                        ne = v
+                    else:
+                        de = v
+                elif letra == 70:    # F
+                    if v > 0:
+                        f = v
+                elif letra == 90:    # Z
+                    nz = v if absoluto else z + v
+                elif letra == 73:    # I
+                    i = v
+                elif letra == 74:    # J
+                    j = v
+            dx, dy, dz = nx - x, ny - y, nz - z
+            if cmd in (b"G2", b"G3") and (i or j):
+                radio = sqrt(i * i + j * j)
+                cx, cy = x + i, y + j
+                a0 = atan2(y - cy, x - cx)
+                a1 = atan2(ny - cy, nx - cx)
+                angulo = (a0 - a1) if cmd == b"G2" else (a1 - a0)
+                if angulo <= 0:
+                    angulo += 2 * math.pi
+                dist = sqrt((radio * angulo) ** 2 + dz * dz)
+            else:
+                dist = sqrt(dx * dx + dy * dy + dz * dz)
+            if dist == 0.0:
+                dist = abs(de)       # retracción / purga sin movimiento
+            segundos += dist / f * 60
+            filamento += de
+            x, y, z = nx, ny, nz
+            if e_absoluto:
+                e = ne
+        elif cmd == b"G92":
+            for p in partes[1:]:
+                letra = p[0]
+                try:
+                    v = float(p[1:])
+                except ValueError:
+                    continue
+                if letra == 69:
+                    e = v
+                elif letra == 88:
+                    x = v
+                elif letra == 89:
+                    y = v
+                elif letra == 90:
+                    z = v
+        elif cmd == b"G90":
+            absoluto = e_absoluto = True
+        elif cmd == b"G91":
+            absoluto = e_absoluto = False
+        elif cmd == b"M82":
+            e_absoluto = True
+        elif cmd == b"M83":
+            e_absoluto = False
+        elif cmd == b"G4":
+            for p in partes[1:]:
+                try:
+                    if p[0] == 80:       # P: milisegundos
+                        segundos += float(p[1:]) / 1000
+                    elif p[0] == 83:     # S: segundos
+                        segundos += float(p[1:])
+                except ValueError:
+                    pass
+        elif cmd == b"G28":
+            x = y = z = 0.0
+    return segundos, max(filamento, 0.0)
+
+
+# --------- ENTRADA: .gcode / .3mf ---------
+
+def _cabeza_y_cola(buf) -> list[bytes]:
+    n = len(buf)
+    if n <= BYTES_CABECERA + BYTES_COLA:
+        return [bytes(buf)]
+    return [bytes(buf[:BYTES_CABECERA]), bytes(buf[n - BYTES_COLA:])]
+
+
+def _analizar_flujo(crudo: BinaryIO, tamano: int, fragmentos: list[bytes], diametro_mm: float, densidad: float) -> AnalisisGcode:
+    meta = metadatos(fragmentos, diametro_mm, densidad)
+    if meta is not None:
+        return AnalisisGcode(meta[0], meta[1], meta[2], "metadatos", tamano, meta[3])
+    crudo.seek(0)
+    segundos, largo = simular(crudo)  # iterar un archivo binario lee de a bloques, línea por línea
+    return AnalisisGcode(segundos, gramos_de_filamento(largo, diametro_mm, densidad), largo, "simulación", tamano)
+
+
+def _slice_info(zf: zipfile.ZipFile) -> Optional[tuple[float, float]]:
+    """3mf de Bambu/Orca: Metadata/slice_info.config trae prediction (s) y weight (g) por placa."""
+    try:
+        texto = zf.read("Metadata/slice_info.config").decode("utf-8", "replace")
+    except KeyError:
+        return None
+    pred = [float(v) for v in re.findall(r'key="prediction"\s+value="([\d.]+)"', texto)]
+    peso = [float(v) for v in re.findall(r'key="weight"\s+value="([\d.]+)"', texto)]
+    if not pred or not peso:
+        return None
+    return sum(pred), sum(peso)
+
+
+def _analizar_3mf(crudo: BinaryIO, tamano: int, diametro_mm: float, densidad: float) -> AnalisisGcode:
+    with zipfile.ZipFile(crudo) as zf:
+        info = _slice_info(zf)
+        if info is not None:
+            return AnalisisGcode(info[0], info[1], None, "metadatos", tamano, gramos_estimados=False)
+        gcodes = [n for n in zf.namelist() if n.lower().endswith(".gcode")]
+        if not gcodes:
+            raise ValueError("El .3mf no tiene G-code laminado: exportalo laminado (\"gcode.3mf\") o subí el .gcode.")
+        # Dentro del zip no hay acceso directo a la cola: se mira la cabecera y si no, se simula.
+        with zf.open(gcodes[0]) as g:
+            meta = metadatos([g.read(BYTES_CABECERA)], diametro_mm, densidad)
+        if meta is not None:
+            return AnalisisGcode(meta[0], meta[1], meta[2], "metadatos", tamano, meta[3])
+        with zf.open(gcodes[0]) as g:
+            segundos, largo = simular(io.BufferedReader(g, 1 << 20))
+    return AnalisisGcode(segundos, gramos_de_filamento(largo, diametro_mm, densidad), largo, "simulación", tamano)
+
+
+def analizar(archivo: Archivo, diametro_mm: float = DIAMETRO_DEFAULT, densidad: float = DENSIDAD_DEFAULT,
+             nombre: str = "") -> AnalisisGcode:
+    """Analiza un .gcode o .3mf (ruta o archivo abierto en binario, p.ej. de st.file_uploader)."""
+    if isinstance(archivo, (str, Path)):
+        nombre = nombre or str(archivo)
+        with open(archivo, "rb", buffering=1 << 20) as f:
+            tamano = Path(archivo).stat().st_size
+            if nombre.lower().endswith(".3mf"):
+                return _analizar_3mf(f, tamano, diametro_mm, densidad)
+            if tamano == 0:
+                return AnalisisGcode(0.0, 0.0, 0.0, "simulación", 0)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                fragmentos = _cabeza_y_cola(mm)
+            return _analizar_flujo(f, tamano, fragmentos, diametro_mm, densidad)
+
+    nombre = nombre or getattr(archivo, "name", "")
+    archivo.seek(0, io.SEEK_END)
+    tamano = archivo.tell()
+    archivo.seek(0)
+    if nombre.lower().endswith(".3mf"):
+        return _analizar_3mf(archivo, tamano, diametro_mm, densidad)
+    fragmentos = [archivo.read(BYTES_CABECERA)]
+    if tamano > BYTES_CABECERA + BYTES_COLA:
+        archivo.seek(tamano - BYTES_COLA)
+        fragmentos.append(archivo.read())
+    elif tamano > BYTES_CABECERA:
+        fragmentos = [fragmentos[0] + archivo.read()]
+    return _analizar_flujo(archivo, tamano, fragmentos, diametro_mm, densidad)
+
+
+# --------- CACHÉ POR CONTENIDO ---------
+
+# Volver a subir el mismo archivo (o el mismo G-code con otro nombre) no lo vuelve a analizar.
+_cache_analisis = CacheTTL(maxsize=64, ttl=24 * 3600)
+
+
+def hash_archivo(archivo: Archivo, bloque: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    if isinstance(archivo, (str, Path)):
+        with open(archivo, "rb", buffering=1 << 20) as f:
+            while trozo := f.read(bloque):
+                h.update(trozo)
+        return h.hexdigest()
+    if hasattr(archivo, "getbuffer"):  # BytesIO / UploadedFile: ya está en memoria, sin copiar
+        h.update(archivo.getbuffer())
+        return h.hexdigest()
+    archivo.seek(0)
+    while trozo := archivo.read(bloque):
+        h.update(trozo)
+    archivo.seek(0)
+    return h.hexdigest()
+
+
+def analizar_cacheado(archivo: Archivo, diametro_mm: float = DIAMETRO_DEFAULT, densidad: float = DENSIDAD_DEFAULT,
+                      nombre: str = "") -> AnalisisGcode:
+    nombre = nombre or str(getattr(archivo, "name", archivo))
+    clave = (hash_archivo(archivo), nombre.lower().endswith(".3mf"))
+    encontrado, base = _cache_analisis.get(clave)
+    if not encontrado:
+        base = analizar(archivo, nombre=nombre)  # con diámetro/densidad default; se ajusta abajo
+        _cache_analisis.set(clave, base)
+    return _con_filamento(base, diametro_mm, densidad)
+
+
+def _con_filamento(r: AnalisisGcode, diametro_mm: float, densidad: float) -> AnalisisGcode:
+    """Recalcula los gramos para otro filamento sin volver a leer el archivo (si se conoce el largo)."""
+    if not r.gramos_estimados or r.filamento_mm is None or (diametro_mm, densidad) == (DIAMETRO_DEFAULT, DENSIDAD_DEFAULT):
+        return r
+    return replace(r, gramos=gramos_de_filamento(r.filamento_mm, diametro_mm, densidad))
+
+
+def cache_gcode_stats() -> dict:
+    return _cache_analisis.stats()
@@ -0,0 +1,344 @@
+# utils/importar.py
+"""
+Importación de extractos bancarios / de Mercado Pago (CSV o XLSX) a `movimientos`.
+
+El archivo se lee en streaming y se inserta de a lotes (executemany) en una sola transacción.
+Cada fila importada guarda un hash de su contenido en `movimientos.hash_importacion` (con
+índice único): al reimportar el mismo extracto las filas que ya están se omiten, así que
+importar dos veces es lo mismo que importar una.
+
+Por línea de comandos:
+
+    python -m utils.importar extracto.csv --medio "Mercado Pago"
+    python -m utils.importar resumen.xlsx --medio transferencia --categoria Banco
+"""
+from __future__ import annotations
+
+import argparse
+import codecs
+import csv
+import hashlib
+import io
+import re
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+from sqlalchemy import insert, select
+
+from utils.db_app import Movimiento, conexion_historica, init_db, normalizar_nombre, vista_historica
+
+try:  # XLSX es opcional: sólo si openpyxl está instalado.
+    import openpyxl
+except ImportError:  # pragma: no cover
+    openpyxl = None
+
+TAMANO_LOTE = 1000
+CATEGORIA_DEFAULT = "Sin categoría"
+
+# Nombres de columna habituales en los extractos (normalizados: minúsculas y sin tildes).
+# "monto" con signo, o bien "debito"/"credito" en columnas separadas.
+SINONIMOS = {
+    "fecha": ("fecha", "fecha operacion", "fecha de operacion", "fecha movimiento", "fecha valor",
+              "date", "release_date", "fecha de liberacion"),
+    "descripcion": ("descripcion", "concepto", "detalle", "referencia", "description",
+                    "transaction_type", "movimiento"),
+    "monto": ("monto", "importe", "amount", "valor", "transaction_net_amount", "net_amount", "monto neto"),
+    "debito": ("debito", "debitos", "debe", "egreso", "egresos", "retiro"),
+    "credito": ("credito", "creditos", "haber", "ingreso", "ingresos", "deposito"),
+    "categoria": ("categoria", "rubro", "category"),
+}
+CAMPOS = tuple(SINONIMOS)
+
+# Algunos bancos ponen unas líneas de encabezado antes de la tabla.
+MAX_FILAS_PREAMBULO = 20
+
+FORMATOS_FECHA = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y", "%d.%m.%Y")
+
+Archivo = Union[str, Path, BinaryIO]
+
+
+@dataclass
+class ResultadoImportacion:
+    insertados: int = 0
+    omitidos: int = 0    # ya importados antes (mismo hash)
+    invalidos: int = 0   # sin fecha o monto legibles, o monto 0
+    segundos: float = 0.0
+
+    @property
+    def leidos(self) -> int:
+        return self.insertados + self.omitidos + self.invalidos
+
+
+def xlsx_disponible() -> bool:
+    return openpyxl is not None
+
+
+# --------- LECTURA ---------
+
+def _abrir(archivo: Archivo) -> tuple[BinaryIO, str, bool]:
+    """(flujo binario, nombre, hay_que_cerrarlo). Acepta ruta o archivo abierto (p.ej. un st.file_uploader)."""
+    if isinstance(archivo, (str, Path)):
+        return open(archivo, "rb"), str(archivo), True
+    archivo.seek(0)  # en Streamlit el mismo archivo se vuelve a leer en cada rerun
+    return archivo, getattr(archivo, "name", ""), False
+
+
+def _separador(muestra: str) -> str:
+    """
+    El separador que aparece la misma cantidad de veces en más líneas. (csv.Sniffer se
+    confunde con el preámbulo de los bancos y con las comas decimales.)
+    """
+    lineas = muestra.splitlines()[:50]
+    mejor, puntaje = ",", 0
+    for sep in (";", ",", "\t", "|"):
+        cuentas = Counter(n for n in (l.count(sep) for l in lineas) if n)
+        if cuentas and cuentas.most_common(1)[0][1] > puntaje:
+            mejor, puntaje = sep, cuentas.most_common(1)[0][1]
+    return mejor
+
+
+def _filas_csv(crudo: BinaryIO) -> Iterator[list]:
+    muestra = crudo.read(64 * 1024)
+    crudo.seek(0)
+    try:
+        # Incremental: la muestra puede cortar un carácter multibyte al final.
+        codecs.getincrementaldecoder("utf-8")().decode(muestra, final=False)
+        codificacion = "utf-8-sig"
+    except UnicodeDecodeError:
+        codificacion = "cp1252"  # exportaciones de Excel / home banking
+    separador = _separador(muestra.decode(codificacion, errors="replace"))
+    texto = io.TextIOWrapper(crudo, encoding=codificacion, errors="replace", newline="")
+    try:
+        yield from csv.reader(texto, delimiter=separador)
+    finally:
+        texto.detach()  # no cerrar el archivo del llamador
+
+
+def _filas_xlsx(crudo: BinaryIO) -> Iterator[tuple]:
+    if openpyxl is None:
+        raise RuntimeError("Para importar XLSX hace falta instalar openpyxl (ver requirements-extra.txt).")
+    libro = openpyxl.load_workbook(crudo, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def detectar_mapeo(encabezado: list) -> dict[str, int]:
+    """{campo: índice de columna} según los nombres habituales. Vacío si no parece un encabezado."""
+    normalizados = [normalizar_nombre(str(c or "")) for c in encabezado]
+    mapeo = {}
+    for campo, nombres in SINONIMOS.items():
+        for i, col in enumerate(normalizados):
+            if col in nombres:
+                mapeo[campo] = i
+                break
+    return mapeo
+
+
+def _mapeo_completo(mapeo: dict) -> bool:
+    return "fecha" in mapeo and ("monto" in mapeo or "debito" in mapeo or "credito" in mapeo)
+
+
+def _con_encabezado(filas: Iterator, mapeo: Optional[dict[str, str]]) -> tuple[list[str], dict[str, int], Iterator]:
+    """Saltea el preámbulo hasta el encabezado. `mapeo` ({campo: nombre de columna}) pisa la detección."""
+    for _ in range(MAX_FILAS_PREAMBULO):
+        fila = next(filas, None)
+        if fila is None:
+            break
+        encabezado = ["" if c is None else str(c).strip() for c in fila]
+        indices = detectar_mapeo(encabezado)
+        if mapeo:
+            indices.update({campo: encabezado.index(col) for campo, col in mapeo.items() if col in encabezado})
+        if _mapeo_completo(indices):
+            return encabezado, indices, filas
+    raise ValueError(
+        "No encontré el encabezado del extracto: hace falta una columna de fecha y una de monto "
+        "(o débito/crédito)."
+    )
+
+
+def leer_encabezado(archivo: Archivo) -> tuple[list[str], dict[str, str]]:
+    """Columnas del extracto y el mapeo detectado ({campo: nombre de columna}), para mostrarlo/ajustarlo."""
+    crudo, nombre, cerrar = _abrir(archivo)
+    try:
+        filas = _filas_xlsx(crudo) if nombre.lower().endswith(".xlsx") else _filas_csv(crudo)
+        encabezado, indices, _ = _con_encabezado(filas, None)
+        return encabezado, {campo: encabezado[i] for campo, i in indices.items()}
+    finally:
+        if cerrar:
+            crudo.close()
+        else:
+            crudo.seek(0)
+
+
+# --------- NORMALIZACIÓN ---------
+
+def a_numero(valor) -> Optional[float]:
+    """'1.234,56' / '1,234.56' / '-$ 500' / '(300,00)' / 12.5 -> float. None si no es un número."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    texto = str(valor).strip().replace("$", "").replace(" ", "").replace("\xa0", "")
+    negativo = texto.startswith("(") and texto.endswith(")")
+    texto = texto.strip("()")
+    if "," in texto and "." in texto:
+        # El separador decimal es el que aparece último.
+        miles, decimal = (".", ",") if texto.rfind(",") > texto.rfind(".") else (",", ".")
+        texto = texto.replace(miles, "").replace(decimal, ".")
+    elif "," in texto:
+        texto = texto.replace(",", ".") if texto.count(",") == 1 else texto.replace(",", "")
+    elif texto.count(".") > 1:
+        texto = texto.replace(".", "")
+    try:
+        numero = float(texto)
+    except ValueError:
+        return None
+    return -numero if negativo else numero
+
+
+_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def a_fecha(valor) -> Optional[date]:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or "").strip()
+    if _ISO.match(texto):  # "2025-03-01T10:22:00.000-03:00" (Mercado Pago)
+        texto = texto[:10]
+    else:
+        texto = texto.split(" ")[0]
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def clave_contenido(fecha: date, monto: float, descripcion: str, medio: str) -> str:
+    """Lo que identifica a una transacción del extracto (el medio distingue banco de billetera)."""
+    return f"{fecha.isoformat()}|{monto:.2f}|{normalizar_nombre(descripcion)}|{normalizar_nombre(medio)}"
+
+
+def hash_importacion(clave: str, ocurrencia: int) -> str:
+    # `ocurrencia` numera filas idénticas dentro del mismo extracto (dos cafés iguales el mismo día
+    # son dos movimientos): reimportar da los mismos hashes y las dos se conservan.
+    return hashlib.sha1(f"{clave}|{ocurrencia}".encode("utf-8")).hexdigest()
+
+
+def _celda(fila, indices: dict[str, int], campo: str):
+    i = indices.get(campo)
+    return fila[i] if i is not None and i < len(fila) else None
+
+
+def _movimientos(filas: Iterator, indices: dict[str, int], medio: str, categoria: str, resultado: ResultadoImportacion) -> Iterator[dict]:
+    vistas: Counter[str] = Counter()
+    for fila in filas:
+        if not fila or all(c in (None, "") for c in fila):
+            continue
+        fecha = a_fecha(_celda(fila, indices, "fecha"))
+        if "monto" in indices:
+            monto = a_numero(_celda(fila, indices, "monto"))
+        else:
+            credito = a_numero(_celda(fila, indices, "credito"))
+            debito = a_numero(_celda(fila, indices, "debito"))
+            monto = None if credito is None and debito is None else (credito or 0.0) - abs(debito or 0.0)
+        if fecha is None or not monto:
+            resultado.invalidos += 1
+            continue
+        descripcion = str(_celda(fila, indices, "descripcion") or "").strip()[:300]
+        clave = clave_contenido(fecha, monto, descripcion, medio)
+        vistas[clave] += 1
+        yield {
+            "fecha": fecha,
+            "tipo": "Ingreso" if monto > 0 else "Gasto",
+            "categoria": str(_celda(fila, indices, "categoria") or "").strip()[:100] or categoria,
+            "monto": round(abs(monto), 2),
+            "descripcion": descripcion,
+            "medio": medio,
+            "hash_importacion": hash_importacion(clave, vistas[clave]),
+        }
+
+
+def _lotes(it: Iterator[dict], tamano: int) -> Iterator[list[dict]]:
+    lote = []
+    for mov in it:
+        lote.append(mov)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# --------- IMPORTACIÓN ---------
+
+def importar_movimientos(
+    archivo: Archivo,
+    medio: str = "transferencia",
+    categoria: str = CATEGORIA_DEFAULT,
+    mapeo: Optional[dict[str, str]] = None,
+    tamano: int = TAMANO_LOTE,
+) -> ResultadoImportacion:
+    """
+    Importa un extracto CSV/XLSX. `mapeo` ({campo: nombre de columna}) reemplaza la detección
+    automática de columnas; `categoria` se usa cuando el extracto no trae una.
+    """
+    init_db()
+    t0 = time.perf_counter()
+    resultado = ResultadoImportacion()
+    crudo, nombre, cerrar = _abrir(archivo)
+    try:
+        filas = _filas_xlsx(crudo) if nombre.lower().endswith(".xlsx") else _filas_csv(crudo)
+        _encabezado, indices, filas = _con_encabezado(filas, mapeo)
+        # Los hashes se buscan también en lo archivado: reimportar un extracto viejo no duplica.
+        historico = vista_historica(Movimiento)
+        with conexion_historica(escritura=True) as conn, conn.begin():
+            for lote in _lotes(_movimientos(filas, indices, medio, categoria, resultado), tamano):
+                existentes = set(conn.execute(
+                    select(historico.c.hash_importacion)
+                    .where(historico.c.hash_importacion.in_([m["hash_importacion"] for m in lote]))
+                ).scalars())
+                nuevos = [m for m in lote if m["hash_importacion"] not in existentes]
+                if nuevos:
+                    conn.execute(insert(Movimiento), nuevos)
+                resultado.insertados += len(nuevos)
+                resultado.omitidos += len(lote) - len(nuevos)
+    finally:
+        if cerrar:
+            crudo.close()
+    resultado.segundos = time.perf_counter() - t0
+    return resultado
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.importar")
+    parser.add_argument("archivo", help="extracto .csv o .xlsx")
+    parser.add_argument("--medio", default="transferencia")
+    parser.add_argument("--categoria", default=CATEGORIA_DEFAULT, help="si el extracto no trae categoría")
+    for campo in CAMPOS:
+        parser.add_argument(f"--col-{campo}", metavar="COLUMNA", help=f"columna de {campo} (por defecto, se detecta)")
+    args = parser.parse_args(argv)
+
+    mapeo = {c: getattr(args, f"col_{c}") for c in CAMPOS if getattr(args, f"col_{c}")}
+    try:
+        r = importar_movimientos(args.archivo, args.medio, args.categoria, mapeo or None)
+    except (ValueError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{r.insertados} insertados, {r.omitidos} ya estaban, {r.invalidos} inválidos "
+          f"en {r.segundos:.2f}s ({r.leidos / r.segundos if r.segundos else 0:,.0f} filas/seg)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
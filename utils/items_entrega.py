@@ -0,0 +1,101 @@
+# utils/items_entrega.py
+from __future__ import annotations
+
+import math
+from typing import Any, Optional
+
+FILA_VACIA = {"pieza": "", "cantidad": 1, "precio_unitario": 0.0}
+
+
+def _num(valor: Any, tipo=float):
+    """Convierte celdas del editor (None / NaN / str) a número; vacío -> 0."""
+    try:
+        x = float(valor)
+    except (TypeError, ValueError):
+        return tipo(0)
+    return tipo(0) if math.isnan(x) else tipo(x)
+
+
+def subtotal(fila: dict) -> float:
+    return _num(fila.get("cantidad"), int) * _num(fila.get("precio_unitario"))
+
+
+def _pieza(fila: dict) -> str:
+    pieza = fila.get("pieza")
+    return pieza.strip() if isinstance(pieza, str) else ""
+
+
+def item_valido(fila: dict) -> Optional[dict]:
+    """Normaliza una fila del editor; None si no tiene pieza o cantidad > 0."""
+    pieza = _pieza(fila)
+    cantidad = _num(fila.get("cantidad"), int)
+    if not pieza or cantidad <= 0:
+        return None
+    return {"pieza": pieza, "cantidad": cantidad, "precio_unitario": _num(fila.get("precio_unitario"))}
+
+
+class ItemsEditor:
+    """
+    Total e ítems de la grilla de piezas calculados a partir del delta de `st.data_editor`
+    (`edited_rows` / `added_rows` / `deleted_rows`) en lugar de recorrer todo el DataFrame.
+
+    Las filas base y sus subtotales se calculan una sola vez; cada rerun sólo mira las filas
+    tocadas. Cuando el delta crece mucho (p.ej. se pegaron cientos de filas), `compactar`
+    lo incorpora a la base para que las ediciones siguientes vuelvan a ser O(cambios).
+    """
+
+    def __init__(self, filas: Optional[list[dict]] = None):
+        self.filas = filas if filas is not None else [dict(FILA_VACIA)]
+        self.subtotales = [subtotal(f) for f in self.filas]
+        self.total_base = sum(self.subtotales)
+
+    @staticmethod
+    def tamano_delta(delta: dict) -> int:
+        return len(delta.get("edited_rows", {})) + len(delta.get("added_rows", [])) + len(delta.get("deleted_rows", []))
+
+    def total(self, delta: dict) -> tuple[float, int]:
+        """Devuelve (total $, cantidad de filas) aplicando el delta sobre la base."""
+        borradas = set(delta.get("deleted_rows", []))
+        agregadas = delta.get("added_rows", [])
+        total = self.total_base
+        for idx in borradas:
+            total -= self.subtotales[idx]
+        for idx, cambios in delta.get("edited_rows", {}).items():
+            idx = int(idx)
+            if idx in borradas:
+                continue
+            total += subtotal({**self.filas[idx], **cambios}) - self.subtotales[idx]
+        for fila in agregadas:
+            total += subtotal(fila)
+        return total, len(self.filas) - len(borradas) + len(agregadas)
+
+    def filas_actuales(self, delta: dict) -> list[dict]:
+        borradas = set(delta.get("deleted_rows", []))
+        editadas = {int(k): v for k, v in delta.get("edited_rows", {}).items()}
+        filas = [
+            {**fila, **editadas[idx]} if idx in editadas else fila
+            for idx, fila in enumerate(self.filas)
+            if idx not in borradas
+        ]
+        filas.extend(dict(f) for f in delta.get("added_rows", []))
+        return filas
+
+    def items_validos(self, delta: dict) -> list[dict]:
+        return [it for it in map(item_valido, self.filas_actuales(delta)) if it is not None]
+
+    def compactar(self, delta: dict) -> "ItemsEditor":
+        return ItemsEditor(self.filas_actuales(delta))
+
+    def agregar(self, delta: dict, fila: dict) -> "ItemsEditor":
+        """Compacta el delta y agrega `fila` (descartando filas todavía vacías)."""
+        return ItemsEditor([f for f in self.filas_actuales(delta) if _pieza(f)] + [fila])
+
+    def con_precios(self, delta: dict, precios: dict[str, float]) -> "ItemsEditor":
+        """Compacta el delta poniendo el precio de `precios` ({pieza: precio}) en las filas sin precio."""
+        filas = []
+        for fila in self.filas_actuales(delta):
+            pieza = _pieza(fila)
+            if pieza in precios and _num(fila.get("precio_unitario")) == 0:
+                fila = {**fila, "precio_unitario": round(precios[pieza], 2)}
+            filas.append(fila)
+        return ItemsEditor(filas)
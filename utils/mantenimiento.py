@@ -0,0 +1,215 @@
+# utils/mantenimiento.py
+"""
+Tareas de mantenimiento de la base, por línea de comandos:
+
+    python -m utils.mantenimiento migrar
+    python -m utils.mantenimiento verificar-indices
+    python -m utils.mantenimiento reconstruir-resumen
+    python -m utils.mantenimiento verificar-resumen
+    python -m utils.mantenimiento reconstruir-stats-clientes
+    python -m utils.mantenimiento verificar-stats-clientes
+    python -m utils.mantenimiento archivar --meses 24
+    python -m utils.mantenimiento estado-archivo
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date
+
+from sqlalchemy import event
+
+from utils import db_app
+from utils.archivo import ArchivoError, archivar, corte_por_meses, estado_archivo
+from utils.config import CONFIG_DEFAULT
+from utils.db_app import (
+    MIGRACIONES,
+    MigracionError,
+    engine,
+    init_db,
+    reconstruir_resumen_movimientos,
+    reconstruir_stats_clientes,
+    verificar_resumen_movimientos,
+    verificar_stats_clientes,
+    version_schema,
+)
+
+# Consultas de las pantallas que tienen que resolverse con índices: nombre -> (función, pasos permitidos).
+# - Las búsquedas de clientes ordenan por relevancia sólo las filas que coinciden (TEMP B-TREE esperado).
+# - Con 1-2 letras, después del prefijo por índice se completa con un "contiene" (LIKE '%q%' con LIMIT).
+# - Las piezas de una página de entregas se numeran con una ventana: se ordenan sólo esas filas.
+CONSULTAS_CLAVE = {
+    "search_clientes (FTS)": (lambda: db_app.search_clientes.__wrapped__("cliente"), ("TEMP B-TREE",)),
+    "search_clientes (prefijo)": (lambda: db_app.search_clientes.__wrapped__("cl"), ("TEMP B-TREE", "SCAN clientes")),
+    "get_cliente_by_nombre": (lambda: db_app.get_cliente_by_nombre.__wrapped__("Cliente"), ()),
+    "buscar_entregas": (lambda: db_app.buscar_entregas(limit=50, antes=(date.today(), 10**9)), ("TEMP B-TREE",)),
+    "buscar_entregas (cliente)": (lambda: db_app.buscar_entregas(limit=50, cliente="Cliente"), ()),
+    "buscar_movimientos": (lambda: db_app.buscar_movimientos(limit=50, antes=(date.today(), 10**9)), ()),
+    "buscar_movimientos (tipo)": (lambda: db_app.buscar_movimientos(limit=50, tipo="Gasto"), ()),
+    "buscar_movimientos (categoría)": (lambda: db_app.buscar_movimientos(limit=50, categoria="Ventas"), ()),
+    "resumen_movimientos": (lambda: db_app.resumen_movimientos(desde_mes="2024-01"), ()),
+    "precios_piezas": (lambda: db_app.precios_piezas(["Pieza"], CONFIG_DEFAULT), ()),
+    "estadisticas_cliente": (lambda: db_app.estadisticas_cliente.__wrapped__(1), ()),
+    "ranking_clientes (total)": (lambda: db_app.ranking_clientes.__wrapped__("total"), ()),
+    "ranking_clientes (entregas)": (lambda: db_app.ranking_clientes.__wrapped__("entregas"), ()),
+    "ranking_clientes (última)": (lambda: db_app.ranking_clientes.__wrapped__("ultima_fecha"), ()),
+}
+
+
+def plan_consulta(nombre: str) -> list[tuple[str, list[str]]]:
+    """
+    Ejecuta la consulta clave `nombre` capturando el SQL real que emite y devuelve su
+    EXPLAIN QUERY PLAN: [(sql, [detalle, ...]), ...].
+    """
+    capturadas: list[tuple[str, object]] = []
+
+    def capturar(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        CONSULTAS_CLAVE[nombre][0]()
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+    with engine.connect() as conn:
+        return [
+            (sql, [fila[-1] for fila in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params)])
+            for sql, params in capturadas
+        ]
+
+
+def planes_consultas_clave() -> dict[str, list[tuple[str, list[str]]]]:
+    """EXPLAIN QUERY PLAN de todas las consultas clave: {nombre: [(sql, [detalle, ...]), ...]}."""
+    return {nombre: plan_consulta(nombre) for nombre in CONSULTAS_CLAVE}
+
+
+def problemas_de_plan(detalles: list[str], permitidos: tuple[str, ...] = ()) -> list[str]:
+    """Pasos del plan que recorren una tabla entera u ordenan en memoria (salvo los permitidos)."""
+    malos = []
+    for d in detalles:
+        if any(p in d for p in permitidos):
+            continue
+        # "SCAN (subquery-N)" / "SCAN anon_N" recorren resultados intermedios, no tablas.
+        if d.startswith("SCAN") and not any(ok in d for ok in ("USING", "VIRTUAL TABLE", "CONSTANT ROW", "(subquery-", "anon_")):
+            malos.append(d)
+        elif "TEMP B-TREE" in d:
+            malos.append(d)
+    return malos
+
+
+def _migrar(_args) -> int:
+    antes = version_schema()
+    try:
+        init_db()
+    except MigracionError as e:
+        print(f"❌ {e}")
+        return 1
+    despues = version_schema()
+    print(f"Schema: versión {antes} -> {despues} (última: {MIGRACIONES[-1][0]}).")
+    return 0
+
+
+def _verificar_indices(_args) -> int:
+    init_db()
+    errores = 0
+    for nombre, consultas in planes_consultas_clave().items():
+        permitidos = CONSULTAS_CLAVE[nombre][1]
+        malos = [m for _sql, detalles in consultas for m in problemas_de_plan(detalles, permitidos)]
+        errores += bool(malos)
+        print(f"{'❌' if malos else '✅'} {nombre}")
+        for m in malos:
+            print(f"     {m}")
+    return 1 if errores else 0
+
+
+def _reconstruir_resumen(_args) -> int:
+    init_db()
+    filas = reconstruir_resumen_movimientos()
+    print(f"Resumen de movimientos reconstruido: {filas} filas.")
+    return 0
+
+
+def _verificar_resumen(_args) -> int:
+    init_db()
+    diferencias = verificar_resumen_movimientos()
+    if not diferencias:
+        print("Resumen de movimientos consistente ✅")
+        return 0
+    print(f"{len(diferencias)} diferencias entre el resumen y la tabla movimientos:")
+    for d in diferencias:
+        print(f"  {d['mes']} {d['tipo']} / {d['categoria']} / {d['medio'] or '-'}: "
+              f"esperado {d['esperado']} — resumen {d['resumen']}")
+    return 1
+
+
+def _reconstruir_stats_clientes(_args) -> int:
+    init_db()
+    clientes, piezas = reconstruir_stats_clientes()
+    print(f"Stats de clientes reconstruidas: {clientes} clientes, {piezas} filas de piezas.")
+    return 0
+
+
+def _verificar_stats_clientes(_args) -> int:
+    init_db()
+    diferencias = verificar_stats_clientes()
+    if not diferencias:
+        print("Stats de clientes consistentes ✅")
+        return 0
+    print(f"{len(diferencias)} diferencias entre las stats y una agregación desde cero:")
+    for d in diferencias:
+        print(f"  {d['tabla']} {d['clave']}: esperado {d['esperado']} — stats {d['stats']}")
+    return 1
+
+
+def _archivar(args) -> int:
+    init_db()
+    corte = args.antes_de or corte_por_meses(args.meses)
+    try:
+        r = archivar(corte, vacuum=not args.sin_vacuum)
+    except ArchivoError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"Archivado lo anterior a {r.corte}: {r.entregas} entregas ({r.items} ítems), "
+          f"{r.movimientos} movimientos en {r.segundos:.1f}s.")
+    print(f"app.db: {r.bytes_antes / 2**20:,.1f} MB -> {r.bytes_despues / 2**20:,.1f} MB")
+    return 0
+
+
+def _estado_archivo(_args) -> int:
+    init_db()
+    e = estado_archivo()
+    print(f"app.db: {e['bytes_caliente'] / 2**20:,.1f} MB — archivo: {e['bytes_archivo'] / 2**20:,.1f} MB "
+          f"(hasta {e['archivo_hasta'] or '-'})")
+    for tabla, filas in e["caliente"].items():
+        print(f"  {tabla:<14} {filas:>10,} en app.db   {e['archivo'][tabla]:>10,} archivadas")
+    repetidos = {t: n for t, n in e["ids_repetidos"].items() if n}
+    if repetidos:
+        print(f"❌ Ids en app.db y en el archivo con distinto contenido: {repetidos}")
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.mantenimiento")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("migrar", help="aplica las migraciones pendientes de la base").set_defaults(fn=_migrar)
+    sub.add_parser("verificar-indices", help="EXPLAIN QUERY PLAN de las consultas clave").set_defaults(fn=_verificar_indices)
+    sub.add_parser("reconstruir-resumen", help="recalcula movimientos_resumen desde cero").set_defaults(fn=_reconstruir_resumen)
+    sub.add_parser("verificar-resumen", help="compara movimientos_resumen contra movimientos").set_defaults(fn=_verificar_resumen)
+    sub.add_parser("reconstruir-stats-clientes", help="recalcula clientes_stats y clientes_piezas desde cero").set_defaults(fn=_reconstruir_stats_clientes)
+    sub.add_parser("verificar-stats-clientes", help="compara las stats de clientes contra entregas").set_defaults(fn=_verificar_stats_clientes)
+    p = sub.add_parser("archivar", help="pasa entregas y movimientos viejos al archivo y compacta app.db")
+    corte = p.add_mutually_exclusive_group(required=True)
+    corte.add_argument("--antes-de", type=date.fromisoformat, help="fecha de corte (YYYY-MM-DD), se archiva lo anterior")
+    corte.add_argument("--meses", type=int, help="meses completos que quedan en app.db")
+    p.add_argument("--sin-vacuum", action="store_true", help="no compactar app.db después")
+    p.set_defaults(fn=_archivar)
+    sub.add_parser("estado-archivo", help="filas y tamaño de app.db y del archivo").set_defaults(fn=_estado_archivo)
+
+    args = parser.parse_args(argv)
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
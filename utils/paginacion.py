@@ -0,0 +1,34 @@
+# utils/paginacion.py
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable
+
+import streamlit as st
+
+
+def paginar(clave: str, buscar: Callable[..., list], por_pagina: int, filtros: Hashable = None) -> list:
+    """
+    Paginado por keyset (fecha, id) para listados de Streamlit.
+
+    Guarda en session_state la pila de cursores de las páginas visitadas; `buscar(limit=, antes=)`
+    trae una sola página. Si cambian `por_pagina` o `filtros`, vuelve a la primera página.
+    Las filas devueltas tienen que tener atributos `fecha` e `id`.
+    """
+    estado = st.session_state.setdefault(clave, {"cursores": [None], "firma": None})
+    firma = (por_pagina, filtros)
+    if estado["firma"] != firma:
+        estado.update(cursores=[None], firma=firma)
+    cursores: list[Any] = estado["cursores"]
+
+    filas = buscar(limit=por_pagina, antes=cursores[-1])
+
+    nav1, nav2, nav3 = st.columns([1, 2, 1])
+    if nav1.button("⬅️ Más recientes", disabled=len(cursores) == 1, use_container_width=True, key=f"{clave}_prev"):
+        cursores.pop()
+        st.rerun()
+    nav2.caption(f"Página {len(cursores)}")
+    if nav3.button("Más antiguas ➡️", disabled=len(filas) < por_pagina, use_container_width=True, key=f"{clave}_next"):
+        ultima = filas[-1]
+        cursores.append((ultima.fecha, ultima.id))
+        st.rerun()
+    return filas
@@ -0,0 +1,188 @@
+# utils/planificador.py
+"""
+Planificación de la cola de impresión: reparte trabajos entre N impresoras buscando
+terminar todo lo antes posible (makespan) sin pasarse de las fechas de entrega.
+
+Todo en minutos contados desde "ahora" y sin base de datos: utils/db_app.py arma los
+trabajos a partir de los pedidos y guarda el resultado.
+
+1. Goloso EDF/LPT: los trabajos se ordenan por fecha de entrega (EDF) y, a igual fecha o
+   sin fecha, los más largos primero (LPT). Cada uno va a la impresora que se libera antes,
+   que sale de un heap: O(n log n + n log m).
+2. Búsqueda local opcional (con tope de tiempo): mueve o intercambia trabajos entre la
+   impresora peor (más atraso, después la que termina última) y las que terminan antes,
+   mientras baje (atraso total, makespan).
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import time
+from bisect import insort
+from dataclasses import dataclass
+from typing import Optional
+
+# Cuántas impresoras (las que terminan antes) se prueban como destino en cada paso.
+DESTINOS_POR_PASO = 3
+EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class Trabajo:
+    id: int
+    minutos: float
+    vence: Optional[float] = None   # minutos desde ahora hasta la entrega (negativo = ya vencido)
+
+    @property
+    def clave(self) -> tuple:
+        """Orden dentro de una impresora: EDF, y a igual fecha el más largo primero."""
+        return (self.vence if self.vence is not None else math.inf, -self.minutos, self.id)
+
+
+@dataclass(frozen=True)
+class Asignacion:
+    trabajo_id: int
+    impresora: int
+    inicio: float
+    fin: float
+    atraso: float   # minutos después de la entrega (0 si llega)
+
+
+@dataclass(frozen=True)
+class Plan:
+    asignaciones: list[Asignacion]
+    makespan: float
+    atraso_total: float
+    atrasados: int
+    mejoras: int = 0   # pasos aceptados por la búsqueda local
+
+    @property
+    def objetivo(self) -> tuple[float, float]:
+        return (self.atraso_total, self.makespan)
+
+
+def _evaluar(libre: float, secuencia: list[Trabajo]) -> tuple[float, float]:
+    """(fin, atraso total) de una impresora que se libera en `libre` y hace `secuencia` en orden."""
+    t = libre
+    atraso = 0.0
+    for trabajo in secuencia:
+        t += trabajo.minutos
+        if trabajo.vence is not None and t > trabajo.vence:
+            atraso += t - trabajo.vence
+    return t, atraso
+
+
+def _goloso(trabajos: list[Trabajo], impresoras: dict[int, float]) -> dict[int, list[Trabajo]]:
+    heap = [(libre, imp) for imp, libre in impresoras.items()]
+    heapq.heapify(heap)
+    secuencias: dict[int, list[Trabajo]] = {imp: [] for imp in impresoras}
+    for trabajo in sorted(trabajos, key=lambda t: t.clave):
+        libre, imp = heapq.heappop(heap)
+        secuencias[imp].append(trabajo)
+        heapq.heappush(heap, (libre + trabajo.minutos, imp))
+    return secuencias
+
+
+def _sin(secuencia: list[Trabajo], i: int) -> list[Trabajo]:
+    return secuencia[:i] + secuencia[i + 1:]
+
+
+def _con(secuencia: list[Trabajo], trabajo: Trabajo) -> list[Trabajo]:
+    nueva = list(secuencia)
+    insort(nueva, trabajo, key=lambda t: t.clave)
+    return nueva
+
+
+def _mejorar(
+    secuencias: dict[int, list[Trabajo]], impresoras: dict[int, float], limite_ms: float
+) -> int:
+    """Búsqueda local de primera mejora sobre `secuencias` (se modifica). Devuelve los pasos aceptados."""
+    tope = time.perf_counter() + limite_ms / 1000
+    estado = {imp: _evaluar(impresoras[imp], seq) for imp, seq in secuencias.items()}
+    mejoras = 0
+    while time.perf_counter() < tope:
+        origen = max(estado, key=lambda imp: (estado[imp][1], estado[imp][0]))
+        destinos = sorted((imp for imp in estado if imp != origen), key=lambda imp: estado[imp][0])[:DESTINOS_POR_PASO]
+        atraso_total = sum(a for _, a in estado.values())
+        makespan = max(f for f, _ in estado.values())
+        actual = (atraso_total, makespan)
+
+        def objetivo(o: int, d: int, nuevo_o: tuple, nuevo_d: tuple) -> tuple[float, float]:
+            resto = max((estado[i][0] for i in estado if i not in (o, d)), default=0.0)
+            return (
+                atraso_total - estado[o][1] - estado[d][1] + nuevo_o[1] + nuevo_d[1],
+                max(resto, nuevo_o[0], nuevo_d[0]),
+            )
+
+        def mejor(a: tuple, b: tuple) -> bool:
+            return a[0] < b[0] - EPS or (a[0] <= b[0] + EPS and a[1] < b[1] - EPS)
+
+        aceptado = None
+        seq_o = secuencias[origen]
+        for d in destinos:
+            seq_d = secuencias[d]
+            # Mover un trabajo del origen al destino.
+            for i, trabajo in enumerate(seq_o):
+                nueva_o, nueva_d = _sin(seq_o, i), _con(seq_d, trabajo)
+                ev_o, ev_d = _evaluar(impresoras[origen], nueva_o), _evaluar(impresoras[d], nueva_d)
+                if mejor(objetivo(origen, d, ev_o, ev_d), actual):
+                    aceptado = (d, nueva_o, nueva_d, ev_o, ev_d)
+                    break
+                if time.perf_counter() >= tope:
+                    break
+            if aceptado or time.perf_counter() >= tope:
+                break
+            # Intercambiar uno del origen por uno más corto del destino: pasa carga al destino
+            # sin que éste termine después de lo que hoy termina el origen.
+            holgura = estado[origen][0] - estado[d][0]
+            for i, a in enumerate(seq_o):
+                for j, b in enumerate(seq_d):
+                    if not 0 < a.minutos - b.minutos < holgura:
+                        continue
+                    nueva_o, nueva_d = _con(_sin(seq_o, i), b), _con(_sin(seq_d, j), a)
+                    ev_o, ev_d = _evaluar(impresoras[origen], nueva_o), _evaluar(impresoras[d], nueva_d)
+                    if mejor(objetivo(origen, d, ev_o, ev_d), actual):
+                        aceptado = (d, nueva_o, nueva_d, ev_o, ev_d)
+                        break
+                if aceptado or time.perf_counter() >= tope:
+                    break
+            if aceptado or time.perf_counter() >= tope:
+                break
+        if aceptado is None:
+            break   # óptimo local (o sin tiempo)
+        d, nueva_o, nueva_d, ev_o, ev_d = aceptado
+        secuencias[origen], secuencias[d] = nueva_o, nueva_d
+        estado[origen], estado[d] = ev_o, ev_d
+        mejoras += 1
+    return mejoras
+
+
+def planificar(
+    trabajos: list[Trabajo],
+    impresoras: dict[int, float],
+    mejorar: bool = True,
+    limite_ms: float = 50.0,
+) -> Plan:
+    """
+    Reparte `trabajos` entre `impresoras` ({id: minutos hasta que se libera, 0 = libre ya}).
+    Con `mejorar`, después del goloso corre la búsqueda local hasta `limite_ms`.
+    """
+    if not impresoras:
+        raise ValueError("No hay impresoras disponibles para planificar.")
+    secuencias = _goloso(trabajos, impresoras)
+    mejoras = _mejorar(secuencias, impresoras, limite_ms) if mejorar and len(impresoras) > 1 and trabajos else 0
+
+    asignaciones = []
+    for imp, secuencia in secuencias.items():
+        t = impresoras[imp]
+        for trabajo in secuencia:
+            inicio, t = t, t + trabajo.minutos
+            atraso = max(0.0, t - trabajo.vence) if trabajo.vence is not None else 0.0
+            asignaciones.append(Asignacion(trabajo.id, imp, inicio, t, atraso))
+    return Plan(
+        asignaciones=asignaciones,
+        makespan=max((a.fin for a in asignaciones), default=0.0),
+        atraso_total=sum(a.atraso for a in asignaciones),
+        atrasados=sum(a.atraso > EPS for a in asignaciones),
+        mejoras=mejoras,
+    )
@@ -0,0 +1,390 @@
+# utils/remitos.py
+"""
+Remitos de entregas: un PDF por entrega (cliente, ítems, descuento y total) y lotes en zip
+para fin de mes.
+
+- PDF con fpdf2 (Python puro). Es opcional: sin fpdf2 los remitos salen en HTML listo para
+  imprimir desde el navegador.
+- Un lote lee todas las entregas elegidas en una sola consulta (en streaming, de a bloques) y
+  las renderiza en paralelo con un ProcessPoolExecutor, con un tope de trabajos en vuelo: la
+  memoria no crece con el tamaño del lote. Cada remito va al zip apenas termina.
+- Cache por (entrega, huella del contenido): volver a bajar el mismo lote no renderiza nada, y
+  editar una entrega cambia su huella sin tener que invalidar a mano.
+
+Por línea de comandos:
+
+    python -m utils.remitos --desde 2025-06-01 --hasta 2025-06-30 -o remitos_junio.zip
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from itertools import groupby
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from sqlalchemy import select
+
+from utils.cache import CacheTTL
+from utils.db_app import (
+    Cliente, Entrega, EntregaItem, conexion_historica, init_db, normalizar_nombre, vista_historica,
+)
+
+try:  # PDF es opcional: sólo si fpdf2 está instalado.
+    from fpdf import FPDF
+except ImportError:  # pragma: no cover
+    FPDF = None
+
+EMISOR = "3D.IEGO"
+
+# Cambiarla cuando cambie el diseño: entra en la huella, así no se sirven remitos viejos de la cache.
+VERSION_PLANTILLA = 1
+
+# Con menos remitos por renderizar que esto, levantar procesos cuesta más de lo que ahorra.
+MINIMO_PARALELO = 16
+# Remitos por tarea del pool (menos idas y vueltas entre procesos) y tareas en vuelo por
+# proceso: acotan la memoria del lote (datos y bytes pendientes).
+REMITOS_POR_TAREA = 8
+EN_VUELO_POR_PROCESO = 4
+TAMANO_BLOQUE = 2000
+
+_cache_remitos = CacheTTL(maxsize=2000, ttl=24 * 3600.0)
+
+
+@dataclass(frozen=True)
+class ItemRemito:
+    pieza: str
+    cantidad: int
+    precio_unitario: float
+    subtotal: float
+
+
+@dataclass(frozen=True)
+class DatosRemito:
+    entrega_id: int
+    fecha: date
+    cliente: str
+    numero: str
+    notas: str
+    descuento: float
+    total: float
+    items: tuple[ItemRemito, ...]
+
+    @property
+    def huella(self) -> str:
+        """Hash del contenido (y de la versión de la plantilla): cambia si cambia el remito."""
+        return hashlib.sha1(repr((VERSION_PLANTILLA, self)).encode("utf-8")).hexdigest()
+
+    def nombre_archivo(self, formato: str) -> str:
+        cliente = "-".join(normalizar_nombre(self.cliente).split())[:40] or "sin-cliente"
+        return f"remito-{self.entrega_id:06d}-{cliente}.{formato}"
+
+
+@dataclass(frozen=True)
+class LoteRemitos:
+    archivo: BinaryIO   # zip rebobinado
+    remitos: int
+    del_cache: int
+    segundos: float
+
+    def leer(self) -> bytes:
+        """El zip entero: para un botón de descarga que lo lee recién al hacer clic."""
+        self.archivo.seek(0)
+        return self.archivo.read()
+
+
+def pdf_disponible() -> bool:
+    return FPDF is not None
+
+
+def formato_por_defecto() -> str:
+    return "pdf" if pdf_disponible() else "html"
+
+
+# ---------------- Lectura ----------------
+def leer_remitos(ids: list[int], tamano: int = TAMANO_BLOQUE) -> Iterator[DatosRemito]:
+    """Datos de las entregas `ids` (una sola consulta, leída de a bloques), en orden de id."""
+    if not ids:
+        return
+    # Vistas historico_*: los remitos de meses ya archivados (utils/archivo.py) salen igual.
+    e, i = vista_historica(Entrega), vista_historica(EntregaItem)
+    stmt = (
+        select(
+            e.c.id, e.c.fecha, Cliente.nombre, e.c.numero, e.c.notas, e.c.descuento, e.c.total,
+            i.c.pieza, i.c.cantidad, i.c.precio_unitario, i.c.subtotal,
+        )
+        .select_from(e)
+        .outerjoin(Cliente, Cliente.id == e.c.cliente_id)
+        .outerjoin(i, i.c.entrega_id == e.c.id)
+        .where(e.c.id.in_(sorted(set(ids))))
+        .order_by(e.c.id, i.c.id)
+    )
+    with conexion_historica() as conn:
+        filas = conn.execution_options(stream_results=True, yield_per=tamano).execute(stmt)
+        for ent_id, grupo in groupby(filas, key=lambda f: f[0]):
+            grupo = list(grupo)
+            _, fecha, cliente, numero, notas, descuento, total = grupo[0][:7]
+            yield DatosRemito(
+                entrega_id=ent_id,
+                fecha=fecha,
+                cliente=cliente or "",
+                numero=numero or "",
+                notas=notas or "",
+                descuento=float(descuento or 0),
+                total=float(total or 0),
+                items=tuple(
+                    ItemRemito(f[7], int(f[8] or 0), float(f[9] or 0), float(f[10] or 0))
+                    for f in grupo if f[7] is not None
+                ),
+            )
+
+
+def ids_entregas(
+    desde: Optional[date] = None, hasta: Optional[date] = None, cliente: Optional[str] = None
+) -> list[int]:
+    """Ids de las entregas del rango (y cliente), para armar un lote."""
+    e = vista_historica(Entrega)
+    stmt = select(e.c.id).select_from(e).outerjoin(Cliente, Cliente.id == e.c.cliente_id)
+    if desde is not None:
+        stmt = stmt.where(e.c.fecha >= desde)
+    if hasta is not None:
+        stmt = stmt.where(e.c.fecha <= hasta)
+    if cliente:
+        stmt = stmt.where(Cliente.nombre_norm == normalizar_nombre(cliente))
+    with conexion_historica() as conn:
+        return list(conn.scalars(stmt.order_by(e.c.fecha, e.c.id)))
+
+
+# ---------------- Render ----------------
+def _monto(valor: float) -> str:
+    return f"$ {valor:,.2f}".replace(",", "")
+
+
+def _titulo(datos: DatosRemito) -> str:
+    return f"Remito {datos.numero or f'#{datos.entrega_id}'}"
+
+
+def _latin1(texto: str) -> str:
+    # Las fuentes base del PDF son latin-1: tildes y ñ sí; emojis y demás, "?".
+    return texto.encode("latin-1", "replace").decode("latin-1")
+
+
+def _recortar(pdf, texto: str, ancho: float) -> str:
+    # cell() no corta líneas: los nombres largos se recortan al ancho de la columna.
+    if pdf.get_string_width(texto) <= ancho:
+        return texto
+    while texto and pdf.get_string_width(texto + "...") > ancho:
+        texto = texto[:-1]
+    return texto + "..."
+
+
+def renderizar_pdf(datos: DatosRemito) -> bytes:
+    if FPDF is None:
+        raise RuntimeError("Para generar remitos en PDF hace falta instalar fpdf2 (ver requirements-extra.txt).")
+    pdf = FPDF(format="A4")
+    # Fecha de creación = fecha de la entrega: mismo contenido, mismos bytes.
+    pdf.set_creation_date(datetime(datos.fecha.year, datos.fecha.month, datos.fecha.day, tzinfo=timezone.utc))
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    ancho = pdf.epw
+
+    pdf.set_font("Helvetica", "B", 18)
+    pdf.cell(ancho / 2, 10, EMISOR)
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(ancho / 2, 10, _latin1(_titulo(datos)), align="R", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 11)
+    pdf.cell(ancho / 2, 7, _latin1(f"Cliente: {datos.cliente or '-'}"))
+    pdf.cell(ancho / 2, 7, f"Fecha: {datos.fecha.strftime('%d/%m/%Y')}", align="R", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    columnas = ((0.52, "Pieza", "L"), (0.12, "Cant.", "R"), (0.18, "P. unit.", "R"), (0.18, "Subtotal", "R"))
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.set_fill_color(230, 230, 230)
+    for frac, titulo, alinear in columnas:
+        pdf.cell(ancho * frac, 7, titulo, border="B", align=alinear, fill=True)
+    pdf.ln()
+    pdf.set_font("Helvetica", "", 10)
+    for it in datos.items:
+        pieza = _recortar(pdf, _latin1(it.pieza), ancho * columnas[0][0] - 2)
+        valores = (pieza, str(it.cantidad), _monto(it.precio_unitario), _monto(it.subtotal))
+        for (frac, _, alinear), valor in zip(columnas, valores):
+            pdf.cell(ancho * frac, 6, valor, align=alinear)
+        pdf.ln()
+
+    pdf.ln(2)
+    subtotal = sum(it.subtotal for it in datos.items)
+    filas = [("Subtotal", subtotal)] + ([("Descuento", -datos.descuento)] if datos.descuento else []) + [("Total", datos.total)]
+    for etiqueta, valor in filas:
+        pdf.set_font("Helvetica", "B" if etiqueta == "Total" else "", 11)
+        pdf.cell(ancho * 0.82, 7, etiqueta, align="R")
+        pdf.cell(ancho * 0.18, 7, _monto(valor), align="R", new_x="LMARGIN", new_y="NEXT")
+    if datos.notas:
+        pdf.ln(4)
+        pdf.set_font("Helvetica", "I", 9)
+        pdf.multi_cell(ancho, 5, _latin1(f"Notas: {datos.notas}"))
+    return bytes(pdf.output())
+
+
+def renderizar_html(datos: DatosRemito) -> bytes:
+    e = html.escape
+    filas = "".join(
+        f"<tr><td>{e(it.pieza)}</td><td class=n>{it.cantidad}</td>"
+        f"<td class=n>{_monto(it.precio_unitario)}</td><td class=n>{_monto(it.subtotal)}</td></tr>"
+        for it in datos.items
+    )
+    descuento = f"<tr><td colspan=3>Descuento</td><td class=n>{_monto(-datos.descuento)}</td></tr>" if datos.descuento else ""
+    notas = f"<p><i>Notas: {e(datos.notas)}</i></p>" if datos.notas else ""
+    return (
+        f"<!doctype html><html><head><meta charset=utf-8><title>{e(_titulo(datos))}</title><style>"
+        "body{font-family:sans-serif;max-width:760px;margin:2em auto}table{width:100%;border-collapse:collapse}"
+        "th{background:#e6e6e6;text-align:left}td,th{padding:4px}.n{text-align:right}tfoot td{font-weight:bold}"
+        f"</style></head><body><h1>{EMISOR} <small style=float:right>{e(_titulo(datos))}</small></h1>"
+        f"<p>Cliente: {e(datos.cliente or '-')}<span style=float:right>Fecha: {datos.fecha.strftime('%d/%m/%Y')}</span></p>"
+        "<table><thead><tr><th>Pieza</th><th class=n>Cant.</th><th class=n>P. unit.</th><th class=n>Subtotal</th></tr></thead>"
+        f"<tbody>{filas}</tbody><tfoot><tr><td colspan=3>Subtotal</td>"
+        f"<td class=n>{_monto(sum(it.subtotal for it in datos.items))}</td></tr>{descuento}"
+        f"<tr><td colspan=3>Total</td><td class=n>{_monto(datos.total)}</td></tr></tfoot></table>{notas}</body></html>"
+    ).encode("utf-8")
+
+
+RENDERIZADORES = {"pdf": renderizar_pdf, "html": renderizar_html}
+
+
+def renderizar(datos: DatosRemito, formato: str) -> bytes:
+    # Función de módulo: es lo que corre en los procesos del pool.
+    return RENDERIZADORES[formato](datos)
+
+
+def remito(entrega_id: int, formato: Optional[str] = None) -> bytes:
+    """
+    Remito de una entrega, también si ya está archivada. LookupError si no existe (p. ej. se
+    borró después de listarla): el botón de descarga que la llama muestra ese mensaje.
+    """
+    formato = formato or formato_por_defecto()
+    datos = next(leer_remitos([entrega_id]), None)
+    if datos is None:
+        raise LookupError(f"La entrega #{entrega_id} ya no existe: actualizá la lista.")
+    clave = (datos.entrega_id, datos.huella, formato)
+    encontrado, contenido = _cache_remitos.get(clave)
+    if not encontrado:
+        contenido = renderizar(datos, formato)
+        _cache_remitos.set(clave, contenido)
+    return contenido
+
+
+# ---------------- Lotes ----------------
+def _renderizar_tanda(tanda: list[DatosRemito], formato: str) -> list[bytes]:
+    return [renderizar(datos, formato) for datos in tanda]
+
+
+def remitos_zip(
+    ids: list[int],
+    formato: Optional[str] = None,
+    procesos: Optional[int] = None,
+    progreso: Optional[Callable[[int, int], None]] = None,
+    usar_cache: bool = True,
+) -> LoteRemitos:
+    """
+    Zip con el remito de cada entrega de `ids`. Los que no están en cache se renderizan en
+    `procesos` procesos (por defecto, uno por CPU; 1 = en serie), de a tandas de
+    REMITOS_POR_TAREA. `progreso(hechos, total)` se llama desde este hilo a medida que avanzan.
+    """
+    t0 = time.perf_counter()
+    formato = formato or formato_por_defecto()
+    procesos = procesos or os.cpu_count() or 1
+    total = len(set(ids))
+    hechos = del_cache = 0
+    tmp = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    # Los PDF ya vienen comprimidos; el HTML no.
+    compresion = zipfile.ZIP_STORED if formato == "pdf" else zipfile.ZIP_DEFLATED
+
+    with zipfile.ZipFile(tmp, "w", compresion) as zf:
+        def guardar(datos: DatosRemito, contenido: bytes) -> None:
+            nonlocal hechos
+            zf.writestr(datos.nombre_archivo(formato), contenido)
+            if usar_cache:
+                _cache_remitos.set((datos.entrega_id, datos.huella, formato), contenido)
+            hechos += 1
+            if progreso is not None:
+                progreso(hechos, total)
+
+        pool: Optional[ProcessPoolExecutor] = None
+        en_vuelo: dict = {}
+
+        def cosechar(cuando: str) -> None:
+            listos, _ = wait(en_vuelo, return_when=cuando)
+            for fut in listos:
+                for datos, contenido in zip(en_vuelo.pop(fut), fut.result()):
+                    guardar(datos, contenido)
+
+        def despachar(tanda: list[DatosRemito]) -> None:
+            if pool is None:
+                for datos in tanda:
+                    guardar(datos, renderizar(datos, formato))
+                return
+            if len(en_vuelo) >= procesos * EN_VUELO_POR_PROCESO:
+                cosechar(FIRST_COMPLETED)
+            en_vuelo[pool.submit(_renderizar_tanda, tanda, formato)] = tanda
+
+        pendientes: list[DatosRemito] = []
+        try:
+            for datos in leer_remitos(ids):
+                encontrado, contenido = (
+                    _cache_remitos.get((datos.entrega_id, datos.huella, formato)) if usar_cache else (False, None)
+                )
+                if encontrado:
+                    del_cache += 1
+                    guardar(datos, contenido)
+                    continue
+                pendientes.append(datos)
+                # Los procesos se levantan recién cuando hay bastante por renderizar: un lote
+                # casi todo en cache (o chico) va en serie.
+                if pool is None and procesos > 1 and len(pendientes) >= MINIMO_PARALELO:
+                    pool = ProcessPoolExecutor(max_workers=procesos)
+                if (pool is None and procesos == 1) or len(pendientes) >= REMITOS_POR_TAREA:
+                    despachar(pendientes)
+                    pendientes = []
+            if pendientes:
+                despachar(pendientes)
+            while en_vuelo:
+                cosechar(FIRST_COMPLETED)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    tmp.seek(0)
+    return LoteRemitos(tmp, hechos, del_cache, time.perf_counter() - t0)
+
+
+def cache_remitos_stats() -> dict:
+    return _cache_remitos.stats()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.remitos")
+    parser.add_argument("-o", "--salida", required=True, help="archivo .zip")
+    parser.add_argument("--desde", type=date.fromisoformat)
+    parser.add_argument("--hasta", type=date.fromisoformat)
+    parser.add_argument("--cliente")
+    parser.add_argument("--formato", choices=list(RENDERIZADORES), help="por defecto pdf (html si no está fpdf2)")
+    parser.add_argument("--procesos", type=int, help="por defecto, uno por CPU")
+    args = parser.parse_args(argv)
+
+    init_db()
+    lote = remitos_zip(ids_entregas(args.desde, args.hasta, args.cliente), args.formato, args.procesos)
+    with open(args.salida, "wb") as f:
+        f.write(lote.archivo.read())
+    print(f"{lote.remitos} remitos -> {args.salida} en {lote.segundos:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
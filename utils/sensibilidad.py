@@ -0,0 +1,198 @@
+# utils/sensibilidad.py
+"""
+Análisis de sensibilidad ("¿y si sube el filamento?") sobre la fórmula de costos.
+
+Se barre una grilla de valores de los gastos fijos (PARAMETROS) contra un conjunto de
+trabajos típicos, manteniendo los precios que se cobran hoy (precio de referencia de cada
+trabajo con la config actual). Para cada punto de la grilla se obtiene:
+  - costo total y ganancia total del conjunto,
+  - el peor margen (%) entre los trabajos,
+  - cuántos trabajos quedan a pérdida.
+
+La fórmula de calculo_costos se reduce a tres cantidades por punto:
+    costo[j] = f * (gramos_j * a + horas_j * k)
+    a = kg / 1000,  k = kwh * watts / 1000 + repuestos / vida,  f = 1 + error / 100
+Los totales son lineales y no necesitan recorrer los trabajos. El peor margen recorre J sólo
+sobre las combinaciones (a, k), por bloques de filas con broadcasting de NumPy, y f se aplica
+al final; las pérdidas salen de umbrales ordenados por (a, f) y búsqueda binaria. Nunca se
+arma la grilla completa × J.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import CacheTTL
+
+# Gastos fijos que se pueden barrer (el resto de la config queda fijo).
+PARAMETROS = ("precio_kg", "precio_kwh", "consumo_watts", "precio_repuestos", "margen_error_pct")
+
+# Elementos (filas × trabajos) por bloque: acota la memoria de los intermedios.
+ELEMENTOS_BLOQUE = 1 << 22
+
+# Tope de puntos de la grilla: cada resultado ocupa 8 bytes por punto (4 arrays, ~64 MB con
+# 2M). Con 64 pasos en los 5 parámetros serían ~1e9 puntos y varios GB por array.
+MAX_COMBINACIONES = 2_000_000
+
+# Barridos recientes por huella (grilla, trabajos, config fija): mover un slider del
+# mapa de calor no recalcula nada.
+_cache_barridos = CacheTTL(maxsize=8, ttl=1800.0)
+
+
+@dataclass(frozen=True)
+class Rango:
+    desde: float
+    hasta: float
+    pasos: int
+
+    def valores(self) -> np.ndarray:
+        return np.linspace(self.desde, self.hasta, max(1, int(self.pasos)))
+
+
+@dataclass(frozen=True)
+class Barrido:
+    """Resultados con forma (pasos de cada parámetro, en el orden de PARAMETROS)."""
+    valores: dict[str, np.ndarray]
+    costo_total: np.ndarray
+    ganancia_total: np.ndarray
+    margen_min_pct: np.ndarray
+    en_perdida: np.ndarray
+    trabajos: int
+
+    @property
+    def puntos(self) -> int:
+        return self.costo_total.size
+
+
+def rangos_alrededor(config: dict, desde: float = 0.8, hasta: float = 1.5, pasos: int = 8) -> dict[str, Rango]:
+    """Rangos por defecto: de `desde` a `hasta` veces el valor actual de cada parámetro."""
+    return {p: Rango(float(config[p]) * desde, float(config[p]) * hasta, pasos) for p in PARAMETROS}
+
+
+def barrer(
+    gramos: np.ndarray, horas: np.ndarray, precio_ref: np.ndarray, rangos: dict[str, Rango], config: dict
+) -> Barrido:
+    """
+    Evalúa la fórmula en toda la grilla `rangos` × trabajos (gramos, horas) con los precios
+    `precio_ref` fijos. Los trabajos sin precio (0) no cuentan para margen ni pérdida.
+    Con más de MAX_COMBINACIONES puntos da ValueError.
+    """
+    if combinaciones(rangos) > MAX_COMBINACIONES:
+        raise ValueError(
+            f"La grilla tiene {combinaciones(rangos):,} combinaciones (máximo {MAX_COMBINACIONES:,}): usá menos pasos."
+        )
+    gramos, horas, precio_ref = (np.asarray(v, dtype=np.float64) for v in (gramos, horas, precio_ref))
+    kg, kwh, watts, repuestos, error = (rangos[p].valores() for p in PARAMETROS)
+    forma = (len(kg), len(kwh), len(watts), len(repuestos), len(error))
+
+    # a por paso de kg; k por combinación (kwh, watts, repuestos) en orden "ij"; f por paso de error.
+    a = kg / 1000
+    k = (kwh[:, None, None] * watts[None, :, None] / 1000
+         + repuestos[None, None, :] / float(config["vida_util_horas"])).reshape(-1)
+    f = 1 + error / 100
+
+    # Sumas sobre trabajos: por linealidad no hace falta la dimensión J.
+    costo = (a[:, None] * gramos.sum() + k[None, :] * horas.sum())[:, :, None] * f
+    ganancia = precio_ref.sum() - costo
+
+    # Peor margen y pérdidas necesitan cada trabajo. Con g = gramos/precio y h = horas/precio,
+    # costo/precio = f * (a*g + k*h): el peor margen sale del máximo sobre J de (a*g + k*h).
+    con_precio = precio_ref > 0
+    g_rel, h_rel = gramos[con_precio] / precio_ref[con_precio], horas[con_precio] / precio_ref[con_precio]
+    margen_min = np.full(costo.shape, np.nan)
+    en_perdida = np.zeros(costo.shape, dtype=np.int32)
+    if len(g_rel):
+        filas = max(1, ELEMENTOS_BLOQUE // len(g_rel))
+        for i in range(len(a)):
+            for inicio in range(0, len(k), filas):
+                fin = inicio + filas
+                peor = (a[i] * g_rel[None, :] + k[inicio:fin, None] * h_rel[None, :]).max(axis=1)
+                margen_min[i, inicio:fin] = (1 - peor[:, None] * f[None, :]) * 100
+        # A pérdida si a*g + k*h > 1/f, o sea k > t = (1/f - a*g) / h: para cada (a, f) se ordenan
+        # los umbrales t de los trabajos y una búsqueda binaria cuenta, para todos los k juntos,
+        # cuántos quedan por debajo.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            resto = (1 / f)[None, :, None] - a[:, None, None] * g_rel[None, None, :]
+            t = np.where(h_rel > 0, resto / h_rel, np.where(resto < 0, -np.inf, np.inf))
+        t.sort(axis=2)
+        for i in range(len(a)):
+            for e in range(len(f)):
+                en_perdida[i, :, e] = np.searchsorted(t[i, e], k, side="left")
+
+    return Barrido(
+        valores=dict(zip(PARAMETROS, (kg, kwh, watts, repuestos, error))),
+        costo_total=costo.reshape(forma),
+        ganancia_total=ganancia.reshape(forma),
+        margen_min_pct=margen_min.reshape(forma),
+        en_perdida=en_perdida.reshape(forma),
+        trabajos=len(gramos),
+    )
+
+
+def huella_barrido(gramos, horas, precio_ref, rangos: dict[str, Rango], config: dict) -> str:
+    h = hashlib.sha1()
+    for a in (gramos, horas, precio_ref):
+        h.update(np.ascontiguousarray(a, dtype=np.float64).tobytes())
+    h.update(repr([(p, rangos[p]) for p in PARAMETROS]).encode())
+    h.update(repr(float(config["vida_util_horas"])).encode())
+    return h.hexdigest()
+
+
+def barrer_cacheado(gramos, horas, precio_ref, rangos: dict[str, Rango], config: dict) -> Barrido:
+    clave = huella_barrido(gramos, horas, precio_ref, rangos, config)
+    encontrado, barrido = _cache_barridos.get(clave)
+    if not encontrado:
+        barrido = barrer(gramos, horas, precio_ref, rangos, config)
+        _cache_barridos.set(clave, barrido)
+    return barrido
+
+
+def cache_barridos_stats() -> dict:
+    return _cache_barridos.stats()
+
+
+def _indice_base(barrido: Barrido, base: dict) -> dict[str, int]:
+    """Para cada parámetro, el paso de la grilla más cercano al valor de `base`."""
+    return {p: int(np.abs(barrido.valores[p] - float(base[p])).argmin()) for p in PARAMETROS}
+
+
+def mapa_calor(barrido: Barrido, x: str, y: str, base: dict, metrica: str = "ganancia_total") -> pd.DataFrame:
+    """
+    Corte de dos parámetros (x en columnas, y en filas) con el resto en el paso más cercano
+    a `base` (normalmente la config actual). Formato largo: x, y, valor.
+    """
+    idx = _indice_base(barrido, base)
+    corte = tuple(slice(None) if p in (x, y) else idx[p] for p in PARAMETROS)
+    datos = getattr(barrido, metrica)[corte]
+    if PARAMETROS.index(x) > PARAMETROS.index(y):
+        datos = datos.T   # ejes (x, y)
+    xs, ys = np.meshgrid(barrido.valores[x], barrido.valores[y], indexing="ij")
+    return pd.DataFrame({x: xs.reshape(-1), y: ys.reshape(-1), "valor": datos.reshape(-1)})
+
+
+def tornado(barrido: Barrido, base: dict, metrica: str = "ganancia_total") -> pd.DataFrame:
+    """
+    Efecto de llevar cada parámetro a su mínimo y a su máximo (el resto en la base):
+    una fila por parámetro con la métrica en el punto base, bajo y alto, del más al menos influyente.
+    """
+    idx = _indice_base(barrido, base)
+    datos = getattr(barrido, metrica)
+    en_base = float(datos[tuple(idx[p] for p in PARAMETROS)])
+    filas = []
+    for p in PARAMETROS:
+        extremos = []
+        for paso in (0, len(barrido.valores[p]) - 1):
+            punto = dict(idx, **{p: paso})
+            extremos.append(float(datos[tuple(punto[q] for q in PARAMETROS)]))
+        filas.append({"parametro": p, "base": en_base, "bajo": extremos[0], "alto": extremos[1]})
+    df = pd.DataFrame(filas)
+    df["rango"] = (df["alto"] - df["bajo"]).abs()
+    return df.sort_values("rango", ascending=False, ignore_index=True)
+
+
+def combinaciones(rangos: dict[str, Rango]) -> int:
+    return int(np.prod([max(1, int(rangos[p].pasos)) for p in PARAMETROS]))
+
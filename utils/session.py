@@ -2,87 +2,139 @@
 from __future__ import annotations
 
 import os
+import secrets
+import threading
 import time
-from pathlib import Path
 from typing import Optional
 
-# Dónde guardar el archivo de sesión:
-# - Por defecto usa /tmp (siempre escribible).
-# - Podés sobrescribirlo con la variable de entorno SESSION_FILE.
-SESSION_FILE = Path(os.getenv("SESSION_FILE", "/tmp/.session_3d_iego"))
+# Backend de sesiones:
+# - "memoria" (por defecto): dict en el proceso, sin I/O. Se pierde al reiniciar la app.
+# - "sqlite": tabla `sesiones` dentro de app.db, sobrevive a reinicios.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memoria")
 
 # Tiempo de expiración en segundos (2 horas por defecto)
 TIEMPO_EXPIRACION = int(os.getenv("SESSION_TTL_SECONDS", str(2 * 60 * 60)))
 
+# Cada cuánto (como mínimo) se barren las sesiones vencidas del backend en memoria.
+INTERVALO_BARRIDO = 60
+
 
 def _now() -> int:
     return int(time.time())
 
 
-def _ensure_parent_dir(path: Path) -> None:
-    """Crea el directorio padre si no existe (modo seguro)."""
-    if path.parent and not path.parent.exists():
-        path.parent.mkdir(parents=True, exist_ok=True)
+def _debe_renovar(timestamp: int, ahora: int, ttl: int) -> bool:
+    # Sliding expiration: si pasó más del 75% del TTL, renovamos timestamp
+    return ahora - timestamp > (ttl * 3 // 4)
 
 
-def guardar_sesion(username: str) -> None:
+class SesionesMemoria:
     """
-    Guarda la sesión de forma atómica: escribe en un archivo temporal y renombra.
-    También fija permisos 600 para que sólo el usuario actual lo lea/escriba.
+    Sesiones en un dict del proceso: token -> (username, timestamp).
+    Validar es O(1) y no toca el disco. Las vencidas se eliminan al consultarlas
+    y, cada INTERVALO_BARRIDO segundos, en un barrido perezoso de todo el dict.
     """
-    _ensure_parent_dir(SESSION_FILE)
-    tmp = SESSION_FILE.with_suffix(SESSION_FILE.suffix + ".tmp")
-    payload = f"{username}|{_now()}"
-    tmp.write_text(payload, encoding="utf-8")
-    os.replace(tmp, SESSION_FILE)  # operación atómica en el mismo FS
-    try:
-        os.chmod(SESSION_FILE, 0o600)
-    except Exception:
-        # En algunos FS puede no aplicar, lo ignoramos.
-        pass
-
-
-def _leer_sesion() -> Optional[tuple[str, int]]:
-    """Devuelve (username, timestamp) o None si hay problema."""
-    try:
-        data = SESSION_FILE.read_text(encoding="utf-8").strip()
-        if not data or "|" not in data:
+
+    def __init__(self, ttl: int = TIEMPO_EXPIRACION):
+        self.ttl = ttl
+        self._sesiones: dict[str, tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._ultimo_barrido = _now()
+
+    def _barrer(self, ahora: int) -> None:
+        if ahora - self._ultimo_barrido < INTERVALO_BARRIDO:
+            return
+        self._ultimo_barrido = ahora
+        vencidas = [t for t, (_, ts) in self._sesiones.items() if ahora - ts >= self.ttl]
+        for t in vencidas:
+            del self._sesiones[t]
+
+    def guardar(self, token: str, username: str) -> None:
+        with self._lock:
+            self._sesiones[token] = (username, _now())
+
+    def validar(self, token: str) -> Optional[str]:
+        ahora = _now()
+        with self._lock:
+            self._barrer(ahora)
+            item = self._sesiones.get(token)
+            if item is None:
+                return None
+            username, timestamp = item
+            if ahora - timestamp >= self.ttl:
+                # Expirada: eliminar para limpiar estado
+                del self._sesiones[token]
+                return None
+            if _debe_renovar(timestamp, ahora, self.ttl):
+                self._sesiones[token] = (username, ahora)
+            return username
+
+    def eliminar(self, token: str) -> None:
+        with self._lock:
+            self._sesiones.pop(token, None)
+
+    def __len__(self) -> int:
+        return len(self._sesiones)
+
+
+class SesionesSQLite:
+    """Sesiones en la tabla `sesiones` de app.db (ver utils/db_app.py)."""
+
+    def __init__(self, ttl: int = TIEMPO_EXPIRACION):
+        self.ttl = ttl
+
+    def guardar(self, token: str, username: str) -> None:
+        from utils.db_app import Sesion, get_session
+
+        with get_session(escritura=True) as s:
+            s.merge(Sesion(token=token, username=username, timestamp=_now()))
+            s.commit()
+
+    def validar(self, token: str) -> Optional[str]:
+        from utils.db_app import Sesion, get_session
+
+        ahora = _now()
+        with get_session() as s:
+            ses = s.get(Sesion, token)
+            if ses is None:
+                return None
+            username, timestamp = ses.username, ses.timestamp
+        if ahora - timestamp >= self.ttl:
+            self.eliminar(token)
             return None
-        username, ts_str = data.split("|", 1)
-        return username, int(ts_str)
-    except Exception:
-        return None
+        if _debe_renovar(timestamp, ahora, self.ttl):
+            self.guardar(token, username)
+        return username
 
+    def eliminar(self, token: str) -> None:
+        from utils.db_app import Sesion, get_session
 
-def sesion_valida() -> bool:
-    """
-    Verifica si existe el archivo y no está expirada.
-    Si queda menos de 25% del TTL, renueva el timestamp (sliding expiration).
-    """
-    if not SESSION_FILE.exists():
-        return False
+        with get_session(escritura=True) as s:
+            s.query(Sesion).filter(Sesion.token == token).delete()
+            s.commit()
 
-    parsed = _leer_sesion()
-    if not parsed:
-        return False
 
-    username, timestamp = parsed
-    ahora = _now()
-    if ahora - timestamp >= TIEMPO_EXPIRACION:
-        # Expirada: eliminar para limpiar estado
-        eliminar_sesion()
-        return False
+_backend = SesionesSQLite() if SESSION_BACKEND == "sqlite" else SesionesMemoria()
+
+
+def guardar_sesion(username: str) -> str:
+    """Crea una sesión nueva para `username` y devuelve su token (uno por navegador)."""
+    token = secrets.token_urlsafe(24)
+    _backend.guardar(token, username)
+    return token
 
-    # Sliding expiration: si pasó más del 75% del TTL, renovamos timestamp
-    if ahora - timestamp > (TIEMPO_EXPIRACION * 3 // 4):
-        guardar_sesion(username)
 
-    return True
+def sesion_valida(token: Optional[str]) -> bool:
+    """
+    Verifica que el token exista y no esté expirado.
+    Si queda menos de 25% del TTL, renueva el timestamp (sliding expiration).
+    """
+    if not token:
+        return False
+    return _backend.validar(token) is not None
 
 
-def eliminar_sesion() -> None:
-    """Elimina el archivo de sesión si existe."""
-    try:
-        SESSION_FILE.unlink(missing_ok=True)
-    except Exception:
-        pass
+def eliminar_sesion(token: Optional[str]) -> None:
+    """Elimina la sesión del token, si existe."""
+    if token:
+        _backend.eliminar(token)
@@ -0,0 +1,117 @@
+# utils/tiempos.py
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Mostrar los tiempos de cada fase en el sidebar (DEBUG_TIEMPOS=1).
+DEBUG_TIEMPOS = os.getenv("DEBUG_TIEMPOS", "0") == "1"
+
+# Registrar en un log las consultas SQL que tarden más de SQL_LENTA_MS milisegundos.
+SQL_LENTA_MS = float(os.environ["SQL_LENTA_MS"]) if os.getenv("SQL_LENTA_MS") else None
+
+# Una misma sentencia repetida tantas veces en un rerun suele ser un N+1 (una consulta por fila).
+UMBRAL_N_MAS_1 = 5
+
+# Momento en que se importó este módulo: aproxima el arranque del proceso.
+INICIO_PROCESO = time.perf_counter()
+
+# Control de transacciones: no son consultas (y se repetirían en cada rerun como falsos N+1).
+SENTENCIAS_TRANSACCION = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+log_sql_lentas = logging.getLogger("3diego.sql_lentas")
+
+
+class ConsultasSQL:
+    """Consultas SQL de un rerun: cantidad, tiempo total, las más lentas y las repetidas."""
+
+    MAX_LENTAS = 5
+
+    def __init__(self):
+        self.cantidad = 0
+        self.total_ms = 0.0
+        self._lentas: list[tuple[float, int, str]] = []  # heap de mínimos: las MAX_LENTAS más lentas
+        self.por_sentencia: Counter[str] = Counter()
+
+    def registrar(self, sql: str, ms: float) -> None:
+        self.cantidad += 1
+        self.total_ms += ms
+        self.por_sentencia[sql] += 1
+        item = (ms, self.cantidad, sql)
+        if len(self._lentas) < self.MAX_LENTAS:
+            heapq.heappush(self._lentas, item)
+        elif ms > self._lentas[0][0]:
+            heapq.heapreplace(self._lentas, item)
+
+    def lentas(self) -> list[tuple[float, str]]:
+        return [(ms, sql) for ms, _, sql in sorted(self._lentas, reverse=True)]
+
+    def repetidas(self, minimo: int = UMBRAL_N_MAS_1) -> list[tuple[str, int]]:
+        """Sentencias ejecutadas `minimo` veces o más en el rerun (posibles N+1)."""
+        return [(sql, n) for sql, n in self.por_sentencia.most_common() if n >= minimo]
+
+
+# Las consultas de cada rerun se anotan en el ConsultasSQL activo del hilo de esa sesión.
+_consultas_actuales: ContextVar[Optional[ConsultasSQL]] = ContextVar("consultas_sql", default=None)
+
+
+def instrumentar(engine, umbral_lenta_ms: Optional[float] = None, log_path=None) -> None:
+    """
+    Engancha before/after_cursor_execute al engine. Sólo se llama si hay algo que medir
+    (DEBUG_TIEMPOS o SQL_LENTA_MS): apagado, el engine no tiene listeners y no cuesta nada.
+    """
+    from sqlalchemy import event  # acá y no arriba: app.py importa este módulo antes que nada
+
+    if umbral_lenta_ms is not None and log_path is not None and not log_sql_lentas.handlers:
+        handler = logging.FileHandler(log_path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        log_sql_lentas.addHandler(handler)
+        log_sql_lentas.setLevel(logging.INFO)
+        log_sql_lentas.propagate = False
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, _cursor, _statement, _parameters, _context, _executemany):
+        conn.info.setdefault("_t0_consultas", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, _cursor, statement, parameters, _context, executemany):
+        ms = (time.perf_counter() - conn.info["_t0_consultas"].pop()) * 1000
+        if statement.startswith(SENTENCIAS_TRANSACCION):
+            return
+        consultas = _consultas_actuales.get()
+        if consultas is not None:
+            consultas.registrar(statement, ms)
+        if umbral_lenta_ms is not None and ms >= umbral_lenta_ms:
+            filas = f"executemany x{len(parameters)}" if executemany else f"params={parameters!r:.200}"
+            log_sql_lentas.info("%.1f ms  %s  [%s]", ms, " ".join(statement.split()), filas)
+
+
+class Tiempos:
+    """Milisegundos (y consultas SQL, con DEBUG_TIEMPOS) por fase de una ejecución del script (un rerun de Streamlit)."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases: dict[str, float] = {}
+        self.sql = ConsultasSQL()
+        self.sql_por_fase: dict[str, int] = {}
+        if DEBUG_TIEMPOS:
+            _consultas_actuales.set(self.sql)
+
+    @contextmanager
+    def medir(self, fase: str):
+        t0 = time.perf_counter()
+        consultas0 = self.sql.cantidad
+        try:
+            yield
+        finally:
+            self.fases[fase] = self.fases.get(fase, 0.0) + (time.perf_counter() - t0) * 1000
+            self.sql_por_fase[fase] = self.sql_por_fase.get(fase, 0) + self.sql.cantidad - consultas0
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.inicio) * 1000